@@ -0,0 +1,171 @@
+import asyncio
+from collections import OrderedDict
+from functools import partial
+from time import time
+from typing import List, Dict, Optional, AsyncIterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
+    SimulationResult
+from solai_evolutionary_algorithm.utils.character_hash_utils import simulation_content_hash
+
+
+def resolve_coalesced_future(
+        future: asyncio.Future,
+        simulation_data: SimulationData,
+        in_flight_future: asyncio.Future
+) -> None:
+    if future.done():
+        return
+    if in_flight_future.exception() is not None:
+        future.set_exception(in_flight_future.exception())
+    else:
+        future.set_result({
+            **in_flight_future.result(),
+            'simulationId': simulation_data['simulationId'],
+            'simulationData': simulation_data
+        })
+
+
+class AsyncSimulationQueue:
+    """
+    asyncio client for a SimulationQueue. Every submitted simulation gets a future, and a single background reader
+    resolves the futures by simulationId as results arrive. Blocking redis calls are run in the default executor,
+    so the event loop is free to run other evaluations, plotting or database writes while simulations run.
+
+    lost_simulation_timeout: When the queue is not reliable, the oldest pending simulation is re-pushed
+        if no results have been received for this many seconds.
+    When the simulation queue coalesces simulations, a simulation with the same content as one already in flight,
+    from any evaluation, is not pushed but gets the result of the one in flight.
+    If reading results fails, for example when redis is unreachable, every pending future gets the exception,
+    and the next submitted simulations start a new reader.
+    """
+
+    def __init__(self, simulation_queue: SimulationQueue, lost_simulation_timeout: float = 8):
+        self.simulation_queue = simulation_queue
+        self.lost_simulation_timeout = lost_simulation_timeout
+
+        self.__futures_by_id: Dict[str, asyncio.Future] = {}
+        self.__simulation_data_by_id: Dict[str, SimulationData] = OrderedDict()
+        self.__reader_task: Optional[asyncio.Task] = None
+        self.__in_flight_future_by_content_hash: Dict[str, asyncio.Future] = {}
+
+    def create_simulation_id(self) -> str:
+        return self.simulation_queue.create_simulation_id()
+
+    def pending_count(self) -> int:
+        return len(self.__futures_by_id)
+
+    async def submit_simulations_data(self, simulations_data: List[SimulationData]) -> List[asyncio.Future]:
+        """
+        Pushes simulations and returns a future for each simulation, resolved with its SimulationResult
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        push_simulations_data = []
+        for simulation_data in simulations_data:
+            simulation_id = simulation_data['simulationId']
+            if not self.simulation_queue.coalesce_simulations:
+                future = loop.create_future()
+                self.__futures_by_id[simulation_id] = future
+                self.__simulation_data_by_id[simulation_id] = simulation_data
+                futures.append(future)
+                push_simulations_data.append(simulation_data)
+                continue
+
+            # the future of the pushed simulation is never cancelled, as other evaluations may wait for its result
+            content_hash = simulation_content_hash(simulation_data)
+            in_flight_future = self.__in_flight_future_by_content_hash.get(content_hash)
+            if in_flight_future is None:
+                in_flight_future = loop.create_future()
+                self.__in_flight_future_by_content_hash[content_hash] = in_flight_future
+                in_flight_future.add_done_callback(
+                    lambda _, content_hash=content_hash: self.__in_flight_future_by_content_hash.pop(content_hash))
+                self.__futures_by_id[simulation_id] = in_flight_future
+                self.__simulation_data_by_id[simulation_id] = simulation_data
+                push_simulations_data.append(simulation_data)
+            future = loop.create_future()
+            in_flight_future.add_done_callback(partial(resolve_coalesced_future, future, simulation_data))
+            futures.append(future)
+
+        if push_simulations_data:
+            await loop.run_in_executor(None, self.simulation_queue.push_simulations_data, push_simulations_data)
+
+        if self.__reader_task is None or self.__reader_task.done():
+            self.__reader_task = loop.create_task(self.__read_results())
+
+        return futures
+
+    async def push_simulations_data_wait_results(self, simulations_data: List[SimulationData]) -> List[SimulationResult]:
+        futures = await self.submit_simulations_data(simulations_data)
+        return list(await asyncio.gather(*futures))
+
+    async def iter_simulations_results(self, simulations_data: List[SimulationData]) -> AsyncIterator[SimulationResult]:
+        """
+        Pushes simulations and yields each result in the order they arrive
+        """
+        futures = await self.submit_simulations_data(simulations_data)
+        for future in asyncio.as_completed(futures):
+            yield await future
+
+    async def __read_results(self) -> None:
+        try:
+            await self.__read_results_until_done()
+        except Exception as exception:
+            failed_futures = list(self.__futures_by_id.values())
+            self.__futures_by_id.clear()
+            self.__simulation_data_by_id.clear()
+            self.__reader_task = None
+            for future in failed_futures:
+                if not future.done():
+                    future.set_exception(exception)
+            print(f"Reading simulation results failed, failed {len(failed_futures)} pending simulations: {exception}")
+
+    async def __read_results_until_done(self) -> None:
+        loop = asyncio.get_running_loop()
+        prev_received_result_time = time()
+        prev_reap_time = prev_received_result_time
+        lease_deadline_by_id: Dict[str, float] = {}
+
+        while self.__futures_by_id:
+            simulation_results = await loop.run_in_executor(
+                None, partial(self.simulation_queue.get_simulation_results_blocking, timeout=1))
+
+            for simulation_result in simulation_results:
+                simulation_id = simulation_result['simulationId']
+                future = self.__futures_by_id.pop(simulation_id, None)
+                simulation_data = self.__simulation_data_by_id.pop(simulation_id, None)
+                # the future may have been cancelled by an evaluation that no longer waits for it
+                if future is not None and not future.done():
+                    # the simulation data is either not echoed back, or may only reference the characters,
+                    # so the local copy is used
+                    future.set_result({**simulation_result, 'simulationData': simulation_data})
+
+            # forget simulations nobody is waiting for
+            for simulation_id, future in list(self.__futures_by_id.items()):
+                if future.done():
+                    self.__futures_by_id.pop(simulation_id)
+                    self.__simulation_data_by_id.pop(simulation_id, None)
+
+            new_time = time()
+            if simulation_results:
+                prev_received_result_time = new_time
+
+            if self.simulation_queue.reliable:
+                if self.__simulation_data_by_id and new_time - prev_reap_time > self.simulation_queue.reap_interval:
+                    await loop.run_in_executor(None, partial(
+                        self.simulation_queue.requeue_expired_leases,
+                        self.__simulation_data_by_id,
+                        lease_deadline_by_id
+                    ))
+                    prev_reap_time = new_time
+            elif self.__simulation_data_by_id and new_time - prev_received_result_time > self.lost_simulation_timeout:
+                print(f"Not gotten results for {self.lost_simulation_timeout} seconds, "
+                      f"repushing single simulationData")
+                first_non_received_id, first_non_received_simulation_data = \
+                    next(iter(self.__simulation_data_by_id.items()))
+                await loop.run_in_executor(
+                    None, self.simulation_queue.push_simulation_data, first_non_received_simulation_data)
+                # move the newly pushed simulation data to the end
+                self.__simulation_data_by_id.pop(first_non_received_id)
+                self.__simulation_data_by_id[first_non_received_id] = first_non_received_simulation_data
+                prev_received_result_time = new_time
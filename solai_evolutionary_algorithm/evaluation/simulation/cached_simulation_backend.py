@@ -0,0 +1,115 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import List, Iterator, Optional, Dict, Tuple
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+from solai_evolutionary_algorithm.utils.character_hash_utils import simulation_content_hash
+
+# the parts of a result that are cached, the rest is specific to the simulation that produced it
+CACHED_RESULT_FIELDS = ('metrics', 'repeatMetrics')
+
+
+class CachedSimulationBackend(SimulationBackend):
+    """
+    Serves simulations from a cache of earlier results, and only runs the others on the wrapped backend.
+    Results are keyed by simulation_content_hash, so a simulation of the same genomes (ignoring characterId and name),
+    metrics and repeat slot as an earlier one gets the earlier result, under its own simulationId.
+    The latest memory_size results are kept in memory. With cache_file, every result is also stored in that SQLite
+    database, which is read on memory misses, so results are reused across runs.
+    """
+
+    def __init__(self, backend: SimulationBackend, cache_file: Optional[str] = None, memory_size: int = 100000):
+        self.backend = backend
+        self.memory_size = memory_size
+        self.__memory_cache: Dict[str, Dict] = OrderedDict()
+        self.__database: Optional[sqlite3.Connection] = None
+        if cache_file is not None:
+            self.__database = sqlite3.connect(cache_file, check_same_thread=False)
+            self.__database.execute(
+                "CREATE TABLE IF NOT EXISTS simulation_results (content_hash TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self.__database.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def create_simulation_id(self) -> str:
+        return self.backend.create_simulation_id()
+
+    def hit_rate(self) -> Optional[float]:
+        """
+        Cached simulations per looked up simulation, None before any lookup
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def get_cached_result(self, content_hash: str) -> Optional[Dict]:
+        cached_result = self.__memory_cache.get(content_hash)
+        if cached_result is not None:
+            self.__memory_cache.move_to_end(content_hash)
+            return cached_result
+        if self.__database is None:
+            return None
+        row = self.__database.execute(
+            "SELECT result FROM simulation_results WHERE content_hash = ?", (content_hash,)).fetchone()
+        if row is None:
+            return None
+        cached_result = json.loads(row[0])
+        self.remember(content_hash, cached_result)
+        return cached_result
+
+    def remember(self, content_hash: str, cached_result: Dict) -> None:
+        self.__memory_cache[content_hash] = cached_result
+        self.__memory_cache.move_to_end(content_hash)
+        while len(self.__memory_cache) > self.memory_size:
+            self.__memory_cache.popitem(last=False)
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        batch_hits = 0
+        uncached_simulations_data: List[SimulationData] = []
+        content_hash_by_id: Dict[str, str] = {}
+        for simulation_data in simulations_data:
+            content_hash = simulation_content_hash(simulation_data)
+            cached_result = self.get_cached_result(content_hash)
+            if cached_result is None:
+                content_hash_by_id[simulation_data['simulationId']] = content_hash
+                uncached_simulations_data.append(simulation_data)
+                continue
+            batch_hits += 1
+            yield {
+                **cached_result,
+                'simulationId': simulation_data['simulationId'],
+                'simulationData': simulation_data
+            }
+
+        self.hits += batch_hits
+        self.misses += len(uncached_simulations_data)
+        hit_rate = self.hit_rate()
+        print(f"Got {batch_hits} of {len(simulations_data)} simulations from the simulation cache, "
+              f"hit rate {'n/a' if hit_rate is None else f'{hit_rate:.0%}'}")
+        if not uncached_simulations_data:
+            return
+
+        new_rows: List[Tuple[str, str]] = []
+        try:
+            for simulation_result in self.backend.iter_simulations_results(uncached_simulations_data):
+                cached_result = {
+                    field: simulation_result[field]
+                    for field in CACHED_RESULT_FIELDS
+                    if field in simulation_result
+                }
+                content_hash = content_hash_by_id[simulation_result['simulationId']]
+                self.remember(content_hash, cached_result)
+                new_rows.append((content_hash, json.dumps(cached_result)))
+                yield simulation_result
+        finally:
+            # results received before the iteration stopped are kept as well
+            if self.__database is not None and new_rows:
+                self.__database.executemany(
+                    "INSERT OR REPLACE INTO simulation_results (content_hash, result) VALUES (?, ?)", new_rows)
+                self.__database.commit()
+
+    def close(self) -> None:
+        if self.__database is not None:
+            self.__database.close()
+            self.__database = None
@@ -1,18 +1,24 @@
+import math
+import sys
 from enum import Enum
-from statistics import mean
-from typing import List, Optional, Dict, Tuple, Callable, Union
+from statistics import mean, stdev
+from typing import List, Optional, Dict, Tuple, Callable, Union, Iterable, Iterator, TypedDict, Generator
 
+from solai_evolutionary_algorithm.evaluation.simulation.async_simulation_queue import AsyncSimulationQueue
 from solai_evolutionary_algorithm.evaluation.simulation.novelty_handling import \
     calculate_distance_and_update_novel_archive, IndividualsWithDistance, NovelArchive
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_fitness_evaluation import \
     SimulationFitnessEvaluation, \
-    CharacterAllMeasurements, CharactersAllMeasurements
+    CharacterAllMeasurements, CharactersAllMeasurements, CharactersMeasurementsAccumulator
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import Endpoint
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_surrogate import RidgeSurrogate
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import PRIORITY_HIGH, PRIORITY_NORMAL
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
     CharacterConfig, SimulationResult
 from solai_evolutionary_algorithm.evolution.evolution_types import Individual
 from solai_evolutionary_algorithm.evolution.evolution_types import Population, EvaluatedPopulation, \
     EvaluatedIndividual
-from solai_evolutionary_algorithm.utils.kwargs_utils import filter_not_none_values
 
 
 class InfeasibleObjective(Enum):
@@ -20,11 +26,50 @@ class InfeasibleObjective(Enum):
     FEASIBILITY = "FEASIBILITY"
 
 
+SequentialFeasibilitySummary = TypedDict("SequentialFeasibilitySummary", {
+    'rounds': int,
+    # games simulated, and the games simulating every individual simulation_population_count times would take
+    'simulations': int,
+    'maxSimulations': int,
+    'savedSimulations': int,
+    # individuals whose feasibility was decided before simulation_population_count repeats
+    'decidedEarly': int
+})
+
+
+SurrogateSummary = TypedDict("SurrogateSummary", {
+    'predictedInfeasible': int,
+    # predicted infeasible individuals whose confirmation games were infeasible as well
+    'confirmedInfeasible': int,
+    'savedSimulations': int
+})
+
+
 class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
 
     """
     feasible_metric_ranges: The ranges of a simulation result that determines an individual feasible or infeasible.
     minimum_required_feasible_metric_percentage: The percentage of metrics that must fall into the feasible metric ranges.
+    multi_repeat_simulations: Send each character pair as one simulation repeated simulation_population_count times.
+    deduplicate_genomes: Simulate each distinct genome of the population once, and give its measurements to the
+        individuals with the same genome.
+    borderline_margin: If given, simulations of individuals whose previous mean measurement of a metric is within this
+        fraction of the feasible range from its edge are run at high priority, as they decide if the individual is
+        feasible. For ranges without an upper bound, only the distance to the lower bound is tested, with the margin
+        taken as this fraction of the lower bound. Not for reliable and stream queues, which have no priority lanes.
+    sequential_feasibility: Simulate in rounds of sequential_round_repeats repeats against every opponent, and stop
+        simulating an individual once the confidence interval of the mean of every metric (confidence_z standard
+        errors wide on each side) is inside or outside its feasible range. No individual is simulated more than
+        simulation_population_count times. The simulations saved by each evaluation are kept in sequential_summaries.
+        Only used by evaluate_one_population.
+    simulation_budget: Race feasibility within this many games per evaluation, see SimulationFitnessEvaluation.
+    screening_max_frames: Screen the population with short games first, see SimulationFitnessEvaluation.
+    genome_vector_func: Maps individuals to numeric vectors (see create_character_vector_func) for a RidgeSurrogate,
+        trained on the mean measurements of every individual simulated in full. Individuals it predicts infeasible,
+        with an interval of confidence_z standard deviations outside a feasible range, only get
+        surrogate_confirmation_repeats games against each opponent. The ones these games confirm infeasible are not
+        simulated further, the others are simulated in full. A SurrogateSummary per evaluation is kept in
+        surrogate_summaries.
     """
 
     def __init__(
@@ -38,11 +83,48 @@ class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
             infeasible_objective: InfeasibleObjective,
             queue_host: Optional[str] = None,
             queue_port: Optional[str] = None,
+            run_scoped_results: Optional[bool] = None,
+            intern_characters: Optional[bool] = None,
+            queue_streams: bool = False,
+            queue_endpoints: Optional[List[Endpoint]] = None,
+            simulation_backend: Optional[SimulationBackend] = None,
+            multi_repeat_simulations: bool = False,
+            deduplicate_genomes: bool = False,
+            simulation_budget: Optional[int] = None,
+            screening_max_frames: Optional[int] = None,
+            screening_metric_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+            screening_repeats: int = 1,
             minimum_required_feasible_metric_percentage: Optional[float] = 1.0,
             simulation_population_count: Optional[int] = 1,
+            borderline_margin: Optional[float] = None,
+            sequential_feasibility: bool = False,
+            sequential_round_repeats: int = 2,
+            confidence_z: float = 1.96,
+            genome_vector_func: Optional[Callable[[Individual], List[float]]] = None,
+            surrogate_confirmation_repeats: int = 1,
         ):
-
-        self.metrics = metrics
+        if sequential_feasibility and simulation_budget is not None:
+            raise ValueError("Sequential feasibility and a simulation budget can not be combined")
+        if sequential_feasibility and sequential_round_repeats < 2:
+            raise ValueError("Sequential rounds need at least 2 repeats to estimate a confidence interval")
+
+        self.init_simulation_evaluation(
+            metrics=metrics,
+            simulation_population_count=simulation_population_count,
+            queue_host=queue_host,
+            queue_port=queue_port,
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            queue_streams=queue_streams,
+            queue_endpoints=queue_endpoints,
+            simulation_backend=simulation_backend,
+            multi_repeat_simulations=multi_repeat_simulations,
+            deduplicate_genomes=deduplicate_genomes,
+            simulation_budget=simulation_budget,
+            screening_max_frames=screening_max_frames,
+            screening_metric_ranges=screening_metric_ranges,
+            screening_repeats=screening_repeats
+        )
         self.simulation_characters = simulation_characters
         self.feasible_metric_ranges = feasible_metric_ranges
         self.distance_func = distance_func
@@ -54,17 +136,20 @@ class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
         if infeasible_objective == InfeasibleObjective.NOVELTY:
             self.infeasible_novel_archive: List[Individual] = []
 
-        self.simulation_queue = SimulationQueue(
-            **filter_not_none_values({
-                'host': queue_host,
-                'port': queue_port
-            })
-        )
-
         self.minimum_required_feasible_metric_percentage = minimum_required_feasible_metric_percentage
-        self.simulation_population_count = simulation_population_count
+        self.borderline_margin = borderline_margin
+        self.sequential_feasibility = sequential_feasibility
+        self.sequential_round_repeats = sequential_round_repeats
+        self.confidence_z = confidence_z
+        self.sequential_summaries: List[SequentialFeasibilitySummary] = []
+        self.genome_vector_func = genome_vector_func
+        self.surrogate_confirmation_repeats = surrogate_confirmation_repeats
+        self.surrogate: Optional[RidgeSurrogate] = None
+        self.surrogate_summaries: List[SurrogateSummary] = []
+        self.__surrogate_training_character_ids = set()
 
         self.__prev_measures_by_character_id: CharactersAllMeasurements = {}
+        self.__prev_mean_measurements_by_character_id: Dict[str, Dict[str, float]] = {}
 
     def __call__(self, population: Population) -> EvaluatedPopulation:
         return self.evaluate_one_population(population)
@@ -72,20 +157,26 @@ class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
     def get_prev_measures_by_character_id(self) -> CharactersAllMeasurements:
         return self.__prev_measures_by_character_id
 
-    def evaluate_one_population(self, population: Population) -> EvaluatedPopulation:
-        simulations_results = self.simulate_population(
-            population, self.simulation_queue)
-
-        simulations_measurements = self.simulation_results_to_simulation_measurements(
-            simulations_results)
+    def evaluate_simulations_results(
+            self,
+            population: Population,
+            simulations_results: Iterable[SimulationResult]
+    ) -> EvaluatedPopulation:
 
-        all_measurements_by_character: CharactersAllMeasurements = self.group_all_measures_by_character(
-            simulations_measurements)
+        # measurements are grouped by character as results arrive
+        accumulator = self.accumulate_simulations_results(simulations_results)
 
-        self.__prev_measures_by_character_id = all_measurements_by_character
+        self.__prev_measures_by_character_id = accumulator.measurements_by_character
+        self.__prev_mean_measurements_by_character_id = accumulator.mean_measurements_by_character()
+        if self.genome_vector_func is not None:
+            self.train_surrogate(population)
 
-        feasibility_by_character_id: Dict[str, float] = self.evaluate_feasibility_of_population(
-            all_measurements_by_character)
+        feasibility_by_character_id: Dict[str, float] = {
+            character_id: self.feasibility_score_of_means(mean_measurements)
+            for character_id, mean_measurements in self.__prev_mean_measurements_by_character_id.items()
+        }
+        # individuals that did not pass the screen have no full length measurements, and no feasible metric
+        feasibility_by_character_id.update(dict.fromkeys(self.screened_out_character_ids, 0.0))
 
         feasible_population = [
             character
@@ -163,31 +254,218 @@ class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
         return distance_by_character_id, novel_archive
 
 
-    def simulate_population(self, population: Population, simulation_queue: SimulationQueue) -> List[SimulationResult]:
+    def create_simulations_data(
+            self,
+            population: Population,
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue]
+    ) -> List[SimulationData]:
+        return self.create_repeated_simulations_data(self.create_character_pairs(population), simulation_queue)
 
-        character_pairs: List[Tuple[CharacterConfig, CharacterConfig]] = [
+    def create_character_pairs(self, population: Population) -> List[Tuple[CharacterConfig, CharacterConfig]]:
+        return [
             (individual, opponent)
             for opponent in self.simulation_characters
             for individual in population
         ]
 
-        all_simulation_pairs = self.simulation_population_count*character_pairs
+    def stream_simulate_full_length(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        if self.genome_vector_func is not None:
+            population = yield from self.confirm_predicted_infeasible(population, simulation_queue)
+            self.__surrogate_training_character_ids.update(individual['characterId'] for individual in population)
+
+        if self.sequential_feasibility:
+            yield from self.sequential_simulate_population(population, simulation_queue)
+        else:
+            yield from super(ConstrainedNoveltyEvaluation, self).stream_simulate_full_length(population, simulation_queue)
 
-        current_simulations_data = [
-            SimulationData(
-                simulationId=simulation_queue.create_simulation_id(),
-                charactersConfigs=char_pair,
-                metrics=self.metrics
-            )
-            for char_pair in all_simulation_pairs
+    def sequential_simulate_population(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        accumulator = CharactersMeasurementsAccumulator()
+        undecided_population = population
+        repeats_count = 0
+        rounds_count = 0
+        simulations_count = 0
+        decided_early_count = 0
+        while undecided_population and repeats_count < self.simulation_population_count:
+            round_repeats = min(self.sequential_round_repeats, self.simulation_population_count - repeats_count)
+            character_pairs = self.create_character_pairs(undecided_population)
+            round_simulations_data = self.create_racing_simulations_data(
+                character_pairs, simulation_queue, round_repeats, repeats_count)
+
+            print(f"Pushing {len(round_simulations_data)} simulations of {len(undecided_population)} undecided "
+                  f"individuals, round {rounds_count + 1}...\n\n")
+            for simulation_result in simulation_queue.iter_simulations_results(round_simulations_data):
+                accumulator.add_simulation_result(simulation_result)
+                yield simulation_result
+
+            repeats_count += round_repeats
+            rounds_count += 1
+            simulations_count += len(character_pairs) * round_repeats
+            if repeats_count < self.simulation_population_count:
+                still_undecided_population = [
+                    individual
+                    for individual in undecided_population
+                    if not self.is_feasibility_decided(
+                        accumulator.measurements_by_character[individual['characterId']])
+                ]
+                decided_early_count += len(undecided_population) - len(still_undecided_population)
+                undecided_population = still_undecided_population
+
+        max_simulations_count = len(population) * len(self.simulation_characters) * self.simulation_population_count
+        summary = SequentialFeasibilitySummary(
+            rounds=rounds_count,
+            simulations=simulations_count,
+            maxSimulations=max_simulations_count,
+            savedSimulations=max_simulations_count - simulations_count,
+            decidedEarly=decided_early_count
+        )
+        self.sequential_summaries.append(summary)
+        print(f"Sequential feasibility saved {summary['savedSimulations']} of {max_simulations_count} simulations "
+              f"in {rounds_count} rounds, {summary['decidedEarly']} individuals decided early")
+
+    def uncertain_individuals(
+            self,
+            population: Population,
+            measurements_by_character: CharactersAllMeasurements
+    ) -> Population:
+        """
+        The fitness is novelty, which does not depend on simulations, so only feasibility is raced
+        """
+        return [
+            individual
+            for individual in population
+            if not self.is_feasibility_decided(measurements_by_character[individual['characterId']])
+        ]
+
+    def confirm_predicted_infeasible(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Generator[SimulationResult, None, Population]:
+        """
+        Simulates the individuals the surrogate predicts infeasible a few times, yields the results of the ones
+        confirmed infeasible, and returns the individuals left to simulate in full
+        """
+        predicted_infeasible_population = [
+            individual
+            for individual in population
+            if self.is_predicted_infeasible(individual)
+        ]
+        if not predicted_infeasible_population:
+            return population
+
+        confirmation_simulations_data = self.create_racing_simulations_data(
+            self.create_character_pairs(predicted_infeasible_population),
+            simulation_queue,
+            self.surrogate_confirmation_repeats,
+            0
+        )
+        print(f"Pushing {len(confirmation_simulations_data)} simulations confirming "
+              f"{len(predicted_infeasible_population)} individuals predicted infeasible...\n\n")
+        accumulator = CharactersMeasurementsAccumulator()
+        for simulation_result in simulation_queue.iter_simulations_results(confirmation_simulations_data):
+            accumulator.add_simulation_result(simulation_result)
+
+        confirmed_infeasible_character_ids = {
+            individual['characterId']
+            for individual in predicted_infeasible_population
+            if self.feasibility_score_of_means(accumulator.mean_measurements(individual['characterId'])) != 1
+        }
+        # the confirmation results of the others are left out, they are simulated again in full
+        for simulation_result in accumulator.simulations_results:
+            if simulation_result['simulationData']['charactersConfigs'][0]['characterId'] \
+                    in confirmed_infeasible_character_ids:
+                yield simulation_result
+
+        summary = SurrogateSummary(
+            predictedInfeasible=len(predicted_infeasible_population),
+            confirmedInfeasible=len(confirmed_infeasible_character_ids),
+            savedSimulations=len(confirmed_infeasible_character_ids) * len(self.simulation_characters) *
+            max(0, self.simulation_population_count - self.surrogate_confirmation_repeats)
+        )
+        self.surrogate_summaries.append(summary)
+        print(f"Surrogate predicted {summary['predictedInfeasible']} individuals infeasible, "
+              f"{summary['confirmedInfeasible']} confirmed, saving {summary['savedSimulations']} simulations")
+        return [
+            individual
+            for individual in population
+            if individual['characterId'] not in confirmed_infeasible_character_ids
         ]
 
-        print(
-            f"Pushing {len(current_simulations_data)} simulations, waiting for simulation results...\n\n")
-        simulations_result = simulation_queue.push_simulations_data_wait_results(
-            current_simulations_data)
+    def is_predicted_infeasible(self, individual: Individual) -> bool:
+        if self.surrogate is None:
+            return False
+        prediction = self.surrogate.predict(self.genome_vector_func(individual))
+        if prediction is None:
+            return False
+        predicted_means, predicted_stds = prediction
+        for metric, (low, high) in self.feasible_metric_ranges.items():
+            half_width = self.confidence_z * predicted_stds[metric]
+            if predicted_means[metric] + half_width < low or predicted_means[metric] - half_width > high:
+                return True
+        return False
+
+    def train_surrogate(self, population: Population) -> None:
+        """
+        Adds the mean measurements of the individuals simulated in full since the last training
+        """
+        for individual in population:
+            if individual['characterId'] not in self.__surrogate_training_character_ids:
+                continue
+            genome_vector = self.genome_vector_func(individual)
+            if self.surrogate is None:
+                self.surrogate = RidgeSurrogate(self.metrics, features_count=len(genome_vector))
+            self.surrogate.add(genome_vector, self.__prev_mean_measurements_by_character_id[individual['characterId']])
+        self.__surrogate_training_character_ids = set()
+
+    def is_feasibility_decided(self, character_measurements: CharacterAllMeasurements) -> bool:
+        return all(
+            self.is_metric_decided(metric, measurements)
+            for metric, measurements in character_measurements.items()
+        )
 
-        return simulations_result
+    def is_metric_decided(self, metric: str, measurements: List[float]) -> bool:
+        """
+        If the confidence interval of the mean measurement is entirely inside or entirely outside the feasible range
+        """
+        if len(measurements) < 2:
+            return False
+        low, high = self.feasible_metric_ranges[metric]
+        measurements_mean = mean(measurements)
+        half_width = self.confidence_z * stdev(measurements) / math.sqrt(len(measurements))
+        interval_low, interval_high = measurements_mean - half_width, measurements_mean + half_width
+        return low <= interval_low and interval_high <= high or interval_high < low or interval_low > high
+
+    def character_pair_priority(self, char_pair: Tuple[CharacterConfig, CharacterConfig]) -> int:
+        """
+        With borderline_margin, individuals evaluated before (elites) that are close to the edge of a feasible range
+        are simulated first
+        """
+        if self.borderline_margin is None or self.simulation_priority != PRIORITY_NORMAL:
+            return self.simulation_priority
+        individual = char_pair[0]
+        prev_mean_measurements = self.__prev_mean_measurements_by_character_id.get(individual['characterId'])
+        if prev_mean_measurements is not None and any(
+            self.is_borderline_metric_result(metric, metric_result)
+            for metric, metric_result in prev_mean_measurements.items()
+        ):
+            return PRIORITY_HIGH
+        return self.simulation_priority
+
+    def is_borderline_metric_result(self, metric: str, metric_result: float) -> bool:
+        low, high = self.feasible_metric_ranges[metric]
+        # ranges without an upper bound use MAX_VALUE, so only the lower bound is an edge
+        if high >= sys.float_info.max:
+            return abs(metric_result - low) <= self.borderline_margin * abs(low)
+        margin = self.borderline_margin * (high - low)
+        return abs(metric_result - low) <= margin or abs(high - metric_result) <= margin
 
     def evaluate_feasibility_of_population(
             self,
@@ -204,12 +482,15 @@ class ConstrainedNoveltyEvaluation(SimulationFitnessEvaluation):
             metric: mean(measurements)
             for (metric, measurements) in character_simulation_result.items()
         }
+        return self.feasibility_score_of_means(mean_simulation_results)
+
+    def feasibility_score_of_means(self, mean_simulation_results: Dict[str, float]) -> float:
         feasible_number = sum([
             self.is_feasible_metric_result(metric, metric_result)
             for metric, metric_result in mean_simulation_results.items()
         ])
 
-        metrics_count = len(character_simulation_result)
+        metrics_count = len(mean_simulation_results)
         return feasible_number / metrics_count
 
     def is_feasible_metric_result(self, metric: str, metric_result: float) -> bool:
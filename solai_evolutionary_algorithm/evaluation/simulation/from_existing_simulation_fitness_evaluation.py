@@ -2,7 +2,10 @@ from copy import deepcopy
 from functools import reduce
 from itertools import combinations, chain
 from statistics import mean
-from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict
+from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict, Union
+from solai_evolutionary_algorithm.evaluation.simulation.async_simulation_queue import AsyncSimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import Endpoint
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
     CharacterConfig, SimulationResult
 
@@ -24,6 +27,17 @@ class FromExistingSimulationFitnessEvaluation(SimulationFitnessEvaluation):
             simulation_population_count: int,
             queue_host: Optional[str] = None,
             queue_port: Optional[int] = None,
+            run_scoped_results: Optional[bool] = None,
+            intern_characters: Optional[bool] = None,
+            queue_streams: bool = False,
+            queue_endpoints: Optional[List[Endpoint]] = None,
+            simulation_backend: Optional[SimulationBackend] = None,
+            multi_repeat_simulations: bool = False,
+            deduplicate_genomes: bool = False,
+            simulation_budget: Optional[int] = None,
+            screening_max_frames: Optional[int] = None,
+            screening_metric_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+            screening_repeats: int = 1,
     ):
         super().__init__(
             metrics=metrics,
@@ -31,7 +45,18 @@ class FromExistingSimulationFitnessEvaluation(SimulationFitnessEvaluation):
             metrics_weights=metrics_weights,
             simulation_population_count=simulation_population_count,
             queue_host=queue_host,
-            queue_port=queue_port
+            queue_port=queue_port,
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            queue_streams=queue_streams,
+            queue_endpoints=queue_endpoints,
+            simulation_backend=simulation_backend,
+            multi_repeat_simulations=multi_repeat_simulations,
+            deduplicate_genomes=deduplicate_genomes,
+            simulation_budget=simulation_budget,
+            screening_max_frames=screening_max_frames,
+            screening_metric_ranges=screening_metric_ranges,
+            screening_repeats=screening_repeats
         )
         if not simulation_characters:
             raise ValueError(
@@ -42,17 +67,17 @@ class FromExistingSimulationFitnessEvaluation(SimulationFitnessEvaluation):
     def __call__(self, population: Population) -> EvaluatedPopulation:
         return self.evaluate_one_population(population)
 
-    def evaluate_one_population(self, population: Population) -> EvaluatedPopulation:
-
-        simulations_results = self.simulate_population(
-            population, self.simulation_queue)
-        self.__prev_simulation_results = simulations_results
+    def evaluate_simulations_results(
+            self,
+            population: Population,
+            simulations_results: Iterable[SimulationResult]
+    ) -> EvaluatedPopulation:
 
-        simulations_measurements = self.simulation_results_to_simulation_measurements(
-            simulations_results)
+        # a list of all measurements for each metric for each character, folded in as results arrive
+        accumulator = self.accumulate_simulations_results(simulations_results)
+        self.__prev_simulation_results = accumulator.simulations_results
 
-        all_measurements_by_character: CharactersAllMeasurements =\
-            self.group_all_measures_by_character(simulations_measurements)
+        all_measurements_by_character: CharactersAllMeasurements = accumulator.measurements_by_character
         self.__prev_measures_by_character_id = all_measurements_by_character
 
         metric_fitness_by_character = self.evaluate_fitness_all_characters(
@@ -61,7 +86,7 @@ class FromExistingSimulationFitnessEvaluation(SimulationFitnessEvaluation):
         evaluated_population: EvaluatedPopulation = [
             EvaluatedIndividual(
                 individual=individual,
-                fitness=[metric_fitness_by_character[individual['characterId']]]
+                fitness=[self.screened_fitness(individual['characterId'], metric_fitness_by_character)]
             )
             for individual in population
         ]
@@ -75,32 +100,20 @@ class FromExistingSimulationFitnessEvaluation(SimulationFitnessEvaluation):
 
         return evaluated_population
 
-    def simulate_population(self, population: Population, simulation_queue: SimulationQueue) -> List[SimulationResult]:
+    def create_simulations_data(
+            self,
+            population: Population,
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue]
+    ) -> List[SimulationData]:
+        return self.create_repeated_simulations_data(self.create_character_pairs(population), simulation_queue)
 
-        character_pairs: List[Tuple[CharacterConfig, CharacterConfig]] = [
+    def create_character_pairs(self, population: Population) -> List[Tuple[CharacterConfig, CharacterConfig]]:
+        return [
             (individual, opponent)
             for opponent in self.simulation_characters
             for individual in population
         ]
 
-        all_simulation_pairs = self.simulation_population_count*character_pairs
-
-        current_simulations_data = [
-            SimulationData(
-                simulationId=simulation_queue.create_simulation_id(),
-                charactersConfigs=char_pair,
-                metrics=self.metrics
-            )
-            for char_pair in all_simulation_pairs
-        ]
-
-        print(
-            f"Pushing {len(current_simulations_data)} simulations, waiting for simulation results...\n\n")
-        simulations_result = simulation_queue.push_simulations_data_wait_results(
-            current_simulations_data)
-
-        return simulations_result
-
     def serialize(self):
         config = {'metrics': self.metrics,
                   'desiredValues': self.desired_values}
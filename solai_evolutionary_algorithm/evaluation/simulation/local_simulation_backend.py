@@ -0,0 +1,83 @@
+import json
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import count
+from typing import List, Iterator, Callable, Optional
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult, \
+    PRIORITY_NORMAL
+
+Simulator = Callable[[SimulationData], SimulationResult]
+
+# the simulator command started by this pool process, reused for every simulation it runs
+_simulator_process: Optional[subprocess.Popen] = None
+
+
+def run_simulator_command(command: List[str], simulation_data: SimulationData) -> SimulationResult:
+    """
+    Runs in a pool process. The simulator command reads one json SimulationData per line from stdin and writes one
+    json SimulationResult per line to stdout, and is kept running between simulations
+    """
+    global _simulator_process
+    if _simulator_process is None or _simulator_process.poll() is not None:
+        _simulator_process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True, bufsize=1)
+
+    _simulator_process.stdin.write(json.dumps(simulation_data) + "\n")
+    _simulator_process.stdin.flush()
+    result_line = _simulator_process.stdout.readline()
+    if not result_line:
+        raise RuntimeError(f"Simulator command {command} exited without a simulation result")
+    return json.loads(result_line)
+
+
+class LocalSimulationBackend(SimulationBackend):
+    """
+    Runs simulations in a pool of local processes, without redis, using every core by default.
+    Simulations are run either by simulator, a picklable function taking SimulationData and returning a
+    SimulationResult, or by a long-lived simulator command per pool process, see run_simulator_command.
+    """
+
+    def __init__(
+            self,
+            simulator: Optional[Simulator] = None,
+            command: Optional[List[str]] = None,
+            max_workers: Optional[int] = None
+    ):
+        if (simulator is None) == (command is None):
+            raise ValueError("Either a simulator function or a simulator command must be given")
+        self.simulator = simulator
+        self.command = command
+        self.max_workers = max_workers
+        self.__simulation_id_counter = count()
+        self.__executor: Optional[ProcessPoolExecutor] = None
+
+    def create_simulation_id(self) -> str:
+        return str(next(self.__simulation_id_counter))
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        # the pool runs simulations in the order they are submitted
+        prioritized_simulations_data = sorted(
+            simulations_data, key=lambda simulation_data: simulation_data.get('priority', PRIORITY_NORMAL))
+        simulation_data_by_future = {
+            (self.__executor.submit(self.simulator, simulation_data) if self.simulator is not None
+             else self.__executor.submit(run_simulator_command, self.command, simulation_data)): simulation_data
+            for simulation_data in prioritized_simulations_data
+        }
+        try:
+            for future in as_completed(simulation_data_by_future):
+                # results look the same as the ones from the simulation queue, whatever the simulator sends back
+                yield {**future.result(), 'simulationData': simulation_data_by_future[future]}
+        finally:
+            # stopped early, the simulations not started yet are not needed
+            for future in simulation_data_by_future:
+                future.cancel()
+
+    def close(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
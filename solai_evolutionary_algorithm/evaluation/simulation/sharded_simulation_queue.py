@@ -0,0 +1,153 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Tuple, Dict, Optional, Type
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
+    SimulationResult
+from solai_evolutionary_algorithm.evaluation.simulation.stream_simulation_queue import StreamSimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.worker_registry import FleetCapacity
+
+Endpoint = Tuple[str, int]
+
+# how long a single shard is blocked on for results, before the read is started again
+SHARD_READ_TIMEOUT = 1
+
+
+class ShardedSimulationQueue(SimulationQueue):
+    """
+    Spreads simulations over several redis instances, one shard queue per endpoint, by a hash of the simulationId.
+    Workers attach to any shard, and reply to a result queue on that same shard. Results are read from all shards
+    concurrently, with one outstanding blocking read per shard.
+    Takes the same arguments as the shard queues, which are SimulationQueue or shard_queue_class.
+    Populations (push_population and get_population) are kept on the first shard.
+    """
+
+    def __init__(
+            self,
+            endpoints: List[Endpoint],
+            shard_queue_class: Type[SimulationQueue] = SimulationQueue,
+            **kwargs
+    ):
+        if not endpoints:
+            raise ValueError("At least one redis endpoint is needed")
+
+        first_host, first_port = endpoints[0]
+        super(ShardedSimulationQueue, self).__init__(host=first_host, port=first_port, **kwargs)
+        # all shards use the run id of this queue client, so run scoped result queues have the same name everywhere
+        self.shards: List[SimulationQueue] = [
+            shard_queue_class(host=host, port=port, **{**kwargs, 'run_id': self.run_id})
+            for host, port in endpoints
+        ]
+        self.reliable = self.shards[0].reliable
+        self.__read_executor = ThreadPoolExecutor(max_workers=len(self.shards))
+        self.__pending_reads: Dict[int, Future] = {}
+
+    def shard_index(self, simulation_id: str) -> int:
+        # crc32 is stable across processes, unlike hash()
+        return zlib.crc32(simulation_id.encode("utf-8")) % len(self.shards)
+
+    def group_by_shard(self, simulations_data: List[SimulationData]) -> Dict[int, List[SimulationData]]:
+        simulations_data_by_shard: Dict[int, List[SimulationData]] = {}
+        for simulation_data in simulations_data:
+            simulations_data_by_shard.setdefault(
+                self.shard_index(simulation_data['simulationId']), []).append(simulation_data)
+        return simulations_data_by_shard
+
+    def refresh_result_queue_ttl(self) -> None:
+        # the shards do not exist yet while the base class is initialized
+        for shard in getattr(self, 'shards', []):
+            shard.refresh_result_queue_ttl()
+
+    def remove_abandoned_result_queues(self) -> int:
+        return sum(shard.remove_abandoned_result_queues() for shard in getattr(self, 'shards', []))
+
+    def push_simulation_data(self, simulation_data: SimulationData) -> None:
+        self.shards[self.shard_index(simulation_data['simulationId'])].push_simulation_data(simulation_data)
+
+    def push_simulations_data(self, simulations_data: List[SimulationData]) -> None:
+        for shard_index, shard_simulations_data in self.group_by_shard(simulations_data).items():
+            self.shards[shard_index].push_simulations_data(shard_simulations_data)
+
+    def get_simulation_result_blocking(self, timeout: int = 10) -> Optional[SimulationResult]:
+        simulation_results = self.get_simulation_results_blocking(max_count=1, timeout=timeout)
+        return simulation_results[0] if simulation_results else None
+
+    def get_simulation_results_blocking(self, max_count: Optional[int] = None, timeout: int = 10) -> List[SimulationResult]:
+        """
+        Waits until results arrive from at least one shard, and returns the results of every shard that has some.
+        A shard read still blocking on timeout is kept, and its results are returned by a later call.
+        Returns an empty list on timeout
+        """
+        for shard_index, shard in enumerate(self.shards):
+            if shard_index not in self.__pending_reads:
+                self.__pending_reads[shard_index] = self.__read_executor.submit(
+                    shard.get_simulation_results_blocking, max_count, SHARD_READ_TIMEOUT)
+
+        simulation_results = []
+        completed_reads, _ = wait(self.__pending_reads.values(), timeout=timeout, return_when=FIRST_COMPLETED)
+        for shard_index, pending_read in list(self.__pending_reads.items()):
+            if pending_read in completed_reads:
+                self.__pending_reads.pop(shard_index)
+                simulation_results += pending_read.result()
+        return simulation_results
+
+    def requeue_expired_leases(
+            self,
+            remaining_simulation_data_by_id: Dict[str, SimulationData],
+            lease_deadline_by_id: Dict[str, float]
+    ) -> int:
+        remaining_simulation_data_by_shard: Dict[int, Dict[str, SimulationData]] = {}
+        for simulation_id, simulation_data in remaining_simulation_data_by_id.items():
+            remaining_simulation_data_by_shard.setdefault(
+                self.shard_index(simulation_id), {})[simulation_id] = simulation_data
+        # leases are tracked by simulation id, so a single lease_deadline_by_id serves all shards
+        return sum(
+            self.shards[shard_index].requeue_expired_leases(shard_remaining_simulation_data_by_id, lease_deadline_by_id)
+            for shard_index, shard_remaining_simulation_data_by_id in remaining_simulation_data_by_shard.items()
+        )
+
+    def cancel_simulations(self, simulations_data: List[SimulationData]) -> int:
+        return sum(
+            self.shards[shard_index].cancel_simulations(shard_simulations_data)
+            for shard_index, shard_simulations_data in self.group_by_shard(simulations_data).items()
+        )
+
+    def data_queue_depth(self) -> int:
+        return sum(shard.data_queue_depth() for shard in self.shards)
+
+    def fleet_capacity(self) -> Optional[FleetCapacity]:
+        shard_capacities = [shard.fleet_capacity() for shard in self.shards]
+        if None in shard_capacities:
+            return None
+        return FleetCapacity(
+            workers=sum(shard_capacity['workers'] for shard_capacity in shard_capacities),
+            slots=sum(shard_capacity['slots'] for shard_capacity in shard_capacities),
+            busy=sum(shard_capacity['busy'] for shard_capacity in shard_capacities)
+        )
+
+    def get_simulation_data(self):
+        for shard in self.shards:
+            simulation_data = shard.get_simulation_data()
+            if simulation_data is not None:
+                return simulation_data
+        return None
+
+
+def create_simulation_queue(
+        endpoints: Optional[List[Endpoint]] = None,
+        streams: bool = False,
+        **kwargs
+) -> SimulationQueue:
+    """
+    A list based or stream based simulation queue, sharded over endpoints if more than one endpoint is given.
+    The endpoints replace the host and port arguments
+    """
+    simulation_queue_class = StreamSimulationQueue if streams else SimulationQueue
+    if endpoints is None:
+        return simulation_queue_class(**kwargs)
+
+    kwargs = {key: value for key, value in kwargs.items() if key not in ('host', 'port')}
+    if len(endpoints) > 1:
+        return ShardedSimulationQueue(endpoints=endpoints, shard_queue_class=simulation_queue_class, **kwargs)
+    host, port = endpoints[0]
+    return simulation_queue_class(host=host, port=port, **kwargs)
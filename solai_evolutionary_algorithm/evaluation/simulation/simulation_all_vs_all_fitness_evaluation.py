@@ -2,8 +2,11 @@ from copy import deepcopy
 from functools import reduce
 from itertools import combinations, chain
 from statistics import mean
-from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict
+from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict, Union
 
+from solai_evolutionary_algorithm.evaluation.simulation.async_simulation_queue import AsyncSimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import Endpoint
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
     CharacterConfig, SimulationResult
 from solai_evolutionary_algorithm.evolution.evolution_types import Population, FitnessEvaluation, EvaluatedPopulation, \
@@ -23,6 +26,12 @@ class SimulationAllVsAllFitnessEvaluation(SimulationFitnessEvaluation):
             simulation_population_count: int,
             queue_host: Optional[str] = None,
             queue_port: Optional[int] = None,
+            run_scoped_results: Optional[bool] = None,
+            intern_characters: Optional[bool] = None,
+            queue_streams: bool = False,
+            queue_endpoints: Optional[List[Endpoint]] = None,
+            simulation_backend: Optional[SimulationBackend] = None,
+            multi_repeat_simulations: bool = False,
     ):
         super(SimulationAllVsAllFitnessEvaluation, self).__init__(
             metrics=metrics,
@@ -30,7 +39,13 @@ class SimulationAllVsAllFitnessEvaluation(SimulationFitnessEvaluation):
             desired_values=desired_values,
             simulation_population_count=simulation_population_count,
             queue_host=queue_host,
-            queue_port=queue_port
+            queue_port=queue_port,
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            queue_streams=queue_streams,
+            queue_endpoints=queue_endpoints,
+            simulation_backend=simulation_backend,
+            multi_repeat_simulations=multi_repeat_simulations
         )
 
     def __call__(self, population: Population) -> EvaluatedPopulation:
@@ -42,22 +57,20 @@ class SimulationAllVsAllFitnessEvaluation(SimulationFitnessEvaluation):
     def get_prev_measures_by_character_id(self) -> CharactersAllMeasurements:
         return self.__prev_measures_by_character_id
 
-    def evaluate_one_population(self, population: Population) -> EvaluatedPopulation:
+    def evaluate_simulations_results(
+            self,
+            population: Population,
+            simulations_results: Iterable[SimulationResult]
+    ) -> EvaluatedPopulation:
 
         # assuming all pairs of characters are simulated
         character_simulations_count = len(population)-1
 
-        simulations_results = self.simulate_population(
-            population, self.simulation_queue)  # blocks until all finished
-        self.__prev_simulation_results = simulations_results
-
-        # a simpler representation of results
-        simulations_measurements = self.simulation_results_to_simulation_measurements(
-            simulations_results)
+        # a list of all measurements for each metric for each character, folded in as results arrive
+        accumulator = self.accumulate_simulations_results(simulations_results)
+        self.__prev_simulation_results = accumulator.simulations_results
 
-        # a list of all measurements for each metric for each character
-        all_measurements_by_character: CharactersAllMeasurements =\
-            self.group_all_measures_by_character(simulations_measurements)
+        all_measurements_by_character: CharactersAllMeasurements = accumulator.measurements_by_character
         self.__prev_measures_by_character_id = all_measurements_by_character
 
         metric_fitness_by_character = self.evaluate_fitness_all_characters(
@@ -79,34 +92,21 @@ class SimulationAllVsAllFitnessEvaluation(SimulationFitnessEvaluation):
 
         return evaluated_population
 
-    def simulate_population(
+    def create_simulations_data(
             self,
             population: Population,
-            simulation_queue: SimulationQueue
-    ) -> List[SimulationResult]:
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue]
+    ) -> List[SimulationData]:
         """
-        Simulate combinations of characters and return simulation results
+        Simulate combinations of characters
         """
-        character_pairs: List[Tuple[CharacterConfig,
-                                    CharacterConfig]] = list(combinations(population, 2))
-
-        all_simulation_pairs = self.simulation_population_count * character_pairs
-
-        current_simulations_data = [
-            SimulationData(
-                simulationId=simulation_queue.create_simulation_id(),
-                charactersConfigs=char_pair,
-                metrics=self.metrics
-            )
-            for char_pair in all_simulation_pairs
-        ]
-
-        print(
-            f"Pushing {len(current_simulations_data)} simulations, waiting for simulation results...\n\n")
-        simulations_result = simulation_queue.push_simulations_data_wait_results(
-            current_simulations_data)
+        return self.create_repeated_simulations_data(self.create_character_pairs(population), simulation_queue)
 
-        return simulations_result
+    def create_character_pairs(self, population: Population) -> List[Tuple[CharacterConfig, CharacterConfig]]:
+        """
+        Each combination of two characters once, so an individual is not always the first character of its pairs
+        """
+        return list(combinations(population, 2))
 
     def serialize(self):
         config = {'metrics': self.metrics,
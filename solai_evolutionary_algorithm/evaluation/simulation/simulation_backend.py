@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+from typing import List, Iterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+
+
+class SimulationBackend(ABC):
+    """
+    Runs simulations for the fitness evaluations, like the redis SimulationQueue or an in-process simulator
+    """
+
+    @abstractmethod
+    def create_simulation_id(self) -> str:
+        pass
+
+    @abstractmethod
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        """
+        Yields one result for each simulation, in the order the simulations finish
+        """
+        pass
+
+    def push_simulations_data_wait_results(self, simulations_data: List[SimulationData]) -> List[SimulationResult]:
+        return list(self.iter_simulations_results(simulations_data))
@@ -0,0 +1,98 @@
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Any
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# A header can never be mistaken for json, messages without it are decoded as plain json
+HEADER_MAGIC = b"\xffSQ"
+HEADER_VERSION = 1
+HEADER_LENGTH = len(HEADER_MAGIC) + 3
+
+JSON_CODEC_ID = 0
+MSGPACK_CODEC_ID = 1
+
+COMPRESSED_FLAG = 0b1
+
+Message = Dict[str, Any]
+
+
+class SimulationCodec(ABC):
+    """
+    Encodes simulation data and results sent through the simulation queue.
+    All codecs can decode messages of any codec, see decode_message
+    """
+
+    @abstractmethod
+    def encode(self, message: Message) -> bytes:
+        pass
+
+    def decode(self, data: bytes) -> Message:
+        return decode_message(data)
+
+
+class JsonCodec(SimulationCodec):
+    """
+    Plain json without a header, understood by workers that do not know about codecs
+    """
+
+    def encode(self, message: Message) -> bytes:
+        return json.dumps(message).encode("utf-8")
+
+
+class MsgpackCodec(SimulationCodec):
+    """
+    msgpack (optional dependency) with a versioned header, optionally zlib compressed.
+    Simulation ids consisting of digits only are sent as integers
+    """
+
+    def __init__(self, compress: bool = False, compression_level: int = 1):
+        if msgpack is None:
+            raise ImportError("msgpack must be installed to use MsgpackCodec")
+        self.compress = compress
+        self.compression_level = compression_level
+
+    def encode(self, message: Message) -> bytes:
+        simulation_id = message.get('simulationId')
+        if isinstance(simulation_id, str) and simulation_id.isdigit():
+            message = {**message, 'simulationId': int(simulation_id)}
+
+        payload = msgpack.packb(message, use_bin_type=True)
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload, self.compression_level)
+            flags |= COMPRESSED_FLAG
+        return HEADER_MAGIC + bytes([HEADER_VERSION, MSGPACK_CODEC_ID, flags]) + payload
+
+
+def decode_message(data: bytes) -> Message:
+    """
+    Decodes a message encoded by any codec
+    """
+    if not data.startswith(HEADER_MAGIC):
+        return json.loads(data.decode("utf-8"))
+
+    version, codec_id, flags = data[len(HEADER_MAGIC):HEADER_LENGTH]
+    if version > HEADER_VERSION:
+        raise ValueError(f"Unsupported simulation message version {version}")
+
+    payload = data[HEADER_LENGTH:]
+    if flags & COMPRESSED_FLAG:
+        payload = zlib.decompress(payload)
+
+    if codec_id == JSON_CODEC_ID:
+        message = json.loads(payload.decode("utf-8"))
+    elif codec_id == MSGPACK_CODEC_ID:
+        if msgpack is None:
+            raise ImportError("msgpack must be installed to decode msgpack simulation messages")
+        message = msgpack.unpackb(payload, raw=False)
+    else:
+        raise ValueError(f"Unknown simulation message codec {codec_id}")
+
+    if isinstance(message.get('simulationId'), int):
+        message['simulationId'] = str(message['simulationId'])
+    return message
@@ -0,0 +1,77 @@
+import random
+from time import perf_counter
+from typing import List, Tuple
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_codec import SimulationCodec, JsonCodec, \
+    MsgpackCodec, decode_message, msgpack
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationData, SimulationResult
+from solai_evolutionary_algorithm.evolve_configurations import sol_metrics
+from solai_evolutionary_algorithm.initial_population_producers.from_existing_producers import load_char_from_file
+from solai_evolutionary_algorithm.utils.character_id import create_character_id
+
+
+def sample_simulations(simulation_id: str) -> Tuple[SimulationData, SimulationResult]:
+    characters_configs = [
+        {**load_char_from_file(f"existing_characters/{char_filename}"), 'characterId': create_character_id()}
+        for char_filename in ["shrankConfig.json", "brailConfig.json"]
+    ]
+    metrics = list(sol_metrics.feasibility_metric_ranges.keys())
+    simulation_data = SimulationData(
+        simulationId=simulation_id,
+        charactersConfigs=characters_configs,
+        metrics=metrics
+    )
+    simulation_result = SimulationResult(
+        simulationId=simulation_id,
+        simulationData=simulation_data,
+        metrics={
+            metric: [random.random(), random.random()]
+            for metric in metrics
+        }
+    )
+    return simulation_data, simulation_result
+
+
+def benchmark_codec(name: str, codec: SimulationCodec, messages: List, repeat: int):
+    start_time = perf_counter()
+    for _ in range(repeat):
+        encoded_messages = [codec.encode(message) for message in messages]
+    encode_time = (perf_counter() - start_time) / (repeat * len(messages))
+
+    start_time = perf_counter()
+    for _ in range(repeat):
+        for encoded_message in encoded_messages:
+            decode_message(encoded_message)
+    decode_time = (perf_counter() - start_time) / (repeat * len(messages))
+
+    average_bytes = sum(len(encoded_message) for encoded_message in encoded_messages) / len(messages)
+    print(f"{name:<28} {average_bytes:>10.0f} B {encode_time * 1e6:>10.1f} us {decode_time * 1e6:>10.1f} us")
+
+
+def run_benchmark(simulations_count: int = 1000, repeat: int = 5):
+    codecs = [("json", JsonCodec())]
+    if msgpack is not None:
+        codecs += [
+            ("msgpack", MsgpackCodec()),
+            ("msgpack + zlib", MsgpackCodec(compress=True)),
+        ]
+    else:
+        print("msgpack is not installed, only benchmarking json")
+
+    for id_kind, create_id in [
+        ("uuid ids", lambda i: create_character_id()),
+        ("short ids", lambda i: str(i))
+    ]:
+        samples = [sample_simulations(create_id(i)) for i in range(simulations_count)]
+        for message_kind, messages in [
+            ("SimulationData", [simulation_data for simulation_data, _ in samples]),
+            ("SimulationResult", [simulation_result for _, simulation_result in samples]),
+        ]:
+            print(f"\n{message_kind}, {id_kind} ({simulations_count} messages, per message)")
+            print(f"{'codec':<28} {'size':>12} {'encode':>13} {'decode':>13}")
+            for codec_name, codec in codecs:
+                benchmark_codec(codec_name, codec, messages, repeat)
+
+
+if __name__ == '__main__':
+    run_benchmark()
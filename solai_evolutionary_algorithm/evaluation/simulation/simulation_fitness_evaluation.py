@@ -1,14 +1,23 @@
 from copy import deepcopy
 from functools import reduce
 from itertools import combinations, chain
-from statistics import mean
-from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict
+from math import sqrt
+from statistics import mean, stdev
+from typing import List, Optional, Any, Dict, TypedDict, Iterable, cast, Tuple, OrderedDict, Union, Iterator, \
+    Set
 from abc import ABC, abstractmethod
 
+from solai_evolutionary_algorithm.evaluation.simulation.async_simulation_queue import AsyncSimulationQueue
+
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import create_simulation_queue, \
+    Endpoint
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import PRIORITY_NORMAL
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
     CharacterConfig, SimulationResult
 from solai_evolutionary_algorithm.evolution.evolution_types import Population, FitnessEvaluation, EvaluatedPopulation, \
     EvaluatedIndividual
+from solai_evolutionary_algorithm.utils.character_hash_utils import character_genome_hash
 from solai_evolutionary_algorithm.utils.kwargs_utils import filter_not_none_values
 
 
@@ -31,8 +40,148 @@ CharactersAllMeasurements = Dict[str, CharacterAllMeasurements]
 # Each metric accumulated for each character
 MetricsByCharacter = Dict[str, Dict[str, float]]
 
+# the fitness of individuals that did not pass the screen, below any fitness from full length simulations
+SCREENED_OUT_FITNESS = 0.0
+
+
+def simulation_result_to_simulations_measurements(simulation_result: SimulationResult) -> List[SimulationMeasurements]:
+    """
+    A SimulationMeasurements for each repeat of the simulation, a single one if not a multi repeat simulation
+    """
+    characters_id = [
+        character_config['characterId']
+        for character_config in simulation_result['simulationData']['charactersConfigs']
+    ]
+    repeats_metrics = simulation_result['repeatMetrics'] if 'repeatMetrics' in simulation_result \
+        else [simulation_result['metrics']]
+    return [
+        SimulationMeasurements(
+            simulationId=simulation_result['simulationId'],
+            charactersId=characters_id,
+            metrics=repeat_metrics
+        )
+        for repeat_metrics in repeats_metrics
+    ]
+
+
+def unique_genomes_population(population: Population) -> Tuple[Population, Dict[str, List[CharacterConfig]]]:
+    """
+    The first individual of each distinct genome (see character_genome_hash), and the other individuals with the same
+    genome by the characterId of that first individual
+    """
+    unique_individual_by_genome_hash: Dict[str, CharacterConfig] = {}
+    duplicates_by_character_id: Dict[str, List[CharacterConfig]] = {}
+    for individual in population:
+        unique_individual = unique_individual_by_genome_hash.setdefault(character_genome_hash(individual), individual)
+        if unique_individual is not individual:
+            duplicates_by_character_id.setdefault(unique_individual['characterId'], []).append(individual)
+    return list(unique_individual_by_genome_hash.values()), duplicates_by_character_id
+
+
+def project_results_onto_duplicates(
+        simulations_results: Iterable[SimulationResult],
+        duplicates_by_character_id: Dict[str, List[CharacterConfig]]
+) -> Iterator[SimulationResult]:
+    """
+    Yields each result, followed by a copy of it for each duplicate of the evaluated individual, which is the first
+    character of the simulation
+    """
+    for simulation_result in simulations_results:
+        yield simulation_result
+        simulation_data = simulation_result['simulationData']
+        individual, *opponents = simulation_data['charactersConfigs']
+        for duplicate in duplicates_by_character_id.get(individual['characterId'], []):
+            yield {
+                **simulation_result,
+                'simulationData': {**simulation_data, 'charactersConfigs': [duplicate, *opponents]}
+            }
+
+
+class CharactersMeasurementsAccumulator:
+    """
+    Groups measurements by metric by character one simulation at a time, so that results can be folded in
+    while the remaining simulations are still running. A running sum of each metric is kept for each character,
+    making the mean measurements available without another pass over all measurements.
+    """
+
+    def __init__(self):
+        self.simulations_results: List[SimulationResult] = []
+        self.measurements_by_character: CharactersAllMeasurements = {}
+        self.measurements_sum_by_character: MetricsByCharacter = {}
+
+    def add_simulation_result(self, simulation_result: SimulationResult) -> None:
+        self.simulations_results.append(simulation_result)
+        for simulation_measurements in simulation_result_to_simulations_measurements(simulation_result):
+            self.add_simulation_measurements(simulation_measurements)
+
+    def add_simulation_measurements(self, simulation_measurements: SimulationMeasurements) -> None:
+        for i, char_id in enumerate(simulation_measurements['charactersId']):
+            char_measurements = self.measurements_by_character.setdefault(char_id, {})
+            char_measurements_sum = self.measurements_sum_by_character.setdefault(char_id, {})
+            for metric, measurement_by_char in simulation_measurements['metrics'].items():
+                measurement = measurement_by_char[i]
+                char_measurements.setdefault(metric, []).append(measurement)
+                char_measurements_sum[metric] = char_measurements_sum.get(metric, 0) + measurement
+
+    def mean_measurements(self, char_id: str) -> Dict[str, float]:
+        return {
+            metric: measurements_sum / len(self.measurements_by_character[char_id][metric])
+            for metric, measurements_sum in self.measurements_sum_by_character[char_id].items()
+        }
+
+    def mean_measurements_by_character(self) -> MetricsByCharacter:
+        return {
+            char_id: self.mean_measurements(char_id)
+            for char_id in self.measurements_sum_by_character
+        }
+
+
+RacingSummary = TypedDict("RacingSummary", {
+    'rounds': int,
+    # games simulated of simulation_budget
+    'simulations': int,
+    'budget': int,
+    # individuals still uncertain when the budget was spent
+    'uncertain': int
+})
+
 
 class SimulationFitnessEvaluation(FitnessEvaluation, ABC):
+    """
+    queue_streams: Use the redis streams simulation queue (StreamSimulationQueue) instead of the list based one,
+        for workers speaking the stream protocol.
+    queue_endpoints: (host, port) of several redis instances to shard simulations over, see ShardedSimulationQueue.
+        Replaces queue_host and queue_port.
+    simulation_backend: Runs the simulations instead of a redis simulation queue created from the queue arguments,
+        for example a SyntheticSimulationBackend to evolve without redis and the game.
+    multi_repeat_simulations: Send each character pair as one simulation repeated simulation_population_count times,
+        instead of simulation_population_count separate simulations.
+    deduplicate_genomes: Only simulate the first of the individuals with the same genome (ignoring characterId and
+        name), and give its measurements to the others. Only for evaluations where the evaluated individual is the
+        first character of each simulation, not all vs all.
+    simulation_budget: Instead of simulating every individual simulation_population_count times, spend this many games
+        per evaluation racing style: every individual is first simulated racing_initial_repeats times against each of
+        its opponents, then each round simulates the individuals whose side of the selection cutoff is still uncertain
+        (see uncertain_individuals) racing_round_repeats more times, until the budget is spent or no individual is
+        uncertain. Needs create_character_pairs, and is only used by evaluate_one_population.
+    screening_max_frames: Before the full length simulations, screen the population with screening_repeats games cut
+        off after this many frames (the maxFrames of the simulations) against each opponent. Only the individuals
+        whose mean screening measurement of each metric of screening_metric_ranges is inside its range are simulated
+        at full length. The others get SCREENED_OUT_FITNESS (or are infeasible), and their short games are dropped
+        rather than evaluated together with full length ones. Needs create_character_pairs, and is only used by
+        evaluate_one_population.
+
+    simulation_priority (attribute): The priority lane of the simulations, PRIORITY_NORMAL by default. Set it to
+        PRIORITY_LOW for runs that should not hold up evolution, like visualizations. Only the plain list queue has
+        priority lanes, reliable and stream queues reject other priorities.
+    """
+
+    racing_initial_repeats = 2
+    racing_round_repeats = 1
+    # standard errors on each side of a mean in the confidence intervals of racing
+    racing_confidence_z = 1.96
+    # the part of the population ranked above the selection cutoff of racing, like the survivors or elites
+    racing_selected_fraction = 0.5
 
     def __init__(
             self,
@@ -42,43 +191,485 @@ class SimulationFitnessEvaluation(FitnessEvaluation, ABC):
             simulation_population_count: int,
             queue_host: Optional[str] = None,
             queue_port: Optional[int] = None,
+            run_scoped_results: Optional[bool] = None,
+            intern_characters: Optional[bool] = None,
+            queue_streams: bool = False,
+            queue_endpoints: Optional[List[Endpoint]] = None,
+            simulation_backend: Optional[SimulationBackend] = None,
+            multi_repeat_simulations: bool = False,
+            deduplicate_genomes: bool = False,
+            simulation_budget: Optional[int] = None,
+            screening_max_frames: Optional[int] = None,
+            screening_metric_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+            screening_repeats: int = 1,
     ):
 
         if not set(metrics_weights.keys()) == set(desired_values.keys()) or not set(metrics) == set(metrics_weights.keys()):
             raise ValueError(
                 "Not consistent metrics in metrics, metric weights and/or desired values")
 
-        self.simulation_queue = SimulationQueue(
-            **filter_not_none_values({
-                'host': queue_host,
-                'port': queue_port
-            })
-        )
-        self.metrics = metrics
         self.metrics_weights = metrics_weights
         self.desired_values = desired_values
-        self.simulation_population_count = simulation_population_count
+        self.init_simulation_evaluation(
+            metrics=metrics,
+            simulation_population_count=simulation_population_count,
+            queue_host=queue_host,
+            queue_port=queue_port,
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            queue_streams=queue_streams,
+            queue_endpoints=queue_endpoints,
+            simulation_backend=simulation_backend,
+            multi_repeat_simulations=multi_repeat_simulations,
+            deduplicate_genomes=deduplicate_genomes,
+            simulation_budget=simulation_budget,
+            screening_max_frames=screening_max_frames,
+            screening_metric_ranges=screening_metric_ranges,
+            screening_repeats=screening_repeats
+        )
 
         self.__prev_simulation_results: List[SimulationResult] = []
         self.__prev_measures_by_character_id: CharactersAllMeasurements = {}
 
+    def init_simulation_evaluation(
+            self,
+            metrics: List[str],
+            simulation_population_count: int,
+            queue_host: Optional[str] = None,
+            queue_port: Optional[int] = None,
+            run_scoped_results: Optional[bool] = None,
+            intern_characters: Optional[bool] = None,
+            queue_streams: bool = False,
+            queue_endpoints: Optional[List[Endpoint]] = None,
+            simulation_backend: Optional[SimulationBackend] = None,
+            multi_repeat_simulations: bool = False,
+            deduplicate_genomes: bool = False,
+            simulation_budget: Optional[int] = None,
+            screening_max_frames: Optional[int] = None,
+            screening_metric_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+            screening_repeats: int = 1,
+    ) -> None:
+        """
+        The setup shared by the evaluations, for subclasses that do not call __init__, see the class arguments
+        """
+        if screening_max_frames is not None and not screening_metric_ranges:
+            raise ValueError("Screening needs the metric ranges individuals must pass")
+        if screening_metric_ranges and not set(screening_metric_ranges.keys()) <= set(metrics):
+            raise ValueError("Screening metrics must be evaluated metrics")
+
+        if simulation_backend is not None:
+            self.simulation_queue: SimulationBackend = simulation_backend
+        else:
+            self.simulation_queue = create_simulation_queue(
+                endpoints=queue_endpoints,
+                streams=queue_streams,
+                **filter_not_none_values({
+                    'host': queue_host,
+                    'port': queue_port,
+                    'run_scoped_results': run_scoped_results,
+                    'intern_characters': intern_characters
+                })
+            )
+        self.metrics = metrics
+        self.simulation_population_count = simulation_population_count
+        self.multi_repeat_simulations = multi_repeat_simulations
+        self.deduplicate_genomes = deduplicate_genomes
+        self.simulation_budget = simulation_budget
+        self.racing_summaries: List[RacingSummary] = []
+        self.screening_max_frames = screening_max_frames
+        self.screening_metric_ranges = screening_metric_ranges
+        self.screening_repeats = screening_repeats
+        # individuals of the last evaluation that did not pass the screen
+        self.screened_out_character_ids: Set[str] = set()
+        self.simulation_priority = PRIORITY_NORMAL
+
     def __call__(self, population: Population) -> EvaluatedPopulation:
         return self.evaluate_one_population(population)
 
-    @abstractmethod
     def evaluate_one_population(self, population: Population) -> EvaluatedPopulation:
+        # results are streamed, so they are aggregated while the remaining simulations run
+        simulations_results = self.stream_simulate_population(
+            population, self.simulation_queue)
+        return self.evaluate_simulations_results(population, simulations_results)
+
+    async def async_evaluate_one_population(
+            self,
+            population: Population,
+            async_simulation_queue: AsyncSimulationQueue
+    ) -> EvaluatedPopulation:
+        """
+        Same as evaluate_one_population, but waits for simulation results without blocking the event loop,
+        so several evaluations can run concurrently over the same async simulation queue
+        """
+        simulations_results = await self.async_simulate_population(
+            population, async_simulation_queue)
+        return self.evaluate_simulations_results(population, simulations_results)
+
+    @abstractmethod
+    def evaluate_simulations_results(
+            self,
+            population: Population,
+            simulations_results: Iterable[SimulationResult]
+    ) -> EvaluatedPopulation:
+        """
+        simulations_results may be a generator yielding results as simulations finish
+        """
+        pass
+
+    @abstractmethod
+    def create_simulations_data(
+            self,
+            population: Population,
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue]
+    ) -> List[SimulationData]:
+        """
+        Create the simulations needed to evaluate the population, pairing characters in a way you choose
+        """
         pass
 
     @abstractmethod
+    def create_character_pairs(self, population: Population) -> List[Tuple[CharacterConfig, CharacterConfig]]:
+        """
+        The character pairs simulated to evaluate the population, with the evaluated individual first.
+        Racing, screening and genome deduplication simulate each individual against the opponents it is paired with
+        """
+        pass
+
+    def create_repeated_simulations_data(
+            self,
+            character_pairs: List[Tuple[CharacterConfig, CharacterConfig]],
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue]
+    ) -> List[SimulationData]:
+        """
+        Simulates each character pair simulation_population_count times
+        """
+        if self.multi_repeat_simulations:
+            return [
+                self.create_simulation_data(char_pair, simulation_queue, repeat=self.simulation_population_count)
+                for char_pair in character_pairs
+            ]
+
+        return [
+            self.create_simulation_data(char_pair, simulation_queue, repeat_index=repeat_index)
+            for repeat_index in range(self.simulation_population_count)
+            for char_pair in character_pairs
+        ]
+
+    def create_simulation_data(
+            self,
+            char_pair: Tuple[CharacterConfig, CharacterConfig],
+            simulation_queue: Union[SimulationBackend, AsyncSimulationQueue],
+            repeat: Optional[int] = None,
+            repeat_index: int = 0,
+            max_frames: Optional[int] = None
+    ) -> SimulationData:
+        simulation_data = SimulationData(
+            simulationId=simulation_queue.create_simulation_id(),
+            charactersConfigs=list(char_pair),
+            metrics=self.metrics,
+            repeatIndex=repeat_index
+        )
+        if repeat is not None:
+            simulation_data['repeat'] = repeat
+        if max_frames is not None:
+            simulation_data['maxFrames'] = max_frames
+        priority = self.character_pair_priority(char_pair)
+        if priority != PRIORITY_NORMAL:
+            simulation_data['priority'] = priority
+        return simulation_data
+
+    def character_pair_priority(self, char_pair: Tuple[CharacterConfig, CharacterConfig]) -> int:
+        """
+        The priority of simulations of the character pair, override to run decisive simulations first
+        """
+        return self.simulation_priority
+
     def simulate_population(
             self,
             population: Population,
-            simulation_queue: SimulationQueue
+            simulation_queue: SimulationBackend
+    ) -> List[SimulationResult]:
+        population, duplicates_by_character_id = self.deduplicated_population(population)
+        current_simulations_data = self.create_simulations_data(
+            population, simulation_queue)
+
+        print(
+            f"Pushing {len(current_simulations_data)} simulations, waiting for simulation results...\n\n")
+        simulations_result = simulation_queue.push_simulations_data_wait_results(
+            current_simulations_data)
+
+        return list(project_results_onto_duplicates(simulations_result, duplicates_by_character_id))
+
+    def stream_simulate_population(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        """
+        Yields simulation results as they arrive. Simulations are pushed when iteration starts
+        """
+        self.screened_out_character_ids = set()
+        population, duplicates_by_character_id = self.deduplicated_population(population)
+        yield from project_results_onto_duplicates(
+            self.stream_simulate_distinct_population(population, simulation_queue), duplicates_by_character_id)
+        for character_id in list(self.screened_out_character_ids):
+            self.screened_out_character_ids.update(
+                duplicate['characterId'] for duplicate in duplicates_by_character_id.get(character_id, []))
+
+    def stream_simulate_distinct_population(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        """
+        Yields the simulation results of a population without duplicate genomes, if deduplicate_genomes is set
+        """
+        if self.screening_max_frames is not None:
+            population = self.screen_population(population, simulation_queue)
+        yield from self.stream_simulate_full_length(population, simulation_queue)
+
+    def stream_simulate_full_length(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        if self.simulation_budget is not None:
+            yield from self.race_simulate_population(population, simulation_queue)
+            return
+
+        current_simulations_data = self.create_simulations_data(
+            population, simulation_queue)
+
+        print(
+            f"Pushing {len(current_simulations_data)} simulations, streaming simulation results...\n\n")
+        yield from simulation_queue.iter_simulations_results(current_simulations_data)
+
+    def screen_population(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Population:
+        """
+        Simulates short games of the population and returns the individuals passing the screen. The others are added
+        to screened_out_character_ids, their short games are not evaluated with the full length ones
+        """
+        screening_simulations_data = [
+            self.create_simulation_data(
+                char_pair, simulation_queue, repeat_index=repeat_index, max_frames=self.screening_max_frames)
+            for repeat_index in range(self.screening_repeats)
+            for char_pair in self.create_character_pairs(population)
+        ]
+        print(f"Pushing {len(screening_simulations_data)} screening simulations of at most "
+              f"{self.screening_max_frames} frames...\n\n")
+        accumulator = CharactersMeasurementsAccumulator()
+        for simulation_result in simulation_queue.iter_simulations_results(screening_simulations_data):
+            accumulator.add_simulation_result(simulation_result)
+
+        passed_population = [
+            individual
+            for individual in population
+            if individual['characterId'] not in accumulator.measurements_sum_by_character
+            or self.passes_screen(accumulator.mean_measurements(individual['characterId']))
+        ]
+        passed_character_ids = {individual['characterId'] for individual in passed_population}
+        self.screened_out_character_ids.update(
+            individual['characterId']
+            for individual in population
+            if individual['characterId'] not in passed_character_ids
+        )
+        print(f"{len(passed_population)} of {len(population)} individuals passed the screen")
+        return passed_population
+
+    def screened_fitness(self, character_id: str, fitness_by_character: Dict[str, float]) -> float:
+        """
+        The fitness of the individual, SCREENED_OUT_FITNESS if it did not pass the last screen
+        """
+        if character_id in self.screened_out_character_ids:
+            return SCREENED_OUT_FITNESS
+        return fitness_by_character[character_id]
+
+    def passes_screen(self, mean_measurements: Dict[str, float]) -> bool:
+        return all(
+            low <= mean_measurements[metric] <= high
+            for metric, (low, high) in self.screening_metric_ranges.items()
+        )
+
+    def race_simulate_population(
+            self,
+            population: Population,
+            simulation_queue: SimulationBackend
+    ) -> Iterator[SimulationResult]:
+        """
+        Yields simulation results as they arrive, simulating in rounds within simulation_budget games
+        """
+        char_pairs_by_character_id: Dict[str, List[Tuple[CharacterConfig, CharacterConfig]]] = {}
+        for char_pair in self.create_character_pairs(population):
+            char_pairs_by_character_id.setdefault(char_pair[0]['characterId'], []).append(char_pair)
+        racing_population = [
+            individual
+            for individual in population
+            if individual['characterId'] in char_pairs_by_character_id
+        ]
+
+        initial_simulations_count = self.racing_initial_repeats * sum(
+            len(char_pairs) for char_pairs in char_pairs_by_character_id.values())
+        if initial_simulations_count > self.simulation_budget:
+            raise ValueError(f"A simulation budget of {self.simulation_budget} does not cover the "
+                             f"{initial_simulations_count} simulations of the first racing round")
+
+        accumulator = CharactersMeasurementsAccumulator()
+        repeats_by_character_id = dict.fromkeys(char_pairs_by_character_id, 0)
+        remaining_budget = self.simulation_budget
+        round_repeats = self.racing_initial_repeats
+        rounds_count = 0
+        while racing_population:
+            round_population = []
+            for individual in racing_population:
+                simulations_count = len(char_pairs_by_character_id[individual['characterId']]) * round_repeats
+                if simulations_count <= remaining_budget:
+                    round_population.append(individual)
+                    remaining_budget -= simulations_count
+            if not round_population:
+                break
+
+            round_simulations_data = [
+                simulation_data
+                for individual in round_population
+                for simulation_data in self.create_racing_simulations_data(
+                    char_pairs_by_character_id[individual['characterId']],
+                    simulation_queue,
+                    round_repeats,
+                    repeats_by_character_id[individual['characterId']]
+                )
+            ]
+            print(f"Pushing {len(round_simulations_data)} simulations of {len(round_population)} individuals, "
+                  f"racing round {rounds_count + 1}...\n\n")
+            for simulation_result in simulation_queue.iter_simulations_results(round_simulations_data):
+                accumulator.add_simulation_result(simulation_result)
+                yield simulation_result
+
+            for individual in round_population:
+                repeats_by_character_id[individual['characterId']] += round_repeats
+            rounds_count += 1
+            round_repeats = self.racing_round_repeats
+            racing_population = self.uncertain_individuals(
+                [individual for individual in population if individual['characterId'] in char_pairs_by_character_id],
+                accumulator.measurements_by_character
+            )
+
+        summary = RacingSummary(
+            rounds=rounds_count,
+            simulations=self.simulation_budget - remaining_budget,
+            budget=self.simulation_budget,
+            uncertain=len(racing_population)
+        )
+        self.racing_summaries.append(summary)
+        print(f"Racing simulated {summary['simulations']} of a budget of {summary['budget']} simulations "
+              f"in {rounds_count} rounds, {summary['uncertain']} individuals still uncertain")
+
+    def create_racing_simulations_data(
+            self,
+            char_pairs: List[Tuple[CharacterConfig, CharacterConfig]],
+            simulation_queue: SimulationBackend,
+            repeats: int,
+            first_repeat_index: int
+    ) -> List[SimulationData]:
+        if self.multi_repeat_simulations:
+            return [
+                self.create_simulation_data(char_pair, simulation_queue, repeat=repeats, repeat_index=first_repeat_index)
+                for char_pair in char_pairs
+            ]
+        return [
+            self.create_simulation_data(char_pair, simulation_queue, repeat_index=first_repeat_index + i)
+            for i in range(repeats)
+            for char_pair in char_pairs
+        ]
+
+    def uncertain_individuals(
+            self,
+            population: Population,
+            measurements_by_character: CharactersAllMeasurements
+    ) -> Population:
+        """
+        The individuals whose fitness confidence interval contains the selection cutoff, widest interval first.
+        The cutoff is halfway between the mean fitness of the racing_selected_fraction best individuals and the rest,
+        so individuals clearly above or below it are not simulated further. Override when something else than fitness
+        is decided by the simulations
+        """
+        if len(population) < 2:
+            return []
+        interval_by_character_id = {
+            individual['characterId']: self.fitness_confidence_interval(
+                measurements_by_character[individual['characterId']])
+            for individual in population
+        }
+
+        def interval_center(individual) -> float:
+            low, high = interval_by_character_id[individual['characterId']]
+            return (low + high) / 2
+
+        ranked_population = sorted(population, key=interval_center, reverse=True)
+        selected_count = min(len(population) - 1, max(1, round(self.racing_selected_fraction * len(population))))
+        selection_cutoff = (interval_center(ranked_population[selected_count - 1]) +
+                            interval_center(ranked_population[selected_count])) / 2
+        uncertain_population = [
+            individual
+            for individual in ranked_population
+            if interval_by_character_id[individual['characterId']][0] <= selection_cutoff <=
+            interval_by_character_id[individual['characterId']][1]
+        ]
+        return sorted(
+            uncertain_population,
+            key=lambda individual: interval_by_character_id[individual['characterId']][1] -
+            interval_by_character_id[individual['characterId']][0],
+            reverse=True
+        )
+
+    def fitness_confidence_interval(self, character_measurements: CharacterAllMeasurements) -> Tuple[float, float]:
+        """
+        Confidence interval of the mean fitness of single games, which approximates the fitness of the mean measurements
+        """
+        games_count = min(len(measurements) for measurements in character_measurements.values())
+        games_fitness = [
+            self.metrics_score_to_fitness({
+                metric: self.evaluate_metric_score(metric, [measurements[i]])
+                for metric, measurements in character_measurements.items()
+            })
+            for i in range(games_count)
+        ]
+        fitness_mean = mean(games_fitness)
+        if games_count < 2:
+            return fitness_mean, fitness_mean
+        half_width = self.racing_confidence_z * stdev(games_fitness) / sqrt(games_count)
+        return fitness_mean - half_width, fitness_mean + half_width
+
+    async def async_simulate_population(
+            self,
+            population: Population,
+            async_simulation_queue: AsyncSimulationQueue
     ) -> List[SimulationResult]:
+        population, duplicates_by_character_id = self.deduplicated_population(population)
+        current_simulations_data = self.create_simulations_data(
+            population, async_simulation_queue)
+
+        print(
+            f"Pushing {len(current_simulations_data)} simulations, waiting for simulation results...\n\n")
+        simulations_result = await async_simulation_queue.push_simulations_data_wait_results(
+            current_simulations_data)
+
+        return list(project_results_onto_duplicates(simulations_result, duplicates_by_character_id))
+
+    def deduplicated_population(self, population: Population) -> Tuple[Population, Dict[str, List[CharacterConfig]]]:
         """
-        Simulate characters in a way you choose and return simulation results
+        The population to simulate, and the duplicates to give the measurements of the simulated individuals to
         """
-        pass
+        if not self.deduplicate_genomes:
+            return population, {}
+        unique_population, duplicates_by_character_id = unique_genomes_population(population)
+        if len(unique_population) < len(population):
+            print(f"Simulating {len(unique_population)} distinct genomes "
+                  f"for a population of {len(population)} individuals")
+        return unique_population, duplicates_by_character_id
 
     def evaluate_fitness_all_characters(
             self,
@@ -88,18 +679,17 @@ class SimulationFitnessEvaluation(FitnessEvaluation, ABC):
         characters_metrics_score = self.evaluate_characters_metrics_score(
             characters_all_measurements)
 
-        # combine metrics scores for each character by average and weight accordingly
-
-        def metrics_score_to_fitness(metrics_score: Dict[str, float]) -> float:
-            return mean([metrics_score[key]*self.metrics_weights[key] for key in metrics_score])/mean(self.metrics_weights.values())
-
         fitness_by_character: Dict[str, float] = {
-            char_id: metrics_score_to_fitness(char_metrics_score)
+            char_id: self.metrics_score_to_fitness(char_metrics_score)
             for char_id, char_metrics_score in characters_metrics_score.items()
         }
 
         return fitness_by_character
 
+    def metrics_score_to_fitness(self, metrics_score: Dict[str, float]) -> float:
+        # combine metrics scores for each character by average and weight accordingly
+        return mean([metrics_score[key]*self.metrics_weights[key] for key in metrics_score])/mean(self.metrics_weights.values())
+
     def init_metric_values(self):
         return dict.fromkeys(self.desired_values, 0)
 
@@ -135,19 +725,25 @@ class SimulationFitnessEvaluation(FitnessEvaluation, ABC):
         """
         map simulation results to SimulationMeasurements, a simpler representation
         """
-        simulations_measurements: List[SimulationMeasurements] = cast(List[SimulationMeasurements], [
-            SimulationMeasurements(
-                simulationId=simulation_result['simulationId'],
-                charactersId=[
-                    character_config['characterId']
-                    for character_config in simulation_result['simulationData']['charactersConfigs']
-                ],
-                metrics=simulation_result['metrics']
-            )
+        simulations_measurements: List[SimulationMeasurements] = [
+            simulation_measurements
             for simulation_result in simulations_result
-        ])
+            for simulation_measurements in simulation_result_to_simulations_measurements(simulation_result)
+        ]
         return simulations_measurements
 
+    def accumulate_simulations_results(
+            self,
+            simulations_results: Iterable[SimulationResult]
+    ) -> CharactersMeasurementsAccumulator:
+        """
+        folds simulation results into measurements by metric by character as they are iterated
+        """
+        accumulator = CharactersMeasurementsAccumulator()
+        for simulation_result in simulations_results:
+            accumulator.add_simulation_result(simulation_result)
+        return accumulator
+
     def group_all_measures_by_character(
             self,
             simulations_measurements: List[SimulationMeasurements]
@@ -155,38 +751,10 @@ class SimulationFitnessEvaluation(FitnessEvaluation, ABC):
         """
         groups all measurements from all simulations by metric by character
         """
-        def characters_measurements_reducer(
-                prev_characters_measurements: CharactersAllMeasurements,
-                simulation_measurements: SimulationMeasurements
-        ) -> CharactersAllMeasurements:
-            # will not copy the prev data as it is not necessary
-            new_characters_measurements = prev_characters_measurements
-
-            for i in range(2):  # allways two characters
-                char_id: str = simulation_measurements['charactersId'][i]
-                measurements: Dict[str, float] = {  # measurements for the given character
-                    metric: measurement_by_char[i]
-                    for metric, measurement_by_char in simulation_measurements['metrics'].items()
-                }
-                if char_id not in new_characters_measurements:
-                    # use the measurements as initial value for the character. Measurements are converted to a list
-                    new_characters_measurements[char_id] = {
-                        metric: [measurement]
-                        for metric, measurement in measurements.items()
-                    }
-                else:
-                    # if measurements already provided for the given character, append new measurements
-                    for metric, measurement in measurements.items():
-                        new_characters_measurements[char_id][metric].append(
-                            measurement)
-
-            return new_characters_measurements
-
-        all_measurements_by_character = reduce(
-            characters_measurements_reducer,
-            simulations_measurements,
-            {}  # start with an empty object
-        )
+        accumulator = CharactersMeasurementsAccumulator()
+        for simulation_measurements in simulations_measurements:
+            accumulator.add_simulation_measurements(simulation_measurements)
+        all_measurements_by_character = accumulator.measurements_by_character
 
         return all_measurements_by_character
 
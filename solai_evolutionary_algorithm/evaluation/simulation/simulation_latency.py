@@ -0,0 +1,50 @@
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    """
+    Running distribution of the latest simulation latencies, from pushing a simulation to receiving its result
+    """
+
+    def __init__(self, max_samples: int = 2000):
+        self.latencies = deque(maxlen=max_samples)
+
+    def add(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def __len__(self) -> int:
+        return len(self.latencies)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        percentile between 0 and 1, None if no latencies are recorded
+        """
+        if not self.latencies:
+            return None
+        ordered_latencies = sorted(self.latencies)
+        index = min(len(ordered_latencies) - 1, int(percentile * len(ordered_latencies)))
+        return ordered_latencies[index]
+
+
+class ThroughputTracker:
+    """
+    Simulation results per second over the latest received results
+    """
+
+    def __init__(self, max_samples: int = 200):
+        self.received_times = deque(maxlen=max_samples)
+
+    def add(self, received_time: float, count: int = 1) -> None:
+        self.received_times.extend([received_time] * count)
+
+    def throughput(self) -> Optional[float]:
+        """
+        None until enough results are received to span some time
+        """
+        if len(self.received_times) < 2:
+            return None
+        time_span = self.received_times[-1] - self.received_times[0]
+        if time_span <= 0:
+            return None
+        return (len(self.received_times) - 1) / time_span
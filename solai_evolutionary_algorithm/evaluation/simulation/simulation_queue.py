@@ -1,4 +1,5 @@
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from math import ceil
 from time import time
 from typing import Tuple, Any, List, TypedDict, Dict, Optional, Union, cast, Iterator
 
@@ -8,129 +9,733 @@ import sys
 import json
 import threading
 from copy import deepcopy
+from itertools import count
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_codec import SimulationCodec, JsonCodec, \
+    decode_message
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import AbilityConfig, CharacterConfig, \
+    SimulationData, SimulationResult, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_latency import LatencyTracker, ThroughputTracker
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_telemetry import BatchTelemetryRecorder, \
+    SimulationTelemetryListener, JsonlTelemetryWriter
+from solai_evolutionary_algorithm.evaluation.simulation.worker_registry import WorkerRegistry, FleetCapacity
+from solai_evolutionary_algorithm.utils.character_hash_utils import character_config_hash, \
+    character_without_properties, simulation_content_hash
 
 SIMULATION_DATA_QUEUE = "queue:simulation-data"
+# priority lanes. Workers poll all lanes in priority order, the first non-empty key given to BRPOP is popped from.
+# Normal priority simulations use SIMULATION_DATA_QUEUE, so workers only polling that key still get them.
+# Reliable workers lease from SIMULATION_DATA_QUEUE alone with a single BRPOPLPUSH, so the reliable and the stream
+# queues only take normal priority simulations
+SIMULATION_DATA_QUEUE_HIGH = f"{SIMULATION_DATA_QUEUE}:high"
+SIMULATION_DATA_QUEUE_LOW = f"{SIMULATION_DATA_QUEUE}:low"
+SIMULATION_DATA_QUEUES = [SIMULATION_DATA_QUEUE_HIGH, SIMULATION_DATA_QUEUE, SIMULATION_DATA_QUEUE_LOW]
 SIMULATION_RESULT_QUEUE = 'queue:simulation-result'
+# in reliable mode, workers move simulation data here while simulating (BRPOPLPUSH / BLMOVE from the data queue),
+# and LREM it after pushing the result
+SIMULATION_PROCESSING_QUEUE = "queue:simulation-processing"
+# run scoped result queues are named SIMULATION_RESULT_QUEUE:<run id>, and live as long as their owner key
+RUN_RESULT_QUEUE_PREFIX = f"{SIMULATION_RESULT_QUEUE}:"
+RUN_RESULT_QUEUE_OWNER_PREFIX = "queue:simulation-result-owner:"
+# interned character configs (without characterId) by content hash, in one hash per run named
+# SIMULATION_CHARACTERS_HASH:<run id>, so the configs of a run expire together once it stops pushing
+SIMULATION_CHARACTERS_HASH = "simulation-characters"
+
+# max number of simulations sent or received in one redis round trip
+DEFAULT_CHUNK_SIZE = 500
+
+# atomically pops at most ARGV[1] elements from the head of the list KEYS[1]
+POP_MANY_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+end
+return items
+"""
+
+def simulation_data_queue(priority: int) -> str:
+    """
+    The lane simulations of the priority are pushed to
+    """
+    if priority <= PRIORITY_HIGH:
+        return SIMULATION_DATA_QUEUE_HIGH
+    if priority >= PRIORITY_LOW:
+        return SIMULATION_DATA_QUEUE_LOW
+    return SIMULATION_DATA_QUEUE
+
+
+class SimulationQueue(SimulationBackend):
+
+    """
+    reliable: Expect workers to move simulations to SIMULATION_PROCESSING_QUEUE while simulating.
+        Instead of blindly re-pushing simulations when no results arrive, a simulation is only re-queued
+        when it has stayed in the processing queue for longer than lease_timeout seconds. Workers lease from
+        SIMULATION_DATA_QUEUE only, so pushing simulations with a priority other than PRIORITY_NORMAL raises a
+        ValueError.
+    run_scoped_results: Let workers reply to a result queue owned by this queue client only (the replyTo field),
+        so that several runs can share the same workers without consuming each other's results.
+        The result queue of a run that has not refreshed it for result_queue_ttl seconds is considered abandoned,
+        and is removed by the next run scoped client that starts.
+    intern_characters: Store each distinct character config once in the SIMULATION_CHARACTERS_HASH of the run, keyed
+        by a hash of its content, and only send references to it in the simulation data.
+        The stored configs expire interned_characters_ttl seconds after the last push of the run.
+    codec: How simulation data is encoded, plain json if not given. Results are decoded whatever codec they use.
+    trim_results: Ask workers to only send simulationId and metrics back. The queue client adds the simulation data
+        from its own pending simulations to each result, so results look the same to callers.
+    short_simulation_ids: Use a counter instead of uuids as simulation ids, which is only unique within this
+        queue client, so requires run_scoped_results.
+    speculative_reexecution: Track the latency of simulations of this queue client, from the worker starting a
+        simulation (startedAt, when workers report it) or else from pushing it, to receiving its result. When
+        speculation_completed_fraction of a batch has finished and the data queues have been seen empty, so every
+        remaining simulation was delivered to a worker, simulations pending since then for longer than
+        speculation_latency_factor times the speculation_percentile latency are pushed again, and the first result
+        of any copy is used. Copies still queued when the batch completes are cancelled.
+    lost_simulation_timeout: When the queue is not reliable, a simulation is re-pushed when no results arrive for this
+        many seconds, whether speculating or not, as speculation does not cover batches losing many simulations.
+    windowed_submission: Only keep a window of simulations pushed without results, topped up as results arrive.
+        The window holds window_target_seconds of simulations at the observed throughput, at least min_window_size,
+        and initial_window_size until the throughput is known.
+    run_id: Identifies this queue client, a new uuid if not given.
+    worker_registry: Read the heartbeats workers publish (see worker_registry) every fleet_check_interval seconds while
+        waiting for results. The submission window then keeps every worker slot busy, iteration fails when no worker
+        has been alive for empty_fleet_timeout seconds, and the fleet utilization of each batch is reported.
+    coalesce_simulations: Only push the first of the simulations in a batch with the same content (character genomes,
+        metrics and repeat slot, see simulation_content_hash), and give its result to the others under their own ids.
+    telemetry_listeners: Get a BatchTelemetry record (see simulation_telemetry) after each batch of simulations, with
+        the push, worker start and result time of each simulation, latency percentiles, re-pushes, discarded results
+        and the depth of the data queues sampled every queue_depth_sample_interval seconds.
+    telemetry_file: Append each BatchTelemetry record as a json line to this file.
+    """
+
+    # where workers push results when run_scoped_results is not set, and the prefix of run scoped result queues
+    shared_result_queue = SIMULATION_RESULT_QUEUE
+    run_result_queue_prefix = RUN_RESULT_QUEUE_PREFIX
+
+    def __init__(
+            self,
+            host='redis',
+            port=6379,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            reliable: bool = False,
+            lease_timeout: float = 60,
+            reap_interval: float = 5,
+            run_scoped_results: bool = False,
+            result_queue_ttl: int = 3600,
+            intern_characters: bool = False,
+            interned_characters_ttl: int = 24 * 3600,
+            codec: Optional[SimulationCodec] = None,
+            trim_results: bool = False,
+            short_simulation_ids: bool = False,
+            speculative_reexecution: bool = False,
+            speculation_completed_fraction: float = 0.9,
+            speculation_percentile: float = 0.95,
+            speculation_latency_factor: float = 1.5,
+            min_latency_samples: int = 20,
+            lost_simulation_timeout: float = 8,
+            windowed_submission: bool = False,
+            initial_window_size: int = 200,
+            min_window_size: int = 20,
+            window_target_seconds: float = 10,
+            run_id: Optional[str] = None,
+            worker_registry: bool = False,
+            empty_fleet_timeout: float = 30,
+            fleet_check_interval: float = 2,
+            coalesce_simulations: bool = False,
+            telemetry_listeners: Optional[List[SimulationTelemetryListener]] = None,
+            telemetry_file: Optional[str] = None,
+            queue_depth_sample_interval: float = 5
+    ):
+        if short_simulation_ids and not run_scoped_results:
+            raise ValueError("Short simulation ids are only unique with run scoped results")
 
-AbilityConfig = TypedDict("AbilityConfig", {
-    "name": str,
-    "type": str,  # "MELEE" | "PROJECTILE"
-    "radius": float,
-    "distanceFromChar": float,
-    "speed": float,
-    "startupTime": int,
-    "activeTime": int,
-    "executionTime": int,
-    "endlagTime": int,
-    "rechargeTime": int,
-    "damage": float,
-    "baseKnockback": float,
-    "knockbackRatio": float,
-    "knockbackPoint": float,
-    "knockbackTowardPoint": bool
-})
-
-CharacterConfig = TypedDict('CharacterConfig', {
-    'characterId': str,
-    'radius': float,
-    'moveVelocity': float,
-    'abilities': List[AbilityConfig]
-})
-
-SimulationData = TypedDict("SimulationData", {
-    "simulationId": str,
-    "charactersConfigs": List[CharacterConfig],
-    "metrics": List[str]
-})
-SimulationResult = TypedDict("SimulationResult", {
-    "simulationId": str,
-    "simulationData": SimulationData,
-    "metrics": Dict[str, List[float]]
-})
-
-
-class SimulationQueue:
-
-    def __init__(self, host='redis', port=6379):
         print(
             f"Connecting to redis simulation queue at host: {host} port: {port}")
         self.redis = redis.StrictRedis(host=host, port=port, db=0)
+        self.chunk_size = chunk_size
+        self.reliable = reliable
+        self.lease_timeout = lease_timeout
+        self.reap_interval = reap_interval
+        self.run_id = str(uuid.uuid4()) if run_id is None else run_id
+        self.run_scoped_results = run_scoped_results
+        self.result_queue_ttl = result_queue_ttl
+        self.result_queue = f"{self.run_result_queue_prefix}{self.run_id}" if run_scoped_results \
+            else self.shared_result_queue
+        self.intern_characters = intern_characters
+        self.interned_characters_ttl = interned_characters_ttl
+        self.interned_characters_hash = f"{SIMULATION_CHARACTERS_HASH}:{self.run_id}"
+        self.__interned_character_refs = set()
+        self.__characters_to_intern: Dict[str, str] = {}
+        self.codec = JsonCodec() if codec is None else codec
+        self.trim_results = trim_results
+        self.short_simulation_ids = short_simulation_ids
+        self.__simulation_id_counter = count()
+        self.speculative_reexecution = speculative_reexecution
+        self.speculation_completed_fraction = speculation_completed_fraction
+        self.speculation_percentile = speculation_percentile
+        self.speculation_latency_factor = speculation_latency_factor
+        self.min_latency_samples = min_latency_samples
+        self.lost_simulation_timeout = lost_simulation_timeout
+        self.latency_tracker = LatencyTracker()
+        self.windowed_submission = windowed_submission
+        self.initial_window_size = initial_window_size
+        self.min_window_size = min_window_size
+        self.window_target_seconds = window_target_seconds
+        self.throughput_tracker = ThroughputTracker()
+        # the simulations without a result of each batch being iterated, and the event aborting it
+        self.__active_batches: List[Tuple[Dict[str, SimulationData], threading.Event]] = []
+        self.worker_registry = WorkerRegistry(self.redis) if worker_registry else None
+        self.empty_fleet_timeout = empty_fleet_timeout
+        self.fleet_check_interval = fleet_check_interval
+        self.last_fleet_capacity: Optional[FleetCapacity] = None
+        # busy slots per slot while the last batch was simulated
+        self.last_fleet_utilization: Optional[float] = None
+        self.coalesce_simulations = coalesce_simulations
+        self.telemetry_listeners: List[SimulationTelemetryListener] = \
+            [] if telemetry_listeners is None else list(telemetry_listeners)
+        if telemetry_file is not None:
+            self.telemetry_listeners.append(JsonlTelemetryWriter(telemetry_file))
+        self.queue_depth_sample_interval = queue_depth_sample_interval
+        self.__pop_many = self.redis.register_script(POP_MANY_SCRIPT)
+
+        if run_scoped_results:
+            self.remove_abandoned_result_queues()
+            self.refresh_result_queue_ttl()
+
+    def serialize_simulation_data(self, simulation_data: SimulationData) -> bytes:
+        if self.run_scoped_results:
+            simulation_data = {**simulation_data, 'replyTo': self.result_queue}
+        if self.trim_results:
+            simulation_data = {**simulation_data, 'trimResult': True}
+        if self.intern_characters:
+            simulation_data = self.intern_simulation_characters(simulation_data)
+        return self.codec.encode(simulation_data)
+
+    def intern_simulation_characters(self, simulation_data: SimulationData) -> SimulationData:
+        """
+        Replaces the character configs with references to interned configs.
+        Configs not interned yet are stored on the next flush_interned_characters
+        """
+        characters_configs = simulation_data['charactersConfigs']
+        interned_simulation_data = {
+            key: value
+            for key, value in simulation_data.items()
+            if key != 'charactersConfigs'
+        }
+        interned_simulation_data['charactersRefs'] = [
+            self.intern_character(character_config)
+            for character_config in characters_configs
+        ]
+        interned_simulation_data['charactersId'] = [
+            character_config['characterId']
+            for character_config in characters_configs
+        ]
+        interned_simulation_data['charactersHash'] = self.interned_characters_hash
+        return cast(SimulationData, interned_simulation_data)
+
+    def intern_character(self, character_config: CharacterConfig) -> str:
+        character_ref = character_config_hash(character_config)
+        if character_ref not in self.__interned_character_refs:
+            self.__characters_to_intern[character_ref] = json.dumps(
+                character_without_properties(character_config, ('characterId',)))
+        return character_ref
+
+    def flush_interned_characters(self, refresh_ttl: bool = True) -> None:
+        """
+        Stores characters interned since the last flush, must be called before pushing simulations referencing them
+        """
+        if not self.__characters_to_intern and not refresh_ttl:
+            return
+        pipeline = self.redis.pipeline(transaction=False)
+        if self.__characters_to_intern:
+            pipeline.hset(self.interned_characters_hash, mapping=self.__characters_to_intern)
+        pipeline.expire(self.interned_characters_hash, self.interned_characters_ttl)
+        pipeline.execute()
+        self.__interned_character_refs.update(self.__characters_to_intern.keys())
+        self.__characters_to_intern = {}
+
+    def refresh_result_queue_ttl(self) -> None:
+        """
+        Marks the run scoped result queue as in use for another result_queue_ttl seconds.
+        Done on every push, at the start of every batch and every result_queue_ttl / 10 seconds within a batch, so the
+        queue is not removed as abandoned between the batches of a run
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.set(f"{RUN_RESULT_QUEUE_OWNER_PREFIX}{self.run_id}", 1, ex=self.result_queue_ttl)
+        pipeline.expire(self.result_queue, self.result_queue_ttl)
+        pipeline.execute()
+
+    def remove_abandoned_result_queues(self) -> int:
+        """
+        Deletes run scoped result queues whose owner has not refreshed them within result_queue_ttl seconds.
+        Results pushed after the owner stopped refreshing do not get an expiry, so they are removed here.
+        """
+        abandoned_result_queues = [
+            result_queue
+            for result_queue in self.redis.scan_iter(match=f"{self.run_result_queue_prefix}*")
+            if not self.redis.exists(
+                f"{RUN_RESULT_QUEUE_OWNER_PREFIX}{result_queue.decode('utf-8')[len(self.run_result_queue_prefix):]}")
+        ]
+        if abandoned_result_queues:
+            self.redis.delete(*abandoned_result_queues)
+            print(f"Removed {len(abandoned_result_queues)} abandoned result queues")
+        return len(abandoned_result_queues)
+
+    def check_priorities(self, simulations_data: List[SimulationData]) -> None:
+        """
+        Raises a ValueError for simulations of a priority lane reliable workers do not lease from
+        """
+        if self.reliable and any(
+                simulation_data.get('priority', PRIORITY_NORMAL) != PRIORITY_NORMAL
+                for simulation_data in simulations_data
+        ):
+            raise ValueError("Priority lanes are not supported by the reliable and stream queues")
 
     def push_simulation_data(self, simulation_data: SimulationData) -> None:
-        serialized_simulation_data = json.dumps(simulation_data)
-        self.redis.lpush(SIMULATION_DATA_QUEUE, serialized_simulation_data)
+        self.check_priorities([simulation_data])
+        serialized_simulation_data = self.serialize_simulation_data(simulation_data)
+        if self.intern_characters:
+            self.flush_interned_characters(refresh_ttl=False)
+        if self.run_scoped_results:
+            self.refresh_result_queue_ttl()
+        self.redis.lpush(
+            simulation_data_queue(simulation_data.get('priority', PRIORITY_NORMAL)), serialized_simulation_data)
+
+    def push_simulations_data(self, simulations_data: List[SimulationData]) -> None:
+        """
+        Pushes simulations in chunks, using a single multi-value LPUSH (one round trip) per chunk.
+        Within each priority lane, the simulations are pushed in the same order as push_simulation_data would push
+        them one by one. Higher priority lanes are pushed first
+        """
+        self.check_priorities(simulations_data)
+        serialized_simulations_data_by_queue: Dict[str, List[bytes]] = {
+            data_queue: []
+            for data_queue in SIMULATION_DATA_QUEUES
+        }
+        for simulation_data in simulations_data:
+            serialized_simulations_data_by_queue[
+                simulation_data_queue(simulation_data.get('priority', PRIORITY_NORMAL))
+            ].append(self.serialize_simulation_data(simulation_data))
+        if self.intern_characters:
+            self.flush_interned_characters()
+        if self.run_scoped_results:
+            self.refresh_result_queue_ttl()
+        for data_queue, serialized_simulations_data in serialized_simulations_data_by_queue.items():
+            for chunk_start in range(0, len(serialized_simulations_data), self.chunk_size):
+                chunk = serialized_simulations_data[chunk_start:chunk_start + self.chunk_size]
+                self.redis.lpush(data_queue, *chunk)
 
     def get_simulation_result_blocking(self, timeout: int = 10) -> Optional[SimulationResult]:
-        result_serialized = self.redis.blpop(SIMULATION_RESULT_QUEUE, timeout=timeout)
+        result_serialized = self.redis.blpop(self.result_queue, timeout=timeout)
         if result_serialized is None:
             # timeout
             return None
-        result = json.loads(result_serialized[1].decode("utf-8"))
+        result = decode_message(result_serialized[1])
         return result
 
+    def get_simulation_results_blocking(self, max_count: Optional[int] = None, timeout: int = 10) -> List[SimulationResult]:
+        """
+        Blocks until at least one result is present, then drains up to max_count results in one extra round trip.
+        Returns an empty list on timeout
+        """
+        max_count = self.chunk_size if max_count is None else max_count
+        first_result_serialized = self.redis.blpop(self.result_queue, timeout=timeout)
+        if first_result_serialized is None:
+            # timeout
+            return []
+        results_serialized = [first_result_serialized[1]]
+        if max_count > 1:
+            results_serialized += self.__pop_many(keys=[self.result_queue], args=[max_count - 1])
+        return [
+            decode_message(result_serialized)
+            for result_serialized in results_serialized
+        ]
+
+    def requeue_expired_leases(
+            self,
+            remaining_simulation_data_by_id: Dict[str, SimulationData],
+            lease_deadline_by_id: Dict[str, float]
+    ) -> int:
+        """
+        Scans the processing queue for simulations of this run. A lease starts the first time a simulation is seen
+        being processed, and simulations whose lease has expired are moved back to the data queue of their priority.
+        lease_deadline_by_id is updated in place. Returns the number of re-queued simulations
+        """
+        now = time()
+        expired_items = []
+        processing_ids = set()
+        for item in self.redis.lrange(SIMULATION_PROCESSING_QUEUE, 0, -1):
+            simulation_id = decode_message(item)['simulationId']
+            if simulation_id not in remaining_simulation_data_by_id:
+                continue
+            processing_ids.add(simulation_id)
+            lease_deadline = lease_deadline_by_id.setdefault(simulation_id, now + self.lease_timeout)
+            if now > lease_deadline:
+                expired_items.append(
+                    (item, remaining_simulation_data_by_id[simulation_id].get('priority', PRIORITY_NORMAL)))
+                lease_deadline_by_id.pop(simulation_id)
+
+        # forget leases of simulations no longer processed, they either finished or were re-queued by a worker
+        for simulation_id in list(lease_deadline_by_id.keys()):
+            if simulation_id not in processing_ids:
+                lease_deadline_by_id.pop(simulation_id)
+
+        if expired_items:
+            pipeline = self.redis.pipeline(transaction=True)
+            for item, priority in expired_items:
+                pipeline.lrem(SIMULATION_PROCESSING_QUEUE, 1, item)
+                pipeline.lpush(simulation_data_queue(priority), item)
+            pipeline.execute()
+            print(f"Re-queued {len(expired_items)} simulations with expired leases")
+
+        return len(expired_items)
+
+    def speculate_stragglers(
+            self,
+            remaining_simulation_data_by_id: Dict[str, SimulationData],
+            pushed_at_by_id: Dict[str, float],
+            completed_fraction: float,
+            delivered_by: Optional[float]
+    ) -> List[SimulationData]:
+        """
+        Pushes another copy of each simulation that is pending for much longer than simulations usually take,
+        once most of the batch has finished. pushed_at_by_id holds the first push time of each simulation and is
+        updated with the time of the new copy. delivered_by is a time every simulation pushed before it had been
+        delivered to a worker, None while some may still wait in the data queues, as waiting in the queue is not
+        straggling. Returns the duplicated simulations
+        """
+        if completed_fraction < self.speculation_completed_fraction \
+                or len(self.latency_tracker) < self.min_latency_samples or delivered_by is None:
+            return []
+
+        straggler_latency = self.speculation_latency_factor * \
+            self.latency_tracker.percentile(self.speculation_percentile)
+        now = time()
+        stragglers = [
+            simulation_data
+            for simulation_id, simulation_data in remaining_simulation_data_by_id.items()
+            if now - max(pushed_at_by_id[simulation_id], delivered_by) > straggler_latency
+        ]
+        if stragglers:
+            self.push_simulations_data(stragglers)
+            for simulation_data in stragglers:
+                pushed_at_by_id[simulation_data['simulationId']] = now
+            print(f"Speculatively re-pushed {len(stragglers)} simulations "
+                  f"pending for more than {straggler_latency:.2f}s")
+        return stragglers
+
     def push_simulations_data_wait_results(self, simulations_data: List[SimulationData]) -> List[SimulationResult]:
         """
         Pushes simulations and waits for an equal amount of results to be present.
         If a result that is popped does not correspond with a pushed simulation, it will be discarded
         """
-        remaining_simulation_data_by_id = OrderedDict()
-        for simulation_data in cast(Iterator[SimulationData], simulations_data):
-            self.push_simulation_data(simulation_data)
-            simulation_id = simulation_data['simulationId']
-            remaining_simulation_data_by_id[simulation_id] = simulation_data
-
-        pushed_simulations_count = len(simulations_data)
-        current_results = []
-        start_time = time()
-        prev_time = start_time
-        probably_lost_simulations = False
-        prev_received_result_time = start_time
-        while len(current_results) < pushed_simulations_count:
-            possible_simulation_result = self.get_simulation_result_blocking(timeout=8)
-
-            if possible_simulation_result is not None:
-                simulation_result = cast(SimulationResult, possible_simulation_result)
-                simulation_id = simulation_result['simulationId']
-
-                if simulation_id in remaining_simulation_data_by_id.keys():
-                    current_results.append(simulation_result)
-                    remaining_simulation_data_by_id.pop(simulation_id)
-
-                # if simulations are lost but we are now starting to receive results, push all remaining simulations
-                if probably_lost_simulations:
-                    print("Starting to get results again, pushing all simulationData without results")
-                    probably_lost_simulations = False
-                    for simulation_data in cast(Iterator[SimulationData], remaining_simulation_data_by_id.values()):
-                        self.push_simulation_data(simulation_data)
-
-            else:
-                # if no results have been received for some time, the simulation data might have been lost.
-                # start pushing new simulation data
-                print("Not gotten results for 8 seconds, repushing single simulationData")
-                first_non_received_id, first_non_received_simulation_data =\
-                    list(remaining_simulation_data_by_id.items())[0]
-                self.push_simulation_data(first_non_received_simulation_data)
-                # move the newly pushed simulation data to the end
-                remaining_simulation_data_by_id.pop(first_non_received_id)
-                remaining_simulation_data_by_id[first_non_received_id] = first_non_received_simulation_data
-
-                probably_lost_simulations = True
-
-            new_time = time()
-            if new_time-prev_time > 20:
-                print(f"waited for simulation results for {new_time - start_time:.2f}s, "
-                      f"got {len(current_results)} of {pushed_simulations_count}")
-                prev_time = new_time
-        print(
-            f"Simulated {pushed_simulations_count} simulations in {time() - start_time:.2f}s")
+        return list(self.iter_simulations_results(simulations_data))
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        """
+        Pushes simulations and yields each result as soon as it arrives, until all simulations have a result.
+        If a result that is popped does not correspond with a pushed simulation, it will be discarded.
+        If the iteration is stopped before all results are received, simulations no worker has started are cancelled.
+        Raises RuntimeError once cancel_pending_simulations has aborted the batch
+        """
+        simulations_count = len(simulations_data)
+        # simulations getting the result of an identical simulation pushed before them, by the id of that simulation
+        coalesced_simulations_data_by_id: Dict[str, List[SimulationData]] = {}
+        if self.coalesce_simulations:
+            simulations_data = self.coalesce_simulations_data(simulations_data, coalesced_simulations_data_by_id)
+        unsubmitted_simulations_data = deque(simulations_data)
+        # simulations pushed without a received result
+        remaining_simulation_data_by_id: Dict[str, SimulationData] = OrderedDict()
+        # the first push time, or the push time of the latest speculative copy
+        pushed_at_by_id: Dict[str, float] = {}
+        first_pushed_at_by_id: Dict[str, float] = {}
+
+        def submit_next_simulations():
+            window_size = self.submission_window_size()
+            submit_count = len(unsubmitted_simulations_data) if window_size is None \
+                else max(0, window_size - len(remaining_simulation_data_by_id))
+            submit_simulations_data = [
+                unsubmitted_simulations_data.popleft()
+                for _ in range(min(submit_count, len(unsubmitted_simulations_data)))
+            ]
+            if not submit_simulations_data:
+                return
+            pushed_at = time()
+            for simulation_data in submit_simulations_data:
+                simulation_id = simulation_data['simulationId']
+                remaining_simulation_data_by_id[simulation_id] = simulation_data
+                pushed_at_by_id[simulation_id] = pushed_at
+                first_pushed_at_by_id[simulation_id] = pushed_at
+                telemetry.pushed(simulation_id, pushed_at)
+            self.push_simulations_data(submit_simulations_data)
+
+        aborted = threading.Event()
+        active_batch = (remaining_simulation_data_by_id, aborted)
+        self.__active_batches.append(active_batch)
+        try:
+            start_time = time()
+            if self.run_scoped_results:
+                self.refresh_result_queue_ttl()
+            telemetry = BatchTelemetryRecorder(self.run_id, start_time)
+            prev_depth_sample_time = start_time
+            fleet_capacities: List[FleetCapacity] = []
+            prev_fleet_check_time = start_time
+            no_workers_since: Optional[float] = None
+            if self.worker_registry is not None:
+                self.last_fleet_capacity = self.fleet_capacity()
+                fleet_capacities.append(self.last_fleet_capacity)
+                if self.last_fleet_capacity['workers'] == 0:
+                    print("No simulation workers are alive")
+                    no_workers_since = start_time
+
+            submit_next_simulations()
+
+            received_results_count = 0
+            prev_time = start_time
+            probably_lost_simulations = False
+            prev_reap_time = start_time
+            prev_refresh_time = start_time
+            prev_received_result_time = start_time
+            lease_deadline_by_id: Dict[str, float] = {}
+            # when the data queues were first seen empty while speculating
+            delivered_by: Optional[float] = None
+            speculated_simulation_data_by_id: Dict[str, SimulationData] = {}
+            # wake up often enough to speculate on stragglers, reap expired leases and detect lost simulations
+            wait_timeout = 1 if self.speculative_reexecution \
+                else max(1, int(min(self.reap_interval, self.lost_simulation_timeout)))
+            while received_results_count < simulations_count:
+                simulation_results = self.get_simulation_results_blocking(timeout=wait_timeout)
+                received_at = time()
+                if aborted.is_set():
+                    # nothing is re-pushed, the simulations still queued are removed again below
+                    raise RuntimeError(f"Simulations were cancelled, got {received_results_count} of "
+                                       f"{simulations_count} simulation results")
+
+                if simulation_results:
+                    prev_received_result_time = received_at
+                    no_workers_since = None
+                    for simulation_result in simulation_results:
+                        simulation_id = simulation_result['simulationId']
+
+                        if simulation_id in remaining_simulation_data_by_id.keys():
+                            received_results_count += 1
+                            simulation_data = remaining_simulation_data_by_id.pop(simulation_id)
+                            pushed_at_by_id.pop(simulation_id)
+                            first_pushed_at = first_pushed_at_by_id.pop(simulation_id)
+                            self.latency_tracker.add(received_at - simulation_result.get('startedAt', first_pushed_at))
+                            self.throughput_tracker.add(received_at)
+                            telemetry.completed(simulation_result, received_at)
+                            # the simulation data is either not echoed back, or may only reference the characters,
+                            # so the local copy is used
+                            yield {**simulation_result, 'simulationData': simulation_data}
+
+                            for coalesced_simulation_data in coalesced_simulations_data_by_id.pop(simulation_id, []):
+                                received_results_count += 1
+                                yield {
+                                    **simulation_result,
+                                    'simulationId': coalesced_simulation_data['simulationId'],
+                                    'simulationData': coalesced_simulation_data
+                                }
+                        else:
+                            telemetry.discarded_result()
+
+                    # if simulations are lost but we are now starting to receive results,
+                    # push all remaining simulations
+                    if probably_lost_simulations:
+                        print("Starting to get results again, pushing all simulationData without results")
+                        probably_lost_simulations = False
+                        self.push_simulations_data(list(remaining_simulation_data_by_id.values()))
+                        telemetry.repushed("lost", len(remaining_simulation_data_by_id))
+                        pushed_at_by_id = dict.fromkeys(remaining_simulation_data_by_id.keys(), received_at)
+
+                    submit_next_simulations()
+
+                elif not self.reliable and received_at - prev_received_result_time > self.lost_simulation_timeout:
+                    # if no results have been received for some time, the simulation data might have been lost.
+                    # start pushing new simulation data
+                    print(f"Not gotten results for {self.lost_simulation_timeout} seconds, "
+                          f"repushing single simulationData")
+                    first_non_received_id, first_non_received_simulation_data =\
+                        list(remaining_simulation_data_by_id.items())[0]
+                    self.push_simulation_data(first_non_received_simulation_data)
+                    telemetry.repushed("lost", 1)
+                    pushed_at_by_id[first_non_received_id] = received_at
+                    # move the newly pushed simulation data to the end
+                    remaining_simulation_data_by_id.pop(first_non_received_id)
+                    remaining_simulation_data_by_id[first_non_received_id] = first_non_received_simulation_data
+
+                    prev_received_result_time = received_at
+                    probably_lost_simulations = True
+
+                if self.speculative_reexecution and remaining_simulation_data_by_id:
+                    completed_fraction = received_results_count / simulations_count
+                    if delivered_by is None and completed_fraction >= self.speculation_completed_fraction \
+                            and len(self.latency_tracker) >= self.min_latency_samples and self.data_queue_depth() == 0:
+                        delivered_by = received_at
+                    speculated_simulations_data = self.speculate_stragglers(
+                        remaining_simulation_data_by_id,
+                        pushed_at_by_id,
+                        completed_fraction=completed_fraction,
+                        delivered_by=delivered_by
+                    )
+                    telemetry.repushed("speculative", len(speculated_simulations_data))
+                    speculated_simulation_data_by_id.update(
+                        (simulation_data['simulationId'], simulation_data)
+                        for simulation_data in speculated_simulations_data
+                    )
+
+                new_time = time()
+                if self.worker_registry is not None and new_time - prev_fleet_check_time > self.fleet_check_interval:
+                    self.last_fleet_capacity = self.fleet_capacity()
+                    fleet_capacities.append(self.last_fleet_capacity)
+                    prev_fleet_check_time = new_time
+                    if self.last_fleet_capacity['workers'] > 0:
+                        no_workers_since = None
+                    elif no_workers_since is None:
+                        no_workers_since = new_time
+                    elif new_time - no_workers_since > self.empty_fleet_timeout:
+                        raise RuntimeError(
+                            f"No simulation workers have been alive for {self.empty_fleet_timeout} seconds, "
+                            f"got {received_results_count} of {simulations_count} simulation results")
+
+                if self.run_scoped_results and new_time - prev_refresh_time > self.result_queue_ttl / 10:
+                    self.refresh_result_queue_ttl()
+                    prev_refresh_time = new_time
+
+                if self.reliable and remaining_simulation_data_by_id and new_time - prev_reap_time > self.reap_interval:
+                    telemetry.repushed(
+                        "leaseExpired",
+                        self.requeue_expired_leases(remaining_simulation_data_by_id, lease_deadline_by_id))
+                    prev_reap_time = new_time
+
+                if self.telemetry_listeners and new_time - prev_depth_sample_time > self.queue_depth_sample_interval:
+                    telemetry.sampled_queue_depth(new_time, self.data_queue_depth())
+                    prev_depth_sample_time = new_time
 
-        # copied_current_results = deepcopy(current_results)
-        return current_results
+                if new_time-prev_time > 20:
+                    print(f"waited for simulation results for {new_time - start_time:.2f}s, "
+                          f"got {received_results_count} of {simulations_count}")
+                    prev_time = new_time
+            if speculated_simulation_data_by_id:
+                # the copies of simulations whose first copy finished first are not needed anymore
+                cancelled_copies_count = self.cancel_simulations(list(speculated_simulation_data_by_id.values()))
+                if cancelled_copies_count:
+                    print(f"Cancelled {cancelled_copies_count} speculative copies no worker has started")
+            fleet_slots = sum(fleet_capacity['slots'] for fleet_capacity in fleet_capacities)
+            self.last_fleet_utilization = \
+                sum(fleet_capacity['busy'] for fleet_capacity in fleet_capacities) / fleet_slots if fleet_slots \
+                else None
+            fleet_report = f", fleet utilization {self.last_fleet_utilization:.0%} of " \
+                f"{self.last_fleet_capacity['slots']} slots on {self.last_fleet_capacity['workers']} workers" \
+                if self.last_fleet_utilization is not None else ""
+            end_time = time()
+            print(
+                f"Simulated {simulations_count} simulations in {end_time - start_time:.2f}s{fleet_report}")
+            if self.telemetry_listeners:
+                batch_telemetry = telemetry.record(end_time, simulations_count, self.last_fleet_utilization)
+                for telemetry_listener in self.telemetry_listeners:
+                    telemetry_listener.on_batch(batch_telemetry)
+        finally:
+            self.__active_batches.remove(active_batch)
+            # stopped early, by an exception, a cancellation or by the caller no longer iterating
+            if remaining_simulation_data_by_id:
+                cancelled_count = self.cancel_simulations(list(remaining_simulation_data_by_id.values()))
+                print(f"Stopped waiting for simulation results, cancelled {cancelled_count} not started simulations")
+
+    def coalesce_simulations_data(
+            self,
+            simulations_data: List[SimulationData],
+            coalesced_simulations_data_by_id: Dict[str, List[SimulationData]]
+    ) -> List[SimulationData]:
+        """
+        Returns the first simulation of each distinct content. The others are added to coalesced_simulations_data_by_id
+        under the id of the simulation with the same content
+        """
+        unique_simulation_data_by_hash: Dict[str, SimulationData] = {}
+        for simulation_data in simulations_data:
+            content_hash = simulation_content_hash(simulation_data)
+            unique_simulation_data = unique_simulation_data_by_hash.setdefault(content_hash, simulation_data)
+            if unique_simulation_data is not simulation_data:
+                coalesced_simulations_data_by_id.setdefault(
+                    unique_simulation_data['simulationId'], []).append(simulation_data)
+
+        coalesced_count = len(simulations_data) - len(unique_simulation_data_by_hash)
+        if coalesced_count:
+            print(f"Coalesced {coalesced_count} simulations identical to other simulations in the batch")
+        return list(unique_simulation_data_by_hash.values())
+
+    def submission_window_size(self) -> Optional[int]:
+        """
+        How many simulations may be pushed without a result, None if not limited
+        """
+        if not self.windowed_submission:
+            return None
+        fleet_slots = 0 if self.last_fleet_capacity is None else self.last_fleet_capacity['slots']
+        throughput = self.throughput_tracker.throughput()
+        if throughput is not None:
+            window_size = ceil(throughput * self.window_target_seconds)
+        elif fleet_slots:
+            # one simulation waiting behind each simulating slot
+            window_size = 2 * fleet_slots
+        else:
+            window_size = self.initial_window_size
+        return max(self.min_window_size, fleet_slots, window_size)
+
+    def fleet_capacity(self) -> Optional[FleetCapacity]:
+        """
+        The workers alive and their slots, None if the worker registry is not used
+        """
+        if self.worker_registry is None:
+            return None
+        return self.worker_registry.fleet_capacity()
+
+    def data_queue_depth(self) -> int:
+        """
+        The number of simulations waiting for a worker, in all priority lanes
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        for data_queue in SIMULATION_DATA_QUEUES:
+            pipeline.llen(data_queue)
+        return sum(pipeline.execute())
+
+    def cancel_simulations(self, simulations_data: List[SimulationData]) -> int:
+        """
+        Removes the simulations from the data queue if no worker has started them yet.
+        Returns the number of removed simulations
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        for simulation_data in simulations_data:
+            # serialization is deterministic, so the pushed data can be found again
+            pipeline.lrem(
+                simulation_data_queue(simulation_data.get('priority', PRIORITY_NORMAL)),
+                0,
+                self.serialize_simulation_data(simulation_data)
+            )
+        return sum(pipeline.execute())
+
+    def cancel_pending_simulations(self) -> int:
+        """
+        Cancels all simulations pushed by this queue client that no worker has started, and aborts the batches they
+        belong to, so iter_simulations_results neither re-pushes them nor waits for their results.
+        Can be called from a signal handler or another thread to abort the run
+        """
+        cancelled_count = 0
+        for remaining_simulation_data_by_id, aborted in list(self.__active_batches):
+            aborted.set()
+            cancelled_count += self.cancel_simulations(list(remaining_simulation_data_by_id.values()))
+        return cancelled_count
 
     def get_simulation_data(self):
-        return self.redis.lpop(SIMULATION_DATA_QUEUE)
+        for data_queue in SIMULATION_DATA_QUEUES:
+            simulation_data = self.redis.lpop(data_queue)
+            if simulation_data is not None:
+                return simulation_data
+        return None
 
     def create_simulation_id(self):
+        if self.short_simulation_ids:
+            return str(next(self.__simulation_id_counter))
         return str(uuid.uuid4())
 
     def push_population(self, population):
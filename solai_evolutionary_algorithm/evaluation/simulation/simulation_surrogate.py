@@ -0,0 +1,59 @@
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class RidgeSurrogate:
+    """
+    Predicts the mean measurement of each metric from a genome vector, with a ridge regression updated one
+    observation at a time. The noise of each metric is estimated from the error of each prediction made before the
+    observation was added, weighted towards the latest errors by error_decay, as the model improves.
+    Nothing is predicted before min_observations observations.
+    """
+
+    def __init__(
+            self,
+            metrics: List[str],
+            features_count: int,
+            regularization: float = 1.0,
+            min_observations: int = 50,
+            error_decay: float = 0.95
+    ):
+        self.metrics = metrics
+        self.min_observations = min_observations
+        self.error_decay = error_decay
+        # one more feature for the intercept
+        self.gram = regularization * np.identity(features_count + 1)
+        self.moments = np.zeros((features_count + 1, len(metrics)))
+        self.squared_errors = np.zeros(len(metrics))
+        self.errors_weight = 0.0
+        self.observations_count = 0
+
+    def features(self, genome_vector: List[float]) -> np.ndarray:
+        return np.append(np.asarray(genome_vector, dtype=float), 1.0)
+
+    def add(self, genome_vector: List[float], mean_measurements: Dict[str, float]) -> None:
+        features = self.features(genome_vector)
+        measurements = np.array([mean_measurements[metric] for metric in self.metrics], dtype=float)
+        if self.observations_count > 0:
+            prediction = features @ np.linalg.solve(self.gram, self.moments)
+            self.squared_errors = self.error_decay * self.squared_errors + (prediction - measurements) ** 2
+            self.errors_weight = self.error_decay * self.errors_weight + 1
+        self.gram += np.outer(features, features)
+        self.moments += np.outer(features, measurements)
+        self.observations_count += 1
+
+    def predict(self, genome_vector: List[float]) -> Optional[Tuple[Dict[str, float], Dict[str, float]]]:
+        """
+        The predicted mean measurement of each metric and its standard deviation, None until min_observations
+        """
+        if self.observations_count < self.min_observations:
+            return None
+        features = self.features(genome_vector)
+        predicted_means = features @ np.linalg.solve(self.gram, self.moments)
+        leverage = features @ np.linalg.solve(self.gram, features)
+        predicted_stds = np.sqrt(self.squared_errors / self.errors_weight * (1 + leverage))
+        return (
+            dict(zip(self.metrics, predicted_means.tolist())),
+            dict(zip(self.metrics, predicted_stds.tolist()))
+        )
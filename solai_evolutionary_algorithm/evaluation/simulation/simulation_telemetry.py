@@ -0,0 +1,126 @@
+import json
+from typing import List, Dict, Optional, TypedDict
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationResult
+
+REPORTED_PERCENTILES = (0.5, 0.9, 0.99)
+
+# times are unix timestamps in seconds. startedAt is reported by the worker, so it depends on the worker clock
+SimulationTiming = TypedDict("SimulationTiming", {
+    "simulationId": str,
+    "enqueuedAt": float,
+    "startedAt": Optional[float],
+    "completedAt": Optional[float]
+})
+
+BatchTelemetry = TypedDict("BatchTelemetry", {
+    "runId": str,
+    "startedAt": float,
+    "endedAt": float,
+    "simulations": int,
+    # simulations given the result of an identical simulation instead of being pushed
+    "coalesced": int,
+    # results per second
+    "throughput": float,
+    # seconds from push to result, by percentile
+    "latencyPercentiles": Dict[str, float],
+    # seconds from push to the worker starting, for simulations whose worker reports startedAt
+    "queueWaitPercentiles": Dict[str, float],
+    # extra pushes of simulations, by reason ("lost", "speculative", "leaseExpired")
+    "repushes": Dict[str, int],
+    # results popped that did not belong to the batch
+    "discardedResults": int,
+    # [time, simulations waiting in the data queues]
+    "queueDepth": List[List[float]],
+    "fleetUtilization": Optional[float],
+    "simulationsTimings": List[SimulationTiming]
+})
+
+
+class SimulationTelemetryListener:
+
+    def on_batch(self, batch_telemetry: BatchTelemetry):
+        pass
+
+
+class JsonlTelemetryWriter(SimulationTelemetryListener):
+    """
+    Appends each batch record as one json line to the file
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def on_batch(self, batch_telemetry: BatchTelemetry):
+        with open(self.filename, 'a') as file:
+            file.write(json.dumps(batch_telemetry) + "\n")
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    sorted_values = sorted(values)
+    return {
+        f"p{round(p * 100)}": sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+        for p in REPORTED_PERCENTILES
+    }
+
+
+class BatchTelemetryRecorder:
+    """
+    Collects the timings and events of one batch of simulations, see BatchTelemetry
+    """
+
+    def __init__(self, run_id: str, started_at: float):
+        self.run_id = run_id
+        self.started_at = started_at
+        self.timing_by_id: Dict[str, SimulationTiming] = {}
+        self.repushes: Dict[str, int] = {}
+        self.discarded_results = 0
+        self.queue_depth: List[List[float]] = []
+
+    def pushed(self, simulation_id: str, pushed_at: float) -> None:
+        self.timing_by_id[simulation_id] = SimulationTiming(
+            simulationId=simulation_id, enqueuedAt=pushed_at, startedAt=None, completedAt=None)
+
+    def repushed(self, reason: str, count: int) -> None:
+        if count:
+            self.repushes[reason] = self.repushes.get(reason, 0) + count
+
+    def completed(self, simulation_result: SimulationResult, completed_at: float) -> None:
+        timing = self.timing_by_id[simulation_result['simulationId']]
+        timing['startedAt'] = simulation_result.get('startedAt')
+        timing['completedAt'] = completed_at
+
+    def discarded_result(self) -> None:
+        self.discarded_results += 1
+
+    def sampled_queue_depth(self, sampled_at: float, depth: int) -> None:
+        self.queue_depth.append([sampled_at, depth])
+
+    def record(self, ended_at: float, simulations_count: int, fleet_utilization: Optional[float]) -> BatchTelemetry:
+        timings = list(self.timing_by_id.values())
+        completed_timings = [timing for timing in timings if timing['completedAt'] is not None]
+        duration = ended_at - self.started_at
+        return BatchTelemetry(
+            runId=self.run_id,
+            startedAt=self.started_at,
+            endedAt=ended_at,
+            simulations=simulations_count,
+            coalesced=simulations_count - len(timings),
+            throughput=len(completed_timings) / duration if duration > 0 else 0.0,
+            latencyPercentiles=percentiles([
+                timing['completedAt'] - timing['enqueuedAt']
+                for timing in completed_timings
+            ]),
+            queueWaitPercentiles=percentiles([
+                timing['startedAt'] - timing['enqueuedAt']
+                for timing in completed_timings
+                if timing['startedAt'] is not None
+            ]),
+            repushes=self.repushes,
+            discardedResults=self.discarded_results,
+            queueDepth=self.queue_depth,
+            fleetUtilization=fleet_utilization,
+            simulationsTimings=timings
+        )
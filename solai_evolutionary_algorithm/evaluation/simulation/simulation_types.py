@@ -0,0 +1,74 @@
+from typing import List, TypedDict, Dict
+
+# simulations with a lower priority value are run first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+AbilityConfig = TypedDict("AbilityConfig", {
+    "name": str,
+    "type": str,  # "MELEE" | "PROJECTILE"
+    "radius": float,
+    "distanceFromChar": float,
+    "speed": float,
+    "startupTime": int,
+    "activeTime": int,
+    "executionTime": int,
+    "endlagTime": int,
+    "rechargeTime": int,
+    "damage": float,
+    "baseKnockback": float,
+    "knockbackRatio": float,
+    "knockbackPoint": float,
+    "knockbackTowardPoint": bool
+})
+
+CharacterConfig = TypedDict('CharacterConfig', {
+    'characterId': str,
+    'radius': float,
+    'moveVelocity': float,
+    'abilities': List[AbilityConfig]
+})
+
+_SimulationDataRequired = TypedDict("_SimulationDataRequired", {
+    "simulationId": str,
+    "charactersConfigs": List[CharacterConfig],
+    "metrics": List[str]
+})
+
+
+class SimulationData(_SimulationDataRequired, total=False):
+    # the queue the result should be pushed to, SIMULATION_RESULT_QUEUE if not present
+    replyTo: str
+    # only sent when characters are interned, replacing charactersConfigs. Each character config is
+    # HGET charactersHash charactersRefs[i], with characterId charactersId[i]
+    charactersRefs: List[str]
+    charactersId: List[str]
+    charactersHash: str
+    # ask the worker to leave simulationData out of the result
+    trimResult: bool
+    # simulate the characters this many times, returning the metrics of each repeat in repeatMetrics
+    repeat: int
+    # PRIORITY_NORMAL if not present
+    priority: int
+    # which of the repeated simulations of the same characters this is, 0 if not present
+    repeatIndex: int
+    # the fidelity of the simulation: games are cut off after this many frames, full length games if not present.
+    # Results are tagged with it through their simulationData, and results of different fidelities are never cached
+    # or coalesced as the same simulation
+    maxFrames: int
+
+
+_SimulationResultRequired = TypedDict("_SimulationResultRequired", {
+    "simulationId": str,
+    "metrics": Dict[str, List[float]]
+})
+
+
+class SimulationResult(_SimulationResultRequired, total=False):
+    # not sent by workers when trimResult is set, the queue client rejoins results with the pushed simulation data
+    simulationData: SimulationData
+    # metrics of each repeat of a multi repeat simulation, metrics then holds the metrics of the first repeat
+    repeatMetrics: List[Dict[str, List[float]]]
+    # unix time the worker started simulating, if the worker reports it
+    startedAt: float
@@ -0,0 +1,224 @@
+from typing import List, Dict, Optional, Tuple
+
+import redis
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_codec import decode_message
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, SimulationData, \
+    SimulationResult
+
+# Workers using the stream protocol:
+#   XREADGROUP GROUP SIMULATION_WORKERS_GROUP <worker name> COUNT <n> BLOCK <ms> STREAMS SIMULATION_DATA_STREAM >
+#   simulate, then XADD <replyTo, or SIMULATION_RESULT_STREAM> * data <result>
+#   XACK and XDEL the simulation data entry.
+# An idle worker may XAUTOCLAIM entries that have been pending for too long, taking over from workers that died.
+SIMULATION_DATA_STREAM = "stream:simulation-data"
+SIMULATION_RESULT_STREAM = "stream:simulation-result"
+RUN_RESULT_STREAM_PREFIX = f"{SIMULATION_RESULT_STREAM}:"
+SIMULATION_WORKERS_GROUP = "simulation-workers"
+SIMULATION_CLIENTS_GROUP = "simulation-clients"
+# the message of a stream entry is stored in this field
+MESSAGE_FIELD = b"data"
+# consumer that owns expired entries while they are re-added to the data stream
+REAPER_CONSUMER = "simulation-queue-reaper"
+
+StreamId = Tuple[int, int]
+
+
+def parse_stream_id(entry_id: bytes) -> StreamId:
+    milliseconds, sequence = entry_id.split(b"-")
+    return int(milliseconds), int(sequence)
+
+
+def entry_fields(fields) -> Dict[bytes, bytes]:
+    """
+    The fields of a stream entry, which are a flat list of names and values when the client does not parse them
+    """
+    if isinstance(fields, dict):
+        return fields
+    return dict(zip(fields[::2], fields[1::2]))
+
+
+class StreamSimulationQueue(SimulationQueue):
+    """
+    A SimulationQueue on redis streams with consumer groups instead of lists. Takes the same arguments.
+    Workers read simulations through the SIMULATION_WORKERS_GROUP consumer group, so redis keeps a pending entries
+    list of the simulations each worker has read but not acknowledged. Simulations pending for longer than
+    lease_timeout seconds are claimed with XAUTOCLAIM and added to the stream again, which makes the queue reliable
+    without guessing which simulations are lost. There are no priority lanes, see check_priorities. Results are read in bulk through the SIMULATION_CLIENTS_GROUP group.
+    """
+
+    shared_result_queue = SIMULATION_RESULT_STREAM
+    run_result_queue_prefix = RUN_RESULT_STREAM_PREFIX
+
+    def __init__(self, **kwargs):
+        super(StreamSimulationQueue, self).__init__(**{**kwargs, 'reliable': True})
+        self.__entry_ids_by_simulation_id: Dict[str, List[bytes]] = {}
+
+        self.create_group(SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP)
+        self.create_group(self.result_queue, SIMULATION_CLIENTS_GROUP)
+        if self.run_scoped_results:
+            # the result stream did not exist when its expiry was first set
+            self.refresh_result_queue_ttl()
+
+    def create_group(self, stream: str, group: str) -> None:
+        """
+        Creates the consumer group, and the stream if it does not exist.
+        The group starts at the beginning of the stream, so entries added before any consumer existed are delivered
+        """
+        try:
+            self.redis.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def push_simulation_data(self, simulation_data: SimulationData) -> None:
+        self.push_simulations_data([simulation_data])
+
+    def push_simulations_data(self, simulations_data: List[SimulationData]) -> None:
+        """
+        Adds simulations to the data stream, pipelining one chunk of XADDs per round trip.
+        There is a single stream, so only normal priority simulations are taken
+        """
+        self.check_priorities(simulations_data)
+        serialized_simulations_data = [
+            self.serialize_simulation_data(simulation_data)
+            for simulation_data in simulations_data
+        ]
+        if self.intern_characters:
+            self.flush_interned_characters()
+        if self.run_scoped_results:
+            self.refresh_result_queue_ttl()
+        for chunk_start in range(0, len(serialized_simulations_data), self.chunk_size):
+            chunk_simulations_data = simulations_data[chunk_start:chunk_start + self.chunk_size]
+            pipeline = self.redis.pipeline(transaction=False)
+            for serialized_simulation_data in serialized_simulations_data[chunk_start:chunk_start + self.chunk_size]:
+                pipeline.xadd(SIMULATION_DATA_STREAM, {MESSAGE_FIELD: serialized_simulation_data})
+            for simulation_data, entry_id in zip(chunk_simulations_data, pipeline.execute()):
+                self.__entry_ids_by_simulation_id.setdefault(simulation_data['simulationId'], []).append(entry_id)
+
+    def get_simulation_result_blocking(self, timeout: int = 10) -> Optional[SimulationResult]:
+        simulation_results = self.get_simulation_results_blocking(max_count=1, timeout=timeout)
+        return simulation_results[0] if simulation_results else None
+
+    def get_simulation_results_blocking(self, max_count: Optional[int] = None, timeout: int = 10) -> List[SimulationResult]:
+        """
+        Blocks until at least one result is present, and reads up to max_count results in the same round trip.
+        Read results are acknowledged and deleted. Returns an empty list on timeout
+        """
+        max_count = self.chunk_size if max_count is None else max_count
+        response = self.redis.xreadgroup(
+            SIMULATION_CLIENTS_GROUP,
+            self.run_id,
+            {self.result_queue: ">"},
+            count=max_count,
+            block=int(timeout * 1000)
+        )
+        if not response:
+            # timeout
+            return []
+        entries = response[0][1]
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.xack(self.result_queue, SIMULATION_CLIENTS_GROUP, *entry_ids)
+        pipeline.xdel(self.result_queue, *entry_ids)
+        pipeline.execute()
+
+        simulation_results = [
+            decode_message(fields[MESSAGE_FIELD])
+            for _, fields in entries
+        ]
+        for simulation_result in simulation_results:
+            self.__entry_ids_by_simulation_id.pop(simulation_result['simulationId'], None)
+        return simulation_results
+
+    def requeue_expired_leases(
+            self,
+            remaining_simulation_data_by_id: Dict[str, SimulationData],
+            lease_deadline_by_id: Dict[str, float]
+    ) -> int:
+        """
+        Claims every simulation that has been pending in a worker for longer than lease_timeout, and adds it to the
+        data stream again so another worker picks it up. Redis tracks how long entries have been pending, so
+        lease_deadline_by_id is not used, and simulations of other runs whose worker died are re-queued as well.
+        Returns the number of re-queued simulations
+        """
+        requeued_count = 0
+        start_id = "0-0"
+        while True:
+            # XAUTOCLAIM has no helper in the redis client version used
+            response = self.redis.execute_command(
+                "XAUTOCLAIM", SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP, REAPER_CONSUMER,
+                int(self.lease_timeout * 1000), start_id, "COUNT", self.chunk_size
+            )
+            next_start_id, claimed_entries = response[0], response[1]
+            # entries deleted while pending are returned as nil by redis 6.2, and left out by later versions
+            expired_entries = [
+                (entry[0], entry_fields(entry[1]))
+                for entry in claimed_entries
+                if entry is not None and entry[1] is not None
+            ]
+            claimed_ids = [entry[0] for entry in claimed_entries if entry is not None]
+
+            if claimed_ids:
+                pipeline = self.redis.pipeline(transaction=True)
+                for _, fields in expired_entries:
+                    pipeline.xadd(SIMULATION_DATA_STREAM, {MESSAGE_FIELD: fields[MESSAGE_FIELD]})
+                pipeline.xack(SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP, *claimed_ids)
+                pipeline.xdel(SIMULATION_DATA_STREAM, *claimed_ids)
+                new_entry_ids = pipeline.execute()[:len(expired_entries)]
+                for (_, fields), entry_id in zip(expired_entries, new_entry_ids):
+                    simulation_id = decode_message(fields[MESSAGE_FIELD])['simulationId']
+                    if simulation_id in remaining_simulation_data_by_id:
+                        self.__entry_ids_by_simulation_id.setdefault(simulation_id, []).append(entry_id)
+                requeued_count += len(expired_entries)
+
+            if next_start_id in (b"0-0", "0-0"):
+                break
+            start_id = next_start_id
+
+        if requeued_count:
+            print(f"Re-queued {requeued_count} simulations with expired leases")
+        return requeued_count
+
+    def data_queue_depth(self) -> int:
+        """
+        Entries are deleted once simulated, so the entries not delivered to a worker are the ones not pending
+        """
+        pending_count = sum(
+            group['pending']
+            for group in self.redis.xinfo_groups(SIMULATION_DATA_STREAM)
+            if group['name'] in (SIMULATION_WORKERS_GROUP, SIMULATION_WORKERS_GROUP.encode("utf-8"))
+        )
+        return max(0, self.redis.xlen(SIMULATION_DATA_STREAM) - pending_count)
+
+    def cancel_simulations(self, simulations_data: List[SimulationData]) -> int:
+        """
+        Deletes the entries of the simulations that have not been delivered to a worker yet.
+        Returns the number of removed simulations
+        """
+        last_delivered_id = next(
+            parse_stream_id(group['last-delivered-id'])
+            for group in self.redis.xinfo_groups(SIMULATION_DATA_STREAM)
+            if group['name'] in (SIMULATION_WORKERS_GROUP, SIMULATION_WORKERS_GROUP.encode("utf-8"))
+        )
+        undelivered_entry_ids = [
+            entry_id
+            for simulation_data in simulations_data
+            for entry_id in self.__entry_ids_by_simulation_id.pop(simulation_data['simulationId'], [])
+            if parse_stream_id(entry_id) > last_delivered_id
+        ]
+        if not undelivered_entry_ids:
+            return 0
+        return self.redis.xdel(SIMULATION_DATA_STREAM, *undelivered_entry_ids)
+
+    def get_simulation_data(self):
+        response = self.redis.xreadgroup(
+            SIMULATION_WORKERS_GROUP, self.run_id, {SIMULATION_DATA_STREAM: ">"}, count=1)
+        if not response:
+            return None
+        entry_id, fields = response[0][1][0]
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.xack(SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP, entry_id)
+        pipeline.xdel(SIMULATION_DATA_STREAM, entry_id)
+        pipeline.execute()
+        return fields[MESSAGE_FIELD]
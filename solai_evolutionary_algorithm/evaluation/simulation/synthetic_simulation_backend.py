@@ -0,0 +1,135 @@
+import math
+import random
+from itertools import count
+from typing import List, Iterator, Dict, Tuple, Optional
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult, \
+    CharacterConfig
+from solai_evolutionary_algorithm.utils.character_hash_utils import character_genome_hash, content_hash
+
+# frames in a game at 60 fps, games are cut off after MAX_GAME_LENGTH
+MAX_GAME_LENGTH = 3 * 60 * 60
+MIN_GAME_LENGTH = 10 * 60
+
+SYNTHETIC_METRICS = ("leadChange", "characterWon", "gameLength", "stageCoverage", "leastInteractionType")
+
+
+def ability_damage_rate(ability) -> float:
+    """
+    Damage per frame if the ability is used whenever it is recharged
+    """
+    cycle_frames = ability['startupTime'] + ability['activeTime'] + ability['executionTime'] + \
+        ability['endlagTime'] + ability['rechargeTime']
+    knockback = ability['baseKnockback'] * (1 + ability['knockbackRatio']) / 1000
+    return ability['damage'] * (1 + knockback) / max(1, cycle_frames)
+
+
+def character_strength(character: CharacterConfig) -> float:
+    damage_rate = sum(ability_damage_rate(ability) for ability in character['abilities'])
+    mobility = character['moveVelocity'] / character['radius']
+    return math.log(1 + damage_rate) + 0.3 * math.log(1 + mobility)
+
+
+def character_mobility(character: CharacterConfig) -> float:
+    """
+    Between 0 and 1, how much of the stage the character is able to cover
+    """
+    return min(1.0, character['moveVelocity'] / 800) * min(1.0, 40 / character['radius'])
+
+
+def character_interaction_balance(character: CharacterConfig) -> float:
+    """
+    The share of the least used ability type, expecting each ability to be used about as often
+    """
+    abilities_count = len(character['abilities'])
+    if abilities_count == 0:
+        return 0.0
+    melee_count = sum(ability['type'] == "MELEE" for ability in character['abilities'])
+    return min(melee_count, abilities_count - melee_count) / abilities_count
+
+
+class SyntheticSimulationBackend(SimulationBackend):
+    """
+    Simulates in-process with a cheap statistical model of the game instead of the game itself, so evolution can be
+    profiled and benchmarked without redis or workers. The outcome depends on the strength (damage rate and mobility)
+    of the characters, and is random around that, but deterministic: the n-th simulation of the same two genomes with
+    the same seed always gives the same metrics.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.__simulation_id_counter = count()
+        self.__simulated_count_by_pair: Dict[Tuple[str, ...], int] = {}
+
+    def create_simulation_id(self) -> str:
+        return str(next(self.__simulation_id_counter))
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        for simulation_data in simulations_data:
+            yield self.simulate(simulation_data)
+
+    def simulate(self, simulation_data: SimulationData) -> SimulationResult:
+        repeat_metrics = [
+            self.simulate_game(
+                simulation_data['charactersConfigs'], simulation_data['metrics'], simulation_data.get('maxFrames'))
+            for _ in range(simulation_data.get('repeat', 1))
+        ]
+        simulation_result = SimulationResult(
+            simulationId=simulation_data['simulationId'],
+            simulationData=simulation_data,
+            metrics=repeat_metrics[0]
+        )
+        if 'repeat' in simulation_data:
+            simulation_result['repeatMetrics'] = repeat_metrics
+        return simulation_result
+
+    def simulate_game(
+            self,
+            characters_configs: List[CharacterConfig],
+            metrics: List[str],
+            max_frames: Optional[int] = None
+    ) -> Dict[str, List[float]]:
+        unknown_metrics = set(metrics) - set(SYNTHETIC_METRICS)
+        if unknown_metrics:
+            raise ValueError(f"The synthetic simulator can not measure {unknown_metrics}")
+
+        pair_key = tuple(character_genome_hash(character_config) for character_config in characters_configs)
+        simulated_count = self.__simulated_count_by_pair.get(pair_key, 0)
+        self.__simulated_count_by_pair[pair_key] = simulated_count + 1
+        rng = random.Random(content_hash([self.seed, pair_key, simulated_count]))
+
+        first_character, second_character = characters_configs
+        strength_difference = character_strength(first_character) - character_strength(second_character)
+        first_win_probability = 1 / (1 + math.exp(-strength_difference))
+        first_won = rng.random() < first_win_probability
+
+        # strong characters end games fast
+        total_strength = character_strength(first_character) + character_strength(second_character)
+        game_length = min(MAX_GAME_LENGTH, max(
+            MIN_GAME_LENGTH, int(rng.lognormvariate(math.log(4 * MAX_GAME_LENGTH / (1 + total_strength)), 0.3))))
+        if max_frames is not None:
+            game_length = min(game_length, max_frames)
+
+        # close games change lead more often, and longer games give more opportunities to
+        closeness = 1 - abs(2 * first_win_probability - 1)
+        lead_change_mean = 12 * closeness * game_length / MAX_GAME_LENGTH
+        lead_change = sum(rng.random() < lead_change_mean / 50 for _ in range(50))
+
+        game_metrics = {
+            'characterWon': [float(first_won), float(not first_won)],
+            'gameLength': [float(game_length)] * 2,
+            'leadChange': [float(lead_change)] * 2,
+            'stageCoverage': [
+                min(1.0, max(0.0, rng.gauss(0.1 + 0.8 * character_mobility(character), 0.05)))
+                for character in characters_configs
+            ],
+            'leastInteractionType': [
+                min(1.0, max(0.0, rng.gauss(0.5 * character_interaction_balance(character) + 0.01, 0.01)))
+                for character in characters_configs
+            ]
+        }
+        return {
+            metric: game_metrics[metric]
+            for metric in metrics
+        }
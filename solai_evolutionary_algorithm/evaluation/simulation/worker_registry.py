@@ -0,0 +1,60 @@
+import json
+from time import time
+from typing import List, TypedDict
+
+import redis
+
+# Workers announce themselves by setting SIMULATION_WORKER_PREFIX<worker id> to a json WorkerHeartbeat,
+# with an expiry of a few heartbeat intervals. A worker whose key has expired is considered dead.
+SIMULATION_WORKER_PREFIX = "simulation-worker:"
+DEFAULT_HEARTBEAT_TTL = 10
+
+WorkerHeartbeat = TypedDict("WorkerHeartbeat", {
+    "workerId": str,
+    # how many simulations the worker runs at the same time
+    "slots": int,
+    # how many of the slots are simulating
+    "busy": int,
+    "heartbeatAt": float
+})
+
+FleetCapacity = TypedDict("FleetCapacity", {
+    "workers": int,
+    "slots": int,
+    "busy": int
+})
+
+
+class WorkerRegistry:
+    """
+    Reads and publishes the heartbeats of simulation workers
+    """
+
+    def __init__(self, redis_client: redis.StrictRedis):
+        self.redis = redis_client
+
+    def publish_heartbeat(self, worker_id: str, slots: int, busy: int, ttl: int = DEFAULT_HEARTBEAT_TTL) -> None:
+        heartbeat = WorkerHeartbeat(workerId=worker_id, slots=slots, busy=busy, heartbeatAt=time())
+        self.redis.set(f"{SIMULATION_WORKER_PREFIX}{worker_id}", json.dumps(heartbeat), ex=ttl)
+
+    def remove_worker(self, worker_id: str) -> None:
+        self.redis.delete(f"{SIMULATION_WORKER_PREFIX}{worker_id}")
+
+    def alive_workers(self) -> List[WorkerHeartbeat]:
+        worker_keys = list(self.redis.scan_iter(match=f"{SIMULATION_WORKER_PREFIX}*"))
+        if not worker_keys:
+            return []
+        return [
+            json.loads(heartbeat)
+            for heartbeat in self.redis.mget(worker_keys)
+            # the key may have expired since it was scanned
+            if heartbeat is not None
+        ]
+
+    def fleet_capacity(self) -> FleetCapacity:
+        workers = self.alive_workers()
+        return FleetCapacity(
+            workers=len(workers),
+            slots=sum(worker['slots'] for worker in workers),
+            busy=sum(worker['busy'] for worker in workers)
+        )
@@ -1,10 +1,14 @@
 from datetime import datetime
+from typing import Optional, List, Tuple
 
 import solai_evolutionary_algorithm.evolve_configurations.sol_metrics as sol_metrics
 import solai_evolutionary_algorithm.evolve_configurations.sol_properties_ranges as properties_ranges
 from solai_evolutionary_algorithm.crossovers.ability_swap_crossover import AbilitySwapCrossover
 from solai_evolutionary_algorithm.evaluation.simulation.constrained_novelty_evaluation import \
     ConstrainedNoveltyEvaluation, InfeasibleObjective
+from solai_evolutionary_algorithm.evaluation.simulation.cached_simulation_backend import CachedSimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import create_simulation_queue
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
 from solai_evolutionary_algorithm.evolution.evolver_config import EvolverConfig
 from solai_evolutionary_algorithm.evolution.fins_evolver import FinsEvolver
 from solai_evolutionary_algorithm.evolution_end_criteria.fixed_generation_end_criteria import \
@@ -13,7 +17,8 @@ from solai_evolutionary_algorithm.initial_population_producers.from_existing_pro
 from solai_evolutionary_algorithm.initial_population_producers.random_bounded_producer import RandomBoundedProducer
 from solai_evolutionary_algorithm.mutations.default_properties_mutation import default_properties_mutation
 from solai_evolutionary_algorithm.plot_services.plot_generations_service import PlotGenerationsLocalService
-from solai_evolutionary_algorithm.utils.character_distance_utils import create_character_distance_func
+from solai_evolutionary_algorithm.utils.character_distance_utils import create_character_distance_func, \
+    create_character_vector_func
 
 
 def config(
@@ -22,7 +27,20 @@ def config(
     initial_population: str = "from_existing",  # "random"
     infeasible_objective: InfeasibleObjective = InfeasibleObjective.NOVELTY,
     feasible_boost: bool = True,
-    simulation_population_count: int = 10
+    simulation_population_count: int = 10,
+    run_scoped_results: bool = False,
+    intern_characters: bool = False,
+    queue_streams: bool = False,
+    queue_endpoints: Optional[List[Tuple[str, int]]] = None,
+    simulation_backend: Optional[SimulationBackend] = None,
+    multi_repeat_simulations: bool = False,
+    simulation_cache_file: Optional[str] = None,
+    speculative_reexecution: bool = False,
+    deduplicate_genomes: bool = False,
+    sequential_feasibility: bool = False,
+    simulation_budget: Optional[int] = None,
+    screening: bool = False,
+    surrogate: bool = False
 ):
     run_label = {
         'population_size': population_size,
@@ -72,6 +90,21 @@ def config(
         projectile_ability_ranges=properties_ranges.projectile_ability_ranges,
     )
 
+    if simulation_backend is None and (speculative_reexecution or simulation_cache_file is not None):
+        # otherwise the evaluation creates the queue from the queue arguments
+        simulation_backend = create_simulation_queue(
+            endpoints=queue_endpoints,
+            streams=queue_streams,
+            host="localhost",
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            speculative_reexecution=speculative_reexecution
+        )
+
+    if simulation_cache_file is not None:
+        # results of earlier runs are reused, so only new genome pairs are simulated
+        simulation_backend = CachedSimulationBackend(simulation_backend, cache_file=simulation_cache_file)
+
     constrained_novelty_config = EvolverConfig(
         tag_object=run_label,
         initial_population_producer=random_population_producer if initial_population == "random"
@@ -86,6 +119,23 @@ def config(
             infeasible_objective=infeasible_objective,
             simulation_population_count=simulation_population_count,
             queue_host="localhost",
+            run_scoped_results=run_scoped_results,
+            intern_characters=intern_characters,
+            queue_streams=queue_streams,
+            queue_endpoints=queue_endpoints,
+            simulation_backend=simulation_backend,
+            multi_repeat_simulations=multi_repeat_simulations,
+            deduplicate_genomes=deduplicate_genomes,
+            sequential_feasibility=sequential_feasibility,
+            simulation_budget=simulation_budget,
+            screening_max_frames=sol_metrics.screening_max_frames if screening else None,
+            screening_metric_ranges=sol_metrics.screening_metric_ranges if screening else None,
+            screening_repeats=sol_metrics.screening_repeats,
+            genome_vector_func=create_character_vector_func(
+                character_properties_ranges=properties_ranges.character_properties_ranges,
+                melee_ability_ranges=properties_ranges.melee_ability_ranges,
+                projectile_ability_ranges=properties_ranges.projectile_ability_ranges,
+            ) if surrogate else None,
         ),
         # population_evolver=DefaultGenerationEvolver(DefaultGenerationEvolver.PassThroughConfig),
         population_evolver=FinsEvolver(FinsEvolver.Config(
@@ -9,4 +9,16 @@ feasibility_metric_ranges = {
     "stageCoverage": (0.2, 1),
     "gameLength": (3600, 7200),
     "leastInteractionType": (0.02, 1)
+}
+
+# frames of the short games screening characters, a quarter of the longest feasible game
+screening_max_frames = 1800
+# games against each opponent, so a single short game does not decide the screen of a noisy metric like characterWon
+screening_repeats = 3
+
+# looser than the feasibility ranges, as short games are noisier. Leaves out the metrics that depend on game length
+screening_metric_ranges = {
+    "characterWon": (0.1, 0.9),
+    "stageCoverage": (0.1, 1),
+    "leastInteractionType": (0.01, 1)
 }
\ No newline at end of file
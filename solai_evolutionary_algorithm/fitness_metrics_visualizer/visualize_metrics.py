@@ -7,6 +7,7 @@ import matplotlib.pyplot as plt
 from solai_evolutionary_algorithm.evaluation.simulation.constrained_novelty_evaluation import \
     ConstrainedNoveltyEvaluation
 from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import CharacterConfig
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import PRIORITY_LOW
 from solai_evolutionary_algorithm.evolve_configurations import constrained_novelty_config
 from solai_evolutionary_algorithm.fitness_metrics_visualizer.simulation_statistics import repeat_simulate_statistics
 from solai_evolutionary_algorithm.initial_population_producers.from_existing_producers import load_char_from_file
@@ -82,6 +83,8 @@ def visualize_metrics(chars: List[CharacterConfig]):
 
     evaluator = cast(ConstrainedNoveltyEvaluation,
                      constrained_novelty_config.constrained_novelty_config.fitness_evaluator)
+    # visualizations should not hold up evolution runs sharing the workers
+    evaluator.simulation_priority = PRIORITY_LOW
 
     chars_by_id = {
         char['characterId']: char
@@ -22,6 +22,46 @@ def create_character_distance_func(
     return distance_func
 
 
+def create_character_vector_func(
+        character_properties_ranges,
+        melee_ability_ranges,
+        projectile_ability_ranges,
+        abilities_count: int = 3
+) -> Callable[[CharacterConfig], List[float]]:
+    """
+    Maps a character to its numeric properties normalized by their ranges, followed by a slot for each of
+    abilities_count abilities, ordered by type like in the distance. A slot holds whether the ability is melee and
+    its normalized numeric properties, and is all zeros if the character has fewer abilities
+    """
+    character_keys = sorted(character_properties_ranges.keys())
+    ability_keys_by_type = {
+        ability_ranges['type']: sorted(key for key, value in ability_ranges.items() if isinstance(value, tuple))
+        for ability_ranges in (melee_ability_ranges, projectile_ability_ranges)
+    }
+    ability_ranges_by_type = {
+        melee_ability_ranges['type']: melee_ability_ranges,
+        projectile_ability_ranges['type']: projectile_ability_ranges
+    }
+    ability_slot_size = 1 + max(len(ability_keys) for ability_keys in ability_keys_by_type.values())
+
+    def character_vector(character) -> List[float]:
+        vector = [
+            normalize(*character_properties_ranges[key], float(character[key]))
+            for key in character_keys
+        ]
+        abilities = sorted(character['abilities'], key=lambda ability: ability['type'])[:abilities_count]
+        for ability in abilities:
+            ability_ranges = ability_ranges_by_type[ability['type']]
+            ability_vector = [float(ability['type'] == melee_ability_ranges['type'])] + [
+                normalize(*ability_ranges[key], float(ability[key]))
+                for key in ability_keys_by_type[ability['type']]
+            ]
+            vector += ability_vector + [0.0] * (ability_slot_size - len(ability_vector))
+        vector += [0.0] * (ability_slot_size * (abilities_count - len(abilities)))
+        return vector
+    return character_vector
+
+
 def normalized_euclidean_distance(
         individual1,
         individual2,
@@ -0,0 +1,56 @@
+import hashlib
+import json
+from typing import Dict, Tuple
+
+# characters are plain config dicts here, as the simulation queue hashes characters before sending them
+CharacterConfig = Dict
+
+# properties that do not affect how a character plays
+NON_GENOME_PROPERTIES = ('characterId', 'name')
+
+
+def character_without_properties(character: CharacterConfig, exclude_properties: Tuple[str, ...]) -> Dict:
+    return {
+        key: value
+        for key, value in character.items()
+        if key not in exclude_properties
+    }
+
+
+def content_hash(content) -> str:
+    """
+    Hash of a json serializable value, equal for equal content regardless of dict key order
+    """
+    canonical_json = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical_json.encode('utf-8')).hexdigest()
+
+
+def character_config_hash(character: CharacterConfig) -> str:
+    """
+    Hash of everything in the character config except the character id
+    """
+    return content_hash(character_without_properties(character, ('characterId',)))
+
+
+def character_genome_hash(character: CharacterConfig) -> str:
+    """
+    Hash of the properties that affect how the character plays, equal for characters only differing by id and name
+    """
+    return content_hash(character_without_properties(character, NON_GENOME_PROPERTIES))
+
+
+def simulation_content_hash(simulation_data: Dict) -> str:
+    """
+    Hash of what decides the outcome of a simulation: the character genomes in order, the metrics, the repeat
+    slot (repeatIndex and repeat) and the fidelity (maxFrames), but not the simulation or character ids
+    """
+    simulation_content = [
+        [character_genome_hash(character) for character in simulation_data['charactersConfigs']],
+        sorted(simulation_data['metrics']),
+        simulation_data.get('repeatIndex', 0),
+        simulation_data.get('repeat', 1)
+    ]
+    # full length simulations keep the hash they had before fidelities existed, so cached results stay valid
+    if 'maxFrames' in simulation_data:
+        simulation_content.append(simulation_data['maxFrames'])
+    return content_hash(simulation_content)
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+import unittest
+from typing import Optional, Set, Dict, List
+from unittest import mock
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from solai_evolutionary_algorithm.evaluation.simulation import simulation_queue
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    SIMULATION_DATA_QUEUES, SIMULATION_RESULT_QUEUE
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class FakeRedisWorkersTestCase(unittest.TestCase):
+    """
+    Runs simulation queues against worker threads on an in-memory redis. The workers answer every simulation with
+    characterWon [1, 0], following the protocol of the game's simulation workers
+    """
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        patcher = mock.patch.object(simulation_queue.redis, "StrictRedis", self.create_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.redis = self.create_redis()
+        self.stop_workers = threading.Event()
+        self.addCleanup(self.stop_workers.set)
+        # simulation ids the workers drop the first time they pop them, like a worker crashing
+        self.dropped_ids: Set[str] = set()
+        # seconds the workers take on the first copy of a simulation
+        self.slow_seconds_by_id: Dict[str, float] = {}
+        # simulation data as popped by the workers
+        self.worked_simulations_data: List[SimulationData] = []
+
+    def create_redis(self, host: str = "localhost", port: int = 6379, **kwargs):
+        return fakeredis.FakeStrictRedis(server=self.server)
+
+    def simulation_result(self, simulation_data: SimulationData, started_at: float) -> SimulationResult:
+        return {
+            'simulationId': simulation_data['simulationId'],
+            'metrics': {'characterWon': [1.0, 0.0]},
+            'startedAt': started_at
+        }
+
+    def start_workers(self, count: int, max_simulations: Optional[int] = None, host: str = "localhost", port: int = 6379):
+        def work():
+            redis_client = self.create_redis(host, port)
+            simulated_count = 0
+            while not self.stop_workers.is_set() and (max_simulations is None or simulated_count < max_simulations):
+                item = redis_client.brpop(SIMULATION_DATA_QUEUES, timeout=1)
+                if item is None:
+                    continue
+                simulated_count += 1
+                simulation_data = json.loads(item[1])
+                self.worked_simulations_data.append(simulation_data)
+                simulation_id = simulation_data['simulationId']
+                if simulation_id in self.dropped_ids:
+                    self.dropped_ids.remove(simulation_id)
+                    continue
+                started_at = time.time()
+                time.sleep(self.slow_seconds_by_id.pop(simulation_id, 0.01))
+                redis_client.rpush(
+                    simulation_data.get('replyTo', SIMULATION_RESULT_QUEUE),
+                    json.dumps(self.simulation_result(simulation_data, started_at)))
+
+        for _ in range(count):
+            threading.Thread(target=work, daemon=True).start()
+
+    def simulations_data(self, queue: SimulationQueue, count: int) -> List[SimulationData]:
+        return [
+            {
+                'simulationId': queue.create_simulation_id(),
+                'charactersConfigs': [{'characterId': str(i)}, {'characterId': "opponent"}],
+                'metrics': ["characterWon"]
+            }
+            for i in range(count)
+        ]
+
+    def simulate(self, queue: SimulationQueue, simulations_data: List[SimulationData], timeout: float = 20):
+        """
+        All results, failing instead of hanging if they do not arrive within timeout seconds
+        """
+        results = []
+        reader = threading.Thread(
+            target=lambda: results.extend(queue.iter_simulations_results(simulations_data)), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        self.assertFalse(reader.is_alive(), f"got {len(results)} of {len(simulations_data)} results in {timeout}s")
+        return results
+
+    def wait_worked(self, count: int, timeout: float = 10) -> None:
+        deadline = time.time() + timeout
+        while len(self.worked_simulations_data) < count:
+            self.assertLess(time.time(), deadline, f"workers got {len(self.worked_simulations_data)} of {count}")
+            time.sleep(0.01)
+
+    def data_queue_depth(self) -> int:
+        return sum(self.redis.llen(data_queue) for data_queue in SIMULATION_DATA_QUEUES)
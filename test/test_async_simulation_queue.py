@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+
+import redis
+
+from solai_evolutionary_algorithm.evaluation.simulation.async_simulation_queue import AsyncSimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue
+
+
+class AsyncSimulationQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        # redis is never reached, pushing is skipped and reading results fails like an unreachable redis
+        self.simulation_queue = SimulationQueue(host="localhost")
+        self.simulation_queue.push_simulations_data = lambda simulations_data: None
+        self.read_attempts = 0
+
+        def get_simulation_results_blocking(max_count=None, timeout=10):
+            self.read_attempts += 1
+            raise redis.exceptions.ConnectionError("Connection refused")
+        self.simulation_queue.get_simulation_results_blocking = get_simulation_results_blocking
+
+    def simulations_data(self, count: int):
+        return [
+            {
+                'simulationId': self.simulation_queue.create_simulation_id(),
+                'charactersConfigs': [{'characterId': str(i)}, {'characterId': "opponent"}],
+                'metrics': ["characterWon"]
+            }
+            for i in range(count)
+        ]
+
+    def test_reader_failure_fails_pending_simulations(self):
+        async def simulate_twice():
+            async_simulation_queue = AsyncSimulationQueue(self.simulation_queue)
+            for _ in range(2):
+                with self.assertRaises(redis.exceptions.ConnectionError):
+                    await asyncio.wait_for(
+                        async_simulation_queue.push_simulations_data_wait_results(self.simulations_data(3)), timeout=5)
+                self.assertEqual(async_simulation_queue.pending_count(), 0)
+
+        asyncio.run(simulate_twice())
+        # the second submission started a new reader
+        self.assertEqual(self.read_attempts, 2)
+
+    def test_reader_failure_fails_coalesced_simulations(self):
+        self.simulation_queue.coalesce_simulations = True
+
+        async def simulate():
+            async_simulation_queue = AsyncSimulationQueue(self.simulation_queue)
+            simulations_data = self.simulations_data(1) * 2
+            simulations_data[1] = {**simulations_data[1], 'simulationId': "coalesced"}
+            with self.assertRaises(redis.exceptions.ConnectionError):
+                await asyncio.wait_for(
+                    async_simulation_queue.push_simulations_data_wait_results(simulations_data), timeout=5)
+
+        asyncio.run(simulate())
@@ -0,0 +1,37 @@
+import json
+from unittest import mock
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    SIMULATION_DATA_QUEUE
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class BulkSubmissionTest(FakeRedisWorkersTestCase):
+
+    def test_chunked_push_keeps_push_order(self):
+        queue = SimulationQueue(run_scoped_results=True, chunk_size=3)
+        simulations_data = self.simulations_data(queue, 7)
+        with mock.patch.object(queue.redis, "lpush", wraps=queue.redis.lpush) as lpush:
+            queue.push_simulations_data(simulations_data)
+
+        # one round trip per chunk
+        self.assertEqual([len(call[0]) - 1 for call in lpush.call_args_list], [3, 3, 1])
+        # workers pop from the tail, so the first pushed simulation is simulated first
+        popped_ids = [
+            json.loads(self.redis.rpop(SIMULATION_DATA_QUEUE))['simulationId']
+            for _ in simulations_data
+        ]
+        self.assertEqual(popped_ids, [simulation_data['simulationId'] for simulation_data in simulations_data])
+
+    def test_results_are_drained_in_one_call(self):
+        queue = SimulationQueue(run_scoped_results=True)
+        for i in range(5):
+            self.redis.rpush(queue.result_queue, json.dumps({'simulationId': str(i), 'metrics': {}}))
+
+        simulation_results = queue.get_simulation_results_blocking(max_count=4, timeout=1)
+
+        self.assertEqual([simulation_result['simulationId'] for simulation_result in simulation_results],
+                         ["0", "1", "2", "3"])
+        self.assertEqual(self.redis.llen(queue.result_queue), 1)
+        self.assertEqual(queue.get_simulation_results_blocking(max_count=4, timeout=1)[0]['simulationId'], "4")
+        self.assertEqual(queue.get_simulation_results_blocking(timeout=1), [])
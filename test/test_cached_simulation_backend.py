@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.cached_simulation_backend import CachedSimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.synthetic_simulation_backend import \
+    SyntheticSimulationBackend
+from solai_evolutionary_algorithm.initial_population_producers.from_existing_producers import load_char_from_file
+
+
+class CachedSimulationBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.characters_configs = [
+            load_char_from_file(f"existing_characters/{char_filename}")
+            for char_filename in ["shrankConfig.json", "brailConfig.json"]
+        ]
+        cache_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_directory.cleanup)
+        self.cache_file = os.path.join(cache_directory.name, "simulation_cache.sqlite")
+
+    def simulate(self, backend: CachedSimulationBackend, character_id: str, repeats: int):
+        return backend.push_simulations_data_wait_results([
+            {
+                'simulationId': backend.create_simulation_id(),
+                'charactersConfigs': [
+                    {**character_config, 'characterId': f"{character_id}{i}"}
+                    for i, character_config in enumerate(self.characters_configs)
+                ],
+                'metrics': ["characterWon", "gameLength"],
+                'repeatIndex': repeat_index
+            }
+            for repeat_index in range(repeats)
+        ])
+
+    def test_same_genomes_are_served_from_cache(self):
+        backend = CachedSimulationBackend(SyntheticSimulationBackend())
+        first_results = self.simulate(backend, "a", 3)
+        cached_results = self.simulate(backend, "b", 3)
+        self.assertEqual(backend.hit_rate(), 0.5)
+        self.assertEqual(
+            [result['metrics'] for result in first_results],
+            [result['metrics'] for result in cached_results]
+        )
+        self.assertEqual(cached_results[0]['simulationData']['charactersConfigs'][0]['characterId'], "b0")
+
+    def test_results_are_reused_across_runs(self):
+        first_backend = CachedSimulationBackend(SyntheticSimulationBackend(), cache_file=self.cache_file)
+        first_results = self.simulate(first_backend, "a", 3)
+        first_backend.close()
+
+        second_backend = CachedSimulationBackend(SyntheticSimulationBackend(seed=1), cache_file=self.cache_file)
+        second_results = self.simulate(second_backend, "b", 4)
+        second_backend.close()
+        self.assertEqual(second_backend.hits, 3)
+        self.assertEqual(
+            [result['metrics'] for result in first_results],
+            [result['metrics'] for result in second_results[:3]]
+        )
+
+    def test_empty_batch(self):
+        backend = CachedSimulationBackend(SyntheticSimulationBackend())
+        self.assertEqual(backend.push_simulations_data_wait_results([]), [])
+        self.assertIsNone(backend.hit_rate())
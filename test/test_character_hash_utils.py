@@ -0,0 +1,37 @@
+import unittest
+
+from solai_evolutionary_algorithm.utils.character_hash_utils import simulation_content_hash
+
+
+def simulation_data(simulation_id: str, character_id: str, repeat_index: int):
+    return {
+        'simulationId': simulation_id,
+        'charactersConfigs': [
+            {'characterId': character_id, 'name': character_id, 'radius': 32},
+            {'characterId': "opponent", 'name': "opponent", 'radius': 40}
+        ],
+        'metrics': ["characterWon", "gameLength"],
+        'repeatIndex': repeat_index
+    }
+
+
+class SimulationContentHashTest(unittest.TestCase):
+
+    def test_ids_and_names_do_not_change_the_hash(self):
+        self.assertEqual(
+            simulation_content_hash(simulation_data("1", "a", 0)),
+            simulation_content_hash(simulation_data("2", "b", 0))
+        )
+
+    def test_repeats_have_different_hashes(self):
+        self.assertNotEqual(
+            simulation_content_hash(simulation_data("1", "a", 0)),
+            simulation_content_hash(simulation_data("1", "a", 1))
+        )
+
+    def test_fidelities_have_different_hashes(self):
+        full_length_simulation_data = simulation_data("1", "a", 0)
+        self.assertNotEqual(
+            simulation_content_hash(full_length_simulation_data),
+            simulation_content_hash({**full_length_simulation_data, 'maxFrames': 1800})
+        )
@@ -0,0 +1,51 @@
+import json
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    SIMULATION_CHARACTERS_HASH, SIMULATION_DATA_QUEUE
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class CharacterInterningTest(FakeRedisWorkersTestCase):
+
+    def simulations_data(self, queue: SimulationQueue, count: int):
+        return [
+            {
+                'simulationId': queue.create_simulation_id(),
+                'charactersConfigs': [
+                    {'characterId': f"individual{i}", 'radius': 32},
+                    {'characterId': "opponent", 'radius': 40}
+                ],
+                'metrics': ["characterWon"]
+            }
+            for i in range(count)
+        ]
+
+    def test_characters_are_sent_once_per_run(self):
+        queue = SimulationQueue(intern_characters=True, interned_characters_ttl=60)
+        queue.push_simulations_data(self.simulations_data(queue, 3))
+
+        pushed_simulations_data = [json.loads(item) for item in self.redis.lrange(SIMULATION_DATA_QUEUE, 0, -1)]
+        self.assertTrue(all('charactersConfigs' not in simulation_data for simulation_data in pushed_simulations_data))
+        simulation_data = pushed_simulations_data[0]
+        self.assertEqual(simulation_data['charactersHash'], f"{SIMULATION_CHARACTERS_HASH}:{queue.run_id}")
+        # both individuals have the same genome, so a single config is stored for them, and one for the opponent
+        self.assertEqual(self.redis.hlen(simulation_data['charactersHash']), 2)
+        self.assertEqual(
+            [json.loads(self.redis.hget(simulation_data['charactersHash'], character_ref))
+             for character_ref in simulation_data['charactersRefs']],
+            [{'radius': 32}, {'radius': 40}])
+        self.assertEqual(
+            sorted(simulation_data['charactersId'] for simulation_data in pushed_simulations_data),
+            [["individual0", "opponent"], ["individual1", "opponent"], ["individual2", "opponent"]])
+        self.assertGreater(self.redis.ttl(simulation_data['charactersHash']), 0)
+
+    def test_runs_intern_into_their_own_expiring_hash(self):
+        queue = SimulationQueue(intern_characters=True)
+        other_queue = SimulationQueue(intern_characters=True, interned_characters_ttl=1)
+        queue.push_simulations_data(self.simulations_data(queue, 1))
+        other_queue.push_simulations_data(self.simulations_data(other_queue, 1))
+
+        self.assertFalse(self.redis.exists(SIMULATION_CHARACTERS_HASH))
+        self.assertNotEqual(queue.interned_characters_hash, other_queue.interned_characters_hash)
+        self.assertEqual(self.redis.hlen(queue.interned_characters_hash), 2)
+        self.assertLessEqual(self.redis.ttl(other_queue.interned_characters_hash), 1)
@@ -0,0 +1,34 @@
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_fitness_evaluation import \
+    unique_genomes_population, project_results_onto_duplicates
+
+
+class GenomeDeduplicationTest(unittest.TestCase):
+
+    def test_results_are_projected_onto_duplicates(self):
+        population = [
+            {'characterId': "a", 'name': "a", 'radius': 32},
+            {'characterId': "b", 'name': "b", 'radius': 40},
+            {'characterId': "c", 'name': "c", 'radius': 32},
+        ]
+        opponent = {'characterId': "opponent", 'name': "opponent", 'radius': 32}
+        unique_population, duplicates_by_character_id = unique_genomes_population(population)
+        self.assertEqual([individual['characterId'] for individual in unique_population], ["a", "b"])
+
+        simulations_results = [
+            {
+                'simulationId': individual['characterId'],
+                'metrics': {'characterWon': [1.0, 0.0]},
+                'simulationData': {'simulationId': individual['characterId'], 'charactersConfigs': [individual, opponent]}
+            }
+            for individual in unique_population
+        ]
+        projected_results = list(project_results_onto_duplicates(simulations_results, duplicates_by_character_id))
+        self.assertEqual(
+            [
+                [character['characterId'] for character in result['simulationData']['charactersConfigs']]
+                for result in projected_results
+            ],
+            [["a", "opponent"], ["c", "opponent"], ["b", "opponent"]]
+        )
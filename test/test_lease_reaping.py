@@ -0,0 +1,47 @@
+import json
+import threading
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    SIMULATION_DATA_QUEUE, SIMULATION_PROCESSING_QUEUE
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class LeaseReapingTest(FakeRedisWorkersTestCase):
+
+    def test_expired_leases_are_requeued(self):
+        queue = SimulationQueue(run_scoped_results=True, reliable=True, lease_timeout=0)
+        simulations_data = self.simulations_data(queue, 2)
+        queue.push_simulations_data(simulations_data)
+        leased_item = self.redis.rpoplpush(SIMULATION_DATA_QUEUE, SIMULATION_PROCESSING_QUEUE)
+        other_run_item = json.dumps({'simulationId': "other-run"})
+        self.redis.lpush(SIMULATION_PROCESSING_QUEUE, other_run_item)
+        remaining_simulation_data_by_id = {
+            simulation_data['simulationId']: simulation_data
+            for simulation_data in simulations_data
+        }
+        lease_deadline_by_id = {}
+
+        # the first scan starts the lease, the second finds it expired
+        self.assertEqual(queue.requeue_expired_leases(remaining_simulation_data_by_id, lease_deadline_by_id), 0)
+        self.assertEqual(queue.requeue_expired_leases(remaining_simulation_data_by_id, lease_deadline_by_id), 1)
+
+        self.assertEqual(self.redis.lrange(SIMULATION_PROCESSING_QUEUE, 0, -1), [other_run_item.encode()])
+        self.assertEqual(self.redis.llen(SIMULATION_DATA_QUEUE), 2)
+        self.assertEqual(self.redis.lindex(SIMULATION_DATA_QUEUE, 0), leased_item)
+        self.assertEqual(lease_deadline_by_id, {})
+
+    def test_simulation_of_crashed_worker_is_simulated_again(self):
+        queue = SimulationQueue(run_scoped_results=True, reliable=True, lease_timeout=0.5, reap_interval=0.2)
+        simulations_data = self.simulations_data(queue, 1)
+
+        def crashing_worker():
+            # leases the simulation, then dies without replying
+            self.create_redis().brpoplpush(SIMULATION_DATA_QUEUE, SIMULATION_PROCESSING_QUEUE, timeout=5)
+            self.start_workers(1)
+        threading.Thread(target=crashing_worker, daemon=True).start()
+
+        simulation_results = self.simulate(queue, simulations_data)
+
+        self.assertEqual([simulation_result['simulationId'] for simulation_result in simulation_results],
+                         [simulations_data[0]['simulationId']])
+        self.assertEqual(self.redis.llen(SIMULATION_PROCESSING_QUEUE), 0)
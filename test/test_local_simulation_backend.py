@@ -0,0 +1,40 @@
+import sys
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.local_simulation_backend import LocalSimulationBackend
+
+ECHO_SIMULATOR_SCRIPT = """
+import json, sys
+for line in sys.stdin:
+    simulation_data = json.loads(line)
+    print(json.dumps({'simulationId': simulation_data['simulationId'], 'metrics': {'gameLength': [1, 1]}}), flush=True)
+"""
+
+
+def echo_simulator(simulation_data):
+    return {'simulationId': simulation_data['simulationId'], 'metrics': {'gameLength': [1, 1]}}
+
+
+class LocalSimulationBackendTest(unittest.TestCase):
+
+    def assert_one_result_per_simulation(self, backend: LocalSimulationBackend):
+        simulations_data = [
+            {'simulationId': backend.create_simulation_id(), 'charactersConfigs': [], 'metrics': ["gameLength"]}
+            for _ in range(10)
+        ]
+        simulation_results = backend.push_simulations_data_wait_results(simulations_data)
+        backend.close()
+
+        self.assertEqual(
+            sorted(simulation_data['simulationId'] for simulation_data in simulations_data),
+            sorted(simulation_result['simulationId'] for simulation_result in simulation_results)
+        )
+        for simulation_result in simulation_results:
+            self.assertEqual(simulation_result['simulationId'], simulation_result['simulationData']['simulationId'])
+
+    def test_simulator_function(self):
+        self.assert_one_result_per_simulation(LocalSimulationBackend(simulator=echo_simulator, max_workers=2))
+
+    def test_simulator_command(self):
+        self.assert_one_result_per_simulation(
+            LocalSimulationBackend(command=[sys.executable, "-c", ECHO_SIMULATOR_SCRIPT], max_workers=2))
@@ -0,0 +1,89 @@
+import unittest
+from typing import List, Iterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.from_existing_simulation_fitness_evaluation import \
+    FromExistingSimulationFitnessEvaluation
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_fitness_evaluation import \
+    simulation_result_to_simulations_measurements
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+from test.test_racing import FixedOutcomeBackend
+
+
+class RepeatingBackend(FixedOutcomeBackend):
+    """
+    Simulates a multi repeat simulation as its repeats, answering with the metrics of each repeat in repeatMetrics
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.simulations_data: List[SimulationData] = []
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        self.simulations_data += simulations_data
+        for simulation_data in simulations_data:
+            if 'repeat' not in simulation_data:
+                yield from super().iter_simulations_results([simulation_data])
+                continue
+            repeat_metrics = [
+                repeat_result['metrics']
+                for repeat_result in super().iter_simulations_results([
+                    {**simulation_data, 'repeatIndex': repeat_index}
+                    for repeat_index in range(simulation_data['repeat'])
+                ])
+            ]
+            yield SimulationResult(
+                simulationId=simulation_data['simulationId'],
+                simulationData=simulation_data,
+                metrics=repeat_metrics[0],
+                repeatMetrics=repeat_metrics
+            )
+
+
+class MultiRepeatSimulationsTest(unittest.TestCase):
+
+    def evaluate(self, multi_repeat_simulations: bool):
+        backend = RepeatingBackend()
+        evaluator = FromExistingSimulationFitnessEvaluation(
+            simulation_characters=[{'characterId': "opponent"}],
+            metrics=["characterWon"],
+            desired_values={'characterWon': 1.0},
+            metrics_weights={'characterWon': 1.0},
+            simulation_population_count=4,
+            simulation_backend=backend,
+            multi_repeat_simulations=multi_repeat_simulations
+        )
+        population = [{'characterId': character_id} for character_id in ["strong", "close", "weak"]]
+        evaluated_population = evaluator(population)
+        fitness_by_character_id = {
+            evaluated_individual['individual']['characterId']: evaluated_individual['fitness']
+            for evaluated_individual in evaluated_population
+        }
+        return fitness_by_character_id, backend.simulations_data
+
+    def test_one_message_per_character_pair(self):
+        fitness_by_character_id, simulations_data = self.evaluate(multi_repeat_simulations=True)
+        repeated_fitness_by_character_id, repeated_simulations_data = self.evaluate(multi_repeat_simulations=False)
+
+        self.assertEqual(len(simulations_data), 3)
+        self.assertTrue(all(simulation_data['repeat'] == 4 for simulation_data in simulations_data))
+        self.assertEqual(len(repeated_simulations_data), 12)
+        self.assertEqual(fitness_by_character_id, repeated_fitness_by_character_id)
+
+    def test_repeat_metrics_become_measurements_of_each_repeat(self):
+        simulation_result = SimulationResult(
+            simulationId="0",
+            simulationData={
+                'simulationId': "0",
+                'charactersConfigs': [{'characterId': "a"}, {'characterId': "b"}],
+                'metrics': ["characterWon"],
+                'repeat': 3
+            },
+            metrics={'characterWon': [1.0, 0.0]},
+            repeatMetrics=[{'characterWon': [1.0, 0.0]}, {'characterWon': [0.0, 1.0]}, {'characterWon': [0.0, 1.0]}]
+        )
+
+        simulations_measurements = simulation_result_to_simulations_measurements(simulation_result)
+
+        self.assertEqual([measurements['metrics'] for measurements in simulations_measurements],
+                         simulation_result['repeatMetrics'])
+        self.assertTrue(all(measurements['charactersId'] == ["a", "b"] for measurements in simulations_measurements))
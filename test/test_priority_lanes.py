@@ -0,0 +1,42 @@
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    SIMULATION_DATA_QUEUE, SIMULATION_DATA_QUEUE_HIGH, SIMULATION_DATA_QUEUE_LOW
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import PRIORITY_HIGH, PRIORITY_LOW, \
+    PRIORITY_NORMAL
+from solai_evolutionary_algorithm.evaluation.simulation.stream_simulation_queue import StreamSimulationQueue
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class PriorityLanesTest(FakeRedisWorkersTestCase):
+
+    def prioritized_simulations_data(self, queue: SimulationQueue):
+        simulations_data = self.simulations_data(queue, 3)
+        for simulation_data, priority in zip(simulations_data, [PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH]):
+            simulation_data['priority'] = priority
+        return simulations_data
+
+    def test_simulations_are_pushed_to_the_lane_of_their_priority(self):
+        queue = SimulationQueue()
+        queue.push_simulations_data(self.prioritized_simulations_data(queue))
+        self.assertEqual(
+            [self.redis.llen(data_queue)
+             for data_queue in [SIMULATION_DATA_QUEUE_HIGH, SIMULATION_DATA_QUEUE, SIMULATION_DATA_QUEUE_LOW]],
+            [1, 1, 1])
+
+    def test_high_priority_simulations_are_simulated_first(self):
+        queue = SimulationQueue()
+        simulations_data = self.prioritized_simulations_data(queue)
+        queue.push_simulations_data(simulations_data)
+        self.start_workers(1)
+        self.wait_worked(3)
+        self.assertEqual(
+            [simulation_data['priority'] for simulation_data in self.worked_simulations_data],
+            [PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW])
+
+    def test_reliable_and_stream_queues_reject_priorities(self):
+        for queue in [SimulationQueue(reliable=True), StreamSimulationQueue(run_scoped_results=True)]:
+            simulations_data = self.prioritized_simulations_data(queue)
+            with self.assertRaises(ValueError):
+                queue.push_simulations_data(simulations_data)
+            with self.assertRaises(ValueError):
+                queue.push_simulation_data(simulations_data[0])
+            queue.push_simulations_data(simulations_data[1:2])
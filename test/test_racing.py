@@ -0,0 +1,61 @@
+import unittest
+from collections import Counter
+from itertools import count
+from typing import List, Iterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.from_existing_simulation_fitness_evaluation import \
+    FromExistingSimulationFitnessEvaluation
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+
+
+class FixedOutcomeBackend(SimulationBackend):
+    """
+    "strong" always wins, "weak" always loses, the others win every other repeat
+    """
+
+    def __init__(self):
+        self.__simulation_id_counter = count()
+
+    def create_simulation_id(self) -> str:
+        return str(next(self.__simulation_id_counter))
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        for simulation_data in simulations_data:
+            character_id = simulation_data['charactersConfigs'][0]['characterId']
+            if character_id == "strong":
+                won = 1.0
+            elif character_id == "weak":
+                won = 0.0
+            else:
+                won = float(simulation_data['repeatIndex'] % 2)
+            yield SimulationResult(
+                simulationId=simulation_data['simulationId'],
+                simulationData=simulation_data,
+                metrics={'characterWon': [won, 1.0 - won]}
+            )
+
+
+class RacingTest(unittest.TestCase):
+
+    def test_separated_individuals_stop_receiving_games(self):
+        evaluator = FromExistingSimulationFitnessEvaluation(
+            simulation_characters=[{'characterId': "opponent"}],
+            metrics=["characterWon"],
+            desired_values={'characterWon': 1.0},
+            metrics_weights={'characterWon': 1.0},
+            simulation_population_count=2,
+            simulation_backend=FixedOutcomeBackend(),
+            simulation_budget=20
+        )
+        population = [{'characterId': character_id} for character_id in ["strong", "close_a", "close_b", "weak"]]
+        simulations_results = list(evaluator.race_simulate_population(population, FixedOutcomeBackend()))
+
+        games_by_character_id = Counter(
+            simulation_result['simulationData']['charactersConfigs'][0]['characterId']
+            for simulation_result in simulations_results
+        )
+        self.assertEqual(games_by_character_id['strong'], evaluator.racing_initial_repeats)
+        self.assertEqual(games_by_character_id['weak'], evaluator.racing_initial_repeats)
+        self.assertEqual(games_by_character_id['close_a'], 8)
+        self.assertEqual(games_by_character_id['close_b'], 8)
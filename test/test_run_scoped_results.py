@@ -0,0 +1,36 @@
+import time
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue, \
+    RUN_RESULT_QUEUE_OWNER_PREFIX
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class RunScopedResultsTest(FakeRedisWorkersTestCase):
+
+    def test_results_are_routed_to_the_run_result_queue(self):
+        queue = SimulationQueue(run_scoped_results=True)
+        other_queue = SimulationQueue(run_scoped_results=True)
+        self.start_workers(1)
+        simulations_data = self.simulations_data(queue, 3)
+        results = self.simulate(queue, simulations_data)
+
+        self.assertEqual(
+            {simulation_result['simulationId'] for simulation_result in results},
+            {simulation_data['simulationId'] for simulation_data in simulations_data})
+        self.assertEqual(
+            {simulation_data['replyTo'] for simulation_data in self.worked_simulations_data}, {queue.result_queue})
+        self.assertNotEqual(queue.result_queue, other_queue.result_queue)
+
+    def test_owner_key_outlives_gaps_between_batches(self):
+        queue = SimulationQueue(run_scoped_results=True, result_queue_ttl=2)
+        self.start_workers(1)
+        owner_key = f"{RUN_RESULT_QUEUE_OWNER_PREFIX}{queue.run_id}"
+        for _ in range(3):
+            time.sleep(1)
+            self.simulate(queue, self.simulations_data(queue, 1))
+            self.assertTrue(self.redis.exists(owner_key))
+
+        # a result left in the queue while the run is between batches is kept by other runs starting
+        self.redis.rpush(queue.result_queue, b"{}")
+        SimulationQueue(run_scoped_results=True)
+        self.assertTrue(self.redis.exists(queue.result_queue))
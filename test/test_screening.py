@@ -0,0 +1,75 @@
+import unittest
+from itertools import count
+from typing import List, Iterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.from_existing_simulation_fitness_evaluation import \
+    FromExistingSimulationFitnessEvaluation
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_backend import SimulationBackend
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_fitness_evaluation import SCREENED_OUT_FITNESS
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult
+
+
+class ShortGameBackend(SimulationBackend):
+    """
+    "dominant" wins every short game but loses every full length game, the others win every other repeat
+    """
+
+    def __init__(self):
+        self.__simulation_id_counter = count()
+        self.simulations_data: List[SimulationData] = []
+
+    def create_simulation_id(self) -> str:
+        return str(next(self.__simulation_id_counter))
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        for simulation_data in simulations_data:
+            self.simulations_data.append(simulation_data)
+            if simulation_data['charactersConfigs'][0]['characterId'].startswith("dominant"):
+                won = 1.0 if 'maxFrames' in simulation_data else 0.0
+            else:
+                won = float(simulation_data['repeatIndex'] % 2)
+            yield SimulationResult(
+                simulationId=simulation_data['simulationId'],
+                simulationData=simulation_data,
+                metrics={'characterWon': [won, 1.0 - won]}
+            )
+
+
+class ScreeningTest(unittest.TestCase):
+
+    def test_screened_out_individuals_are_rejected(self):
+        backend = ShortGameBackend()
+        evaluator = FromExistingSimulationFitnessEvaluation(
+            simulation_characters=[{'characterId': "opponent"}],
+            metrics=["characterWon"],
+            desired_values={'characterWon': 1.0},
+            metrics_weights={'characterWon': 1.0},
+            simulation_population_count=2,
+            simulation_backend=backend,
+            deduplicate_genomes=True,
+            screening_max_frames=1800,
+            screening_metric_ranges={'characterWon': (0.1, 0.9)},
+            screening_repeats=2
+        )
+        population = [
+            {'characterId': "dominant", 'radius': 40},
+            {'characterId': "dominant_copy", 'radius': 40},
+            {'characterId': "even", 'radius': 32}
+        ]
+        fitness_by_character_id = {
+            evaluated_individual['individual']['characterId']: evaluated_individual['fitness'][0]
+            for evaluated_individual in evaluator(population)
+        }
+
+        self.assertEqual(fitness_by_character_id, {
+            'dominant': SCREENED_OUT_FITNESS,
+            'dominant_copy': SCREENED_OUT_FITNESS,
+            'even': 0.5
+        })
+        self.assertEqual(evaluator.screened_out_character_ids, {"dominant", "dominant_copy"})
+        full_length_character_ids = {
+            simulation_data['charactersConfigs'][0]['characterId']
+            for simulation_data in backend.simulations_data
+            if 'maxFrames' not in simulation_data
+        }
+        self.assertEqual(full_length_character_ids, {"even"})
@@ -0,0 +1,56 @@
+import unittest
+from collections import Counter
+
+from solai_evolutionary_algorithm.evaluation.simulation.constrained_novelty_evaluation import \
+    ConstrainedNoveltyEvaluation, InfeasibleObjective
+from test.test_racing import FixedOutcomeBackend
+
+
+class SequentialFeasibilityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FixedOutcomeBackend()
+        self.evaluator = ConstrainedNoveltyEvaluation(
+            metrics=["characterWon"],
+            simulation_characters=[{'characterId': "opponent"}, {'characterId': "other_opponent"}],
+            feasible_metric_ranges={'characterWon': (0.3, 0.7)},
+            distance_func=lambda individual, other_individual: 0.0,
+            consider_closest_count=1,
+            insert_most_novel_count=1,
+            infeasible_objective=InfeasibleObjective.FEASIBILITY,
+            simulation_backend=self.backend,
+            simulation_population_count=6,
+            sequential_feasibility=True,
+            sequential_round_repeats=2
+        )
+
+    def test_decided_individuals_stop_being_simulated(self):
+        # strong and weak always win or lose, so are decided infeasible after the first round,
+        # close wins every other game, and its mean stays uncertain
+        population = [{'characterId': character_id} for character_id in ["strong", "close", "weak"]]
+        simulations_results = list(self.evaluator.sequential_simulate_population(population, self.backend))
+
+        games_by_character_id = Counter(
+            simulation_result['simulationData']['charactersConfigs'][0]['characterId']
+            for simulation_result in simulations_results
+        )
+        self.assertEqual(games_by_character_id, {'strong': 4, 'weak': 4, 'close': 12})
+        self.assertEqual(self.evaluator.sequential_summaries[-1], {
+            'rounds': 3,
+            'simulations': 20,
+            'maxSimulations': 36,
+            'savedSimulations': 16,
+            'decidedEarly': 2
+        })
+
+    def test_max_simulations_are_respected(self):
+        self.evaluator.simulation_population_count = 5
+        population = [{'characterId': "close"}]
+        simulations_results = list(self.evaluator.sequential_simulate_population(population, self.backend))
+
+        # rounds of 2, 2 and the single remaining repeat against each opponent
+        self.assertEqual(len(simulations_results), 10)
+        self.assertEqual(
+            sorted(simulation_result['simulationData']['repeatIndex'] for simulation_result in simulations_results),
+            [0, 0, 1, 1, 2, 2, 3, 3, 4, 4])
+        self.assertEqual(self.evaluator.sequential_summaries[-1]['savedSimulations'], 0)
@@ -0,0 +1,59 @@
+import json
+import zlib
+from typing import Dict, Tuple
+
+from solai_evolutionary_algorithm.evaluation.simulation.sharded_simulation_queue import ShardedSimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SIMULATION_DATA_QUEUE
+from test.fake_redis_workers import FakeRedisWorkersTestCase, fakeredis
+
+ENDPOINTS = [("redis-0", 6379), ("redis-1", 6379), ("redis-1", 6380)]
+
+
+class ShardedSimulationQueueTest(FakeRedisWorkersTestCase):
+
+    def setUp(self):
+        # a separate redis instance for each endpoint
+        self.servers_by_endpoint: Dict[Tuple[str, int], fakeredis.FakeServer] = {}
+        super().setUp()
+
+    def create_redis(self, host: str = "localhost", port: int = 6379, **kwargs):
+        server = self.servers_by_endpoint.setdefault((host, port), fakeredis.FakeServer())
+        return fakeredis.FakeStrictRedis(server=server)
+
+    def test_shard_index_is_crc32_of_simulation_id(self):
+        queue = ShardedSimulationQueue(ENDPOINTS, run_scoped_results=True)
+
+        self.assertEqual(queue.shard_index("simulation-1"), zlib.crc32(b"simulation-1") % 3)
+        self.assertEqual(
+            queue.shard_index("simulation-1"),
+            ShardedSimulationQueue(ENDPOINTS, run_scoped_results=True).shard_index("simulation-1"))
+
+    def test_simulations_are_pushed_to_their_shard(self):
+        queue = ShardedSimulationQueue(ENDPOINTS, run_scoped_results=True)
+        simulations_data = self.simulations_data(queue, 30)
+
+        queue.push_simulations_data(simulations_data)
+
+        for shard_index, (host, port) in enumerate(ENDPOINTS):
+            shard_ids = {
+                json.loads(item)['simulationId']
+                for item in self.create_redis(host, port).lrange(SIMULATION_DATA_QUEUE, 0, -1)
+            }
+            self.assertTrue(shard_ids)
+            self.assertEqual(shard_ids, {
+                simulation_data['simulationId']
+                for simulation_data in simulations_data
+                if queue.shard_index(simulation_data['simulationId']) == shard_index
+            })
+
+    def test_results_are_read_from_all_shards(self):
+        queue = ShardedSimulationQueue(ENDPOINTS, run_scoped_results=True)
+        for host, port in ENDPOINTS:
+            self.start_workers(1, host=host, port=port)
+        simulations_data = self.simulations_data(queue, 30)
+
+        simulation_results = self.simulate(queue, simulations_data)
+
+        self.assertEqual(
+            sorted(simulation_result['simulationId'] for simulation_result in simulation_results),
+            sorted(simulation_data['simulationId'] for simulation_data in simulations_data))
@@ -0,0 +1,25 @@
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_codec import JsonCodec, MsgpackCodec, \
+    decode_message, msgpack
+
+simulation_data = {
+    'simulationId': "42",
+    'charactersConfigs': [{'characterId': "a", 'radius': 32.5}, {'characterId': "b", 'radius': 20}],
+    'metrics': ["characterWon", "gameLength"]
+}
+
+
+class SimulationCodecTest(unittest.TestCase):
+
+    def test_json_codec_is_plain_json(self):
+        encoded = JsonCodec().encode(simulation_data)
+        self.assertTrue(encoded.startswith(b"{"))
+        self.assertEqual(simulation_data, decode_message(encoded))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_codec_round_trip(self):
+        for codec in [MsgpackCodec(), MsgpackCodec(compress=True)]:
+            encoded = codec.encode(simulation_data)
+            self.assertEqual(simulation_data, decode_message(encoded))
+            self.assertEqual(simulation_data, JsonCodec().decode(encoded))
@@ -1,9 +1,32 @@
 import unittest
 from typing import List
 
-from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import CharacterConfig
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_fitness_evaluation import \
+    CharactersMeasurementsAccumulator
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import CharacterConfig, SimulationResult
 from solai_evolutionary_algorithm.initial_population_producers.from_existing_producers import FromExistingProducer
 
 
+def simulation_result(simulation_id: str, characters_id: List[str], metrics) -> SimulationResult:
+    return SimulationResult(
+        simulationId=simulation_id,
+        simulationData={
+            'simulationId': simulation_id,
+            'charactersConfigs': [{'characterId': character_id} for character_id in characters_id],
+            'metrics': list(metrics.keys())
+        },
+        metrics=metrics
+    )
+
+
 class SimulationMeasurementsToFitness(unittest.TestCase):
-    pass
+
+    def test_accumulate_measurements_by_character(self):
+        accumulator = CharactersMeasurementsAccumulator()
+        accumulator.add_simulation_result(simulation_result("0", ["a", "b"], {'characterWon': [1, 0]}))
+        accumulator.add_simulation_result(simulation_result("1", ["c", "a"], {'characterWon': [1, 0]}))
+
+        self.assertEqual({'characterWon': [1, 0]}, accumulator.measurements_by_character["a"])
+        self.assertEqual({'characterWon': [0]}, accumulator.measurements_by_character["b"])
+        self.assertEqual({'characterWon': 0.5}, accumulator.mean_measurements("a"))
+        self.assertEqual(2, len(accumulator.simulations_results))
@@ -0,0 +1,46 @@
+import unittest
+from typing import List, Iterator
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import simulation_data_queue, \
+    SIMULATION_DATA_QUEUE
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_types import SimulationData, SimulationResult, \
+    PRIORITY_NORMAL
+from solai_evolutionary_algorithm.evaluation.simulation.synthetic_simulation_backend import SyntheticSimulationBackend
+from solai_evolutionary_algorithm.evolution.evolver import Evolver
+from solai_evolutionary_algorithm.evolve_configurations import constrained_novelty_config
+
+
+class RecordingSimulationBackend(SyntheticSimulationBackend):
+
+    def __init__(self):
+        super().__init__(seed=1)
+        self.simulations_data: List[SimulationData] = []
+
+    def iter_simulations_results(self, simulations_data: List[SimulationData]) -> Iterator[SimulationResult]:
+        self.simulations_data.extend(simulations_data)
+        return super().iter_simulations_results(simulations_data)
+
+
+class SimulationPriorityTest(unittest.TestCase):
+
+    def test_default_config_only_uses_normal_lane(self):
+        backend = RecordingSimulationBackend()
+        config = constrained_novelty_config.config(
+            population_size=6, generations=3, simulation_population_count=2, simulation_backend=backend)
+        config.evolver_listeners.clear()
+        Evolver().evolve(config)
+
+        self.assertTrue(backend.simulations_data)
+        self.assertEqual({SIMULATION_DATA_QUEUE}, {
+            simulation_data_queue(simulation_data.get('priority', PRIORITY_NORMAL))
+            for simulation_data in backend.simulations_data
+        })
+
+    def test_open_ended_range_only_tests_lower_bound(self):
+        evaluator = constrained_novelty_config.config(simulation_backend=SyntheticSimulationBackend()) \
+            .fitness_evaluator
+        evaluator.borderline_margin = 0.1
+        evaluator.feasible_metric_ranges = {"leadChange": (4, constrained_novelty_config.sol_metrics.MAX_VALUE)}
+        self.assertTrue(evaluator.is_borderline_metric_result("leadChange", 4.3))
+        self.assertFalse(evaluator.is_borderline_metric_result("leadChange", 5))
+        self.assertFalse(evaluator.is_borderline_metric_result("leadChange", 1e300))
@@ -0,0 +1,61 @@
+import time
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_telemetry import SimulationTelemetryListener
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class TelemetryRecords(SimulationTelemetryListener):
+
+    def __init__(self):
+        self.batches = []
+
+    def on_batch(self, batch_telemetry):
+        self.batches.append(batch_telemetry)
+
+
+class SimulationQueueResultsTest(FakeRedisWorkersTestCase):
+
+    def test_lost_simulation_is_repushed_after_latencies_are_known(self):
+        queue = SimulationQueue(run_scoped_results=True, min_latency_samples=2, lost_simulation_timeout=1)
+        self.start_workers(1)
+        self.simulate(queue, self.simulations_data(queue, 5))
+
+        simulations_data = self.simulations_data(queue, 5)
+        self.dropped_ids.add(simulations_data[2]['simulationId'])
+        results = self.simulate(queue, simulations_data)
+        self.assertEqual(len(results), 5)
+        self.assertFalse(self.dropped_ids)
+
+    def test_straggler_is_speculatively_repushed(self):
+        telemetry = TelemetryRecords()
+        queue = SimulationQueue(
+            run_scoped_results=True, speculative_reexecution=True, min_latency_samples=3,
+            speculation_completed_fraction=0.5, lost_simulation_timeout=60, telemetry_listeners=[telemetry])
+        self.start_workers(2)
+        simulations_data = self.simulations_data(queue, 6)
+        self.slow_seconds_by_id[simulations_data[0]['simulationId']] = 5
+
+        start_time = time.time()
+        results = self.simulate(queue, simulations_data)
+        self.assertEqual(len(results), 6)
+        self.assertLess(time.time() - start_time, 5)
+        self.assertGreaterEqual(telemetry.batches[0]['repushes'].get("speculative", 0), 1)
+
+    def test_queued_speculative_copies_are_cancelled_when_the_batch_completes(self):
+        telemetry = TelemetryRecords()
+        queue = SimulationQueue(
+            run_scoped_results=True, speculative_reexecution=True, min_latency_samples=2,
+            speculation_completed_fraction=0.5, lost_simulation_timeout=60, telemetry_listeners=[telemetry])
+        # a single worker, busy with the straggler while its copy waits in the queue
+        self.start_workers(1, max_simulations=4)
+        simulations_data = self.simulations_data(queue, 4)
+        self.slow_seconds_by_id[simulations_data[-1]['simulationId']] = 3
+
+        results = self.simulate(queue, simulations_data)
+        self.assertEqual(len(results), 4)
+        self.assertGreaterEqual(telemetry.batches[0]['repushes'].get("speculative", 0), 1)
+        self.assertEqual(self.data_queue_depth(), 0)
+
+    def test_speculation_is_off_by_default(self):
+        self.assertFalse(SimulationQueue().speculative_reexecution)
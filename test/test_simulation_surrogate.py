@@ -0,0 +1,20 @@
+import random
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_surrogate import RidgeSurrogate
+
+
+class RidgeSurrogateTest(unittest.TestCase):
+
+    def test_learns_linear_metric(self):
+        rng = random.Random(0)
+        surrogate = RidgeSurrogate(["characterWon"], features_count=2, regularization=0.01, min_observations=20)
+        self.assertIsNone(surrogate.predict([0.5, 0.5]))
+
+        for _ in range(100):
+            genome_vector = [rng.random(), rng.random()]
+            surrogate.add(genome_vector, {'characterWon': 0.2 + 0.6 * genome_vector[0] + rng.gauss(0, 0.01)})
+
+        predicted_means, predicted_stds = surrogate.predict([0.5, 0.9])
+        self.assertAlmostEqual(predicted_means['characterWon'], 0.5, places=1)
+        self.assertLess(predicted_stds['characterWon'], 0.05)
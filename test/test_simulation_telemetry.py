@@ -0,0 +1,24 @@
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_telemetry import BatchTelemetryRecorder
+
+
+class BatchTelemetryRecorderTest(unittest.TestCase):
+
+    def test_record(self):
+        recorder = BatchTelemetryRecorder("run", started_at=100)
+        recorder.pushed("1", pushed_at=100)
+        recorder.pushed("2", pushed_at=100)
+        recorder.completed({'simulationId': "1", 'metrics': {}, 'startedAt': 101}, completed_at=102)
+        recorder.completed({'simulationId': "2", 'metrics': {}}, completed_at=104)
+        recorder.repushed("speculative", 1)
+        recorder.repushed("lost", 0)
+        recorder.discarded_result()
+
+        batch_telemetry = recorder.record(ended_at=104, simulations_count=3, fleet_utilization=None)
+        self.assertEqual(batch_telemetry['coalesced'], 1)
+        self.assertEqual(batch_telemetry['throughput'], 0.5)
+        self.assertEqual(batch_telemetry['latencyPercentiles'], {'p50': 4, 'p90': 4, 'p99': 4})
+        self.assertEqual(batch_telemetry['queueWaitPercentiles'], {'p50': 1, 'p90': 1, 'p99': 1})
+        self.assertEqual(batch_telemetry['repushes'], {'speculative': 1})
+        self.assertEqual(batch_telemetry['discardedResults'], 1)
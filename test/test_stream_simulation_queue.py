@@ -0,0 +1,70 @@
+import json
+import unittest
+
+import redis
+
+from solai_evolutionary_algorithm.evaluation.simulation.stream_simulation_queue import StreamSimulationQueue, \
+    SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP
+
+
+def local_redis_available() -> bool:
+    try:
+        return redis.StrictRedis(host="localhost", port=6379).ping()
+    except redis.exceptions.ConnectionError:
+        return False
+
+
+@unittest.skipUnless(local_redis_available(), "no redis-server running on localhost:6379")
+class StreamSimulationQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulation_queue = StreamSimulationQueue(
+            host="localhost", run_scoped_results=True, lease_timeout=0, speculative_reexecution=False)
+        self.redis = self.simulation_queue.redis
+        self.simulations_data = [
+            {
+                'simulationId': self.simulation_queue.create_simulation_id(),
+                'charactersConfigs': [{'characterId': "a"}, {'characterId': "b"}],
+                'metrics': ["gameLength"]
+            }
+            for _ in range(3)
+        ]
+
+    def tearDown(self):
+        self.simulation_queue.cancel_simulations(self.simulations_data)
+        self.redis.delete(self.simulation_queue.result_queue)
+
+    def read_simulations_data(self, worker: str):
+        response = self.redis.xreadgroup(
+            SIMULATION_WORKERS_GROUP, worker, {SIMULATION_DATA_STREAM: ">"}, count=len(self.simulations_data))
+        return response[0][1]
+
+    def push_result(self, entry_id, fields):
+        simulation_data = json.loads(fields[b"data"])
+        simulation_result = {'simulationId': simulation_data['simulationId'], 'metrics': {'gameLength': [1, 1]}}
+        self.redis.xadd(simulation_data['replyTo'], {"data": json.dumps(simulation_result)})
+        self.redis.xack(SIMULATION_DATA_STREAM, SIMULATION_WORKERS_GROUP, entry_id)
+        self.redis.xdel(SIMULATION_DATA_STREAM, entry_id)
+
+    def test_results_of_unacknowledged_simulations_arrive_after_requeue(self):
+        self.simulation_queue.push_simulations_data(self.simulations_data)
+        # a worker reads the simulations and dies without acknowledging them
+        self.read_simulations_data("dead-worker")
+
+        remaining_simulation_data_by_id = {
+            simulation_data['simulationId']: simulation_data
+            for simulation_data in self.simulations_data
+        }
+        self.assertEqual(3, self.simulation_queue.requeue_expired_leases(remaining_simulation_data_by_id, {}))
+
+        for entry_id, fields in self.read_simulations_data("worker"):
+            self.push_result(entry_id, fields)
+        simulation_results = self.simulation_queue.get_simulation_results_blocking(timeout=1)
+        self.assertEqual(
+            set(remaining_simulation_data_by_id.keys()),
+            {simulation_result['simulationId'] for simulation_result in simulation_results}
+        )
+
+    def test_cancel_removes_undelivered_simulations(self):
+        self.simulation_queue.push_simulations_data(self.simulations_data)
+        self.assertEqual(3, self.simulation_queue.cancel_simulations(self.simulations_data))
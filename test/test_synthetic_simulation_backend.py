@@ -0,0 +1,40 @@
+import unittest
+
+from solai_evolutionary_algorithm.evaluation.simulation.synthetic_simulation_backend import \
+    SyntheticSimulationBackend, SYNTHETIC_METRICS
+from solai_evolutionary_algorithm.initial_population_producers.from_existing_producers import load_char_from_file
+
+
+class SyntheticSimulationBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.characters_configs = [
+            {**load_char_from_file(f"existing_characters/{char_filename}"), 'characterId': char_filename}
+            for char_filename in ["shrankConfig.json", "brailConfig.json"]
+        ]
+
+    def simulate(self, backend: SyntheticSimulationBackend, count: int):
+        return [
+            simulation_result['metrics']
+            for simulation_result in backend.push_simulations_data_wait_results([
+                {
+                    'simulationId': backend.create_simulation_id(),
+                    'charactersConfigs': self.characters_configs,
+                    'metrics': list(SYNTHETIC_METRICS)
+                }
+                for _ in range(count)
+            ])
+        ]
+
+    def test_same_seed_gives_same_metrics(self):
+        self.assertEqual(
+            self.simulate(SyntheticSimulationBackend(seed=1), 5),
+            self.simulate(SyntheticSimulationBackend(seed=1), 5)
+        )
+
+    def test_metrics_are_plausible(self):
+        for metrics in self.simulate(SyntheticSimulationBackend(), 20):
+            self.assertEqual(1, sum(metrics['characterWon']))
+            self.assertTrue(0 < metrics['gameLength'][0] <= 3 * 60 * 60)
+            for coverage in metrics['stageCoverage']:
+                self.assertTrue(0 <= coverage <= 1)
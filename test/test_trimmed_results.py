@@ -0,0 +1,36 @@
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class TrimmedResultsTest(FakeRedisWorkersTestCase):
+
+    def simulation_result(self, simulation_data, started_at):
+        simulation_result = super().simulation_result(simulation_data, started_at)
+        if not simulation_data.get('trimResult', False):
+            simulation_result['simulationData'] = simulation_data
+        return simulation_result
+
+    def test_trimmed_results_get_the_local_simulation_data(self):
+        queue = SimulationQueue(run_scoped_results=True, trim_results=True)
+        self.start_workers(2)
+        simulations_data = self.simulations_data(queue, 4)
+
+        simulation_results = self.simulate(queue, simulations_data)
+
+        self.assertTrue(all(simulation_data['trimResult'] for simulation_data in self.worked_simulations_data))
+        simulation_data_by_id = {
+            simulation_data['simulationId']: simulation_data
+            for simulation_data in simulations_data
+        }
+        self.assertEqual(len(simulation_results), 4)
+        for simulation_result in simulation_results:
+            self.assertEqual(simulation_result['simulationData'], simulation_data_by_id[simulation_result['simulationId']])
+            self.assertEqual(simulation_result['metrics'], {'characterWon': [1.0, 0.0]})
+
+    def test_results_are_not_trimmed_by_default(self):
+        queue = SimulationQueue(run_scoped_results=True)
+        self.start_workers(1)
+
+        self.simulate(queue, self.simulations_data(queue, 2))
+
+        self.assertFalse(any('trimResult' in simulation_data for simulation_data in self.worked_simulations_data))
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class WindowedSubmissionTest(FakeRedisWorkersTestCase):
+
+    def test_windowed_submission_limits_pending_simulations(self):
+        queue = SimulationQueue(
+            run_scoped_results=True, windowed_submission=True, min_window_size=2, initial_window_size=2,
+            window_target_seconds=0.001)
+        pending_counts = []
+        pushed_ids = set()
+        received_ids = set()
+        push_simulations_data = queue.push_simulations_data
+
+        def push_and_count(simulations_data):
+            pending_counts.append(len(pushed_ids) - len(received_ids) + len(simulations_data))
+            pushed_ids.update(simulation_data['simulationId'] for simulation_data in simulations_data)
+            push_simulations_data(simulations_data)
+        queue.push_simulations_data = push_and_count
+        self.start_workers(2)
+
+        simulations_data = self.simulations_data(queue, 10)
+        for simulation_result in queue.iter_simulations_results(simulations_data):
+            received_ids.add(simulation_result['simulationId'])
+
+        self.assertEqual(received_ids, {simulation_data['simulationId'] for simulation_data in simulations_data})
+        self.assertLessEqual(max(pending_counts), 2)
+
+    def test_stopped_iteration_cancels_not_started_simulations(self):
+        queue = SimulationQueue(run_scoped_results=True)
+        self.start_workers(1, max_simulations=1)
+        simulations_results = queue.iter_simulations_results(self.simulations_data(queue, 5))
+        next(simulations_results)
+        simulations_results.close()
+
+        self.assertEqual(self.data_queue_depth(), 0)
+
+    def test_cancel_during_iteration_ends_it_without_repushing(self):
+        queue = SimulationQueue(run_scoped_results=True, lost_simulation_timeout=0.5)
+        self.start_workers(1, max_simulations=1)
+        results = []
+        errors = []
+
+        def iterate():
+            try:
+                for simulation_result in queue.iter_simulations_results(self.simulations_data(queue, 5)):
+                    results.append(simulation_result)
+            except RuntimeError as error:
+                errors.append(error)
+        reader = threading.Thread(target=iterate, daemon=True)
+        reader.start()
+        while not results:
+            time.sleep(0.05)
+
+        self.assertEqual(queue.cancel_pending_simulations(), 4)
+        reader.join(10)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(len(errors), 1)
+        # longer than the lost simulation timeout, which re-pushed cancelled simulations before
+        time.sleep(2)
+        self.assertEqual(self.data_queue_depth(), 0)
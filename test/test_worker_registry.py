@@ -0,0 +1,39 @@
+import time
+
+from solai_evolutionary_algorithm.evaluation.simulation.simulation_queue import SimulationQueue
+from solai_evolutionary_algorithm.evaluation.simulation.worker_registry import WorkerRegistry
+from test.fake_redis_workers import FakeRedisWorkersTestCase
+
+
+class WorkerRegistryTest(FakeRedisWorkersTestCase):
+
+    def test_fleet_capacity_sums_alive_workers(self):
+        worker_registry = WorkerRegistry(self.redis)
+        worker_registry.publish_heartbeat("a", slots=4, busy=1)
+        worker_registry.publish_heartbeat("b", slots=2, busy=2)
+        worker_registry.publish_heartbeat("c", slots=8, busy=0)
+        worker_registry.publish_heartbeat("expired", slots=16, busy=0, ttl=1)
+        worker_registry.remove_worker("c")
+        time.sleep(1.1)
+
+        self.assertEqual(worker_registry.fleet_capacity(), {'workers': 2, 'slots': 6, 'busy': 3})
+
+    def test_empty_fleet_stops_the_batch(self):
+        queue = SimulationQueue(
+            run_scoped_results=True, worker_registry=True, empty_fleet_timeout=1, fleet_check_interval=0.2,
+            lost_simulation_timeout=1)
+
+        with self.assertRaises(RuntimeError):
+            list(queue.iter_simulations_results(self.simulations_data(queue, 3)))
+
+        self.assertEqual(queue.last_fleet_capacity['workers'], 0)
+        self.assertEqual(self.data_queue_depth(), 0)
+
+    def test_alive_fleet_is_reported(self):
+        queue = SimulationQueue(run_scoped_results=True, worker_registry=True, empty_fleet_timeout=1)
+        WorkerRegistry(self.redis).publish_heartbeat("a", slots=2, busy=1)
+        self.start_workers(2)
+
+        self.assertEqual(len(self.simulate(queue, self.simulations_data(queue, 4))), 4)
+        self.assertEqual(queue.last_fleet_capacity, {'workers': 1, 'slots': 2, 'busy': 1})
+        self.assertEqual(queue.last_fleet_utilization, 0.5)